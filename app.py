@@ -1,17 +1,45 @@
 # app.py - Mind Map Mini - Backend Flask Amélioré avec Support Multilingue
 
-from flask import Flask, render_template, request, jsonify, send_file, make_response
+from flask import Flask, render_template, request, jsonify, send_file, make_response, Response, stream_with_context
 from flask_cors import CORS
 import json
 import os
+import queue
 import uuid
-from datetime import datetime
+from datetime import date, datetime, time as day_time, timezone
 import shutil
 from pathlib import Path
 import base64
+import codecs
 import io
+import tempfile
 import zipfile
-from collections import defaultdict
+import hashlib
+import gzip
+import zlib
+import re
+import threading
+import time
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import grinde
+import map_catalog
+import map_outline
+import map_schema
+import map_stream
+from grinde import GrindeTally, GrindeFingerprint
+
+try:
+    import brotli  # Optionnel : compression Brotli en plus de gzip
+except ImportError:
+    brotli = None
+
+try:
+    import map_thumbnail  # Optionnel (PIL) : vignettes PNG des cartes
+except ImportError:
+    map_thumbnail = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'mindmap-mini-secret-2024'
@@ -22,6 +50,37 @@ CORS(app)
 app.config['AUTOSAVE_ENABLED'] = True
 app.config['AUTOSAVE_FREQUENCY'] = 60  # seconds
 
+# Compression des réponses (gzip, et brotli si installé)
+app.config['COMPRESSION_MIN_SIZE'] = 1024  # octets
+app.config['COMPRESSION_LEVEL'] = 6
+
+# Pages HTML servies depuis la mémoire (minification optionnelle au démarrage)
+app.config['MINIFY_STATIC_HTML'] = os.environ.get('MINIFY_STATIC_HTML', '0') == '1'
+app.config['STATIC_MAX_AGE'] = 365 * 24 * 60 * 60  # ressources versionnées
+
+# Catalogue des cartes : écriture sur disque et réconciliation en arrière-plan
+app.config['CATALOG_SYNC_INTERVAL'] = 30  # secondes
+app.config['CATALOG_WORKERS'] = int(os.environ.get('CATALOG_WORKERS', os.cpu_count() or 1))
+
+# Exports déjà rendus (texte, markdown, HTML, JSON) gardés en mémoire
+app.config['EXPORT_CACHE_BYTES'] = int(os.environ.get('EXPORT_CACHE_BYTES', 32 * 1024 * 1024))
+
+# Vignettes PNG rendues en arrière-plan après chaque sauvegarde
+app.config['THUMBNAIL_SIZE'] = (320, 200)  # pixels
+
+# Templates servis depuis la mémoire ; dossier revérifié au plus toutes les N secondes
+app.config['TEMPLATES_CHECK_INTERVAL'] = 2  # secondes
+
+# Import en lot : fichiers validés et écrits sur plusieurs processus
+app.config['IMPORT_WORKERS'] = int(os.environ.get('IMPORT_WORKERS', os.cpu_count() or 1))
+
+# Limites des cartes importées, vérifiées pendant la lecture en flux
+app.config['IMPORT_MAX_NODES'] = int(os.environ.get('IMPORT_MAX_NODES', 100000))
+app.config['IMPORT_MAX_CONNECTIONS'] = int(os.environ.get('IMPORT_MAX_CONNECTIONS', 200000))
+app.config['IMPORT_MAX_TEXT_LENGTH'] = int(os.environ.get('IMPORT_MAX_TEXT_LENGTH', 10000))  # caractères
+app.config['IMPORT_MAX_DEPTH'] = int(os.environ.get('IMPORT_MAX_DEPTH', 32))  # imbrication JSON
+app.config['IMPORT_MAX_BYTES'] = int(os.environ.get('IMPORT_MAX_BYTES', 64 * 1024 * 1024))  # par fichier d'un import en lot, décompressé
+
 CORS(app)
 
 # Configuration des dossiers
@@ -30,9 +89,10 @@ TEMPLATES_FOLDER = 'map_templates'
 EXPORTS_FOLDER = 'exports'
 AUTOSAVE_FOLDER = 'autosave'
 BACKUP_FOLDER = 'backups'
+THUMBNAILS_FOLDER = 'thumbnails'
 
 # Créer les dossiers nécessaires
-for folder in [MAPS_FOLDER, TEMPLATES_FOLDER, EXPORTS_FOLDER, AUTOSAVE_FOLDER, BACKUP_FOLDER, 'static', 'templates']:
+for folder in [MAPS_FOLDER, TEMPLATES_FOLDER, EXPORTS_FOLDER, AUTOSAVE_FOLDER, BACKUP_FOLDER, THUMBNAILS_FOLDER, 'static', 'templates']:
     os.makedirs(folder, exist_ok=True)
 
 # Traductions pour les exports
@@ -54,7 +114,8 @@ TRANSLATIONS = {
         'copy': 'Copie',
         'untitled': 'Sans titre',
         'recent_maps': 'Cartes récentes',
-        'no_maps': 'Aucune carte trouvée'
+        'no_maps': 'Aucune carte trouvée',
+        'unconnected': 'Idées non reliées'
     },
     'en': {
         'mind_map': 'Mind Map',
@@ -73,7 +134,8 @@ TRANSLATIONS = {
         'copy': 'Copy',
         'untitled': 'Untitled',
         'recent_maps': 'Recent maps',
-        'no_maps': 'No maps found'
+        'no_maps': 'No maps found',
+        'unconnected': 'Unconnected ideas'
     }
 }
 
@@ -84,6 +146,12 @@ TRANSLATIONS = {
 class MindMapManager:
     """Gestionnaire amélioré pour les mind maps sauvegardées en JSON"""
     
+    # Scores GRINDE mémorisés par empreinte des champs qui les influencent
+    GRINDE_SCORE_VERSION = map_catalog.GRINDE_SCORE_VERSION
+    GRINDE_CACHE_SIZE = 2048
+    _grinde_cache = OrderedDict()
+    grinde_cache_stats = {'hits': 0, 'misses': 0}
+    
     @staticmethod
     def generate_id():
         """Générer un ID unique avec timestamp"""
@@ -99,93 +167,104 @@ class MindMapManager:
     @staticmethod
     def list_maps(language='fr'):
         """Lister toutes les cartes disponibles avec support multilingue"""
-        maps = []
+        headers = []
+        versions = {}
         if os.path.exists(MAPS_FOLDER):
             for filename in os.listdir(MAPS_FOLDER):
                 if filename.endswith('.json') and not filename.startswith('.'):
+                    filepath = os.path.join(MAPS_FOLDER, filename)
                     try:
-                        with open(os.path.join(MAPS_FOLDER, filename), 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            # Calculer le score GRINDE si applicable
-                            grinde_score = MindMapManager.calculate_grinde_score(data) if data.get('mode') == 'grinde' else None
-                            
-                            maps.append({
-                                'id': filename[:-5],
-                                'title': data.get('title', TRANSLATIONS[language]['untitled']),
-                                'mode': data.get('mode', 'grinde'),
-                                'created': data.get('created', ''),
-                                'modified': data.get('modified', ''),
-                                'nodeCount': len(data.get('nodes', [])),
-                                'connectionCount': len(data.get('connections', [])),
-                                'preview': data.get('preview', ''),
-                                'language': data.get('metadata', {}).get('language', 'fr'),
-                                'grindeScore': grinde_score
-                            })
+                        versions[filename[:-5]] = os.stat(filepath).st_mtime_ns
+                        # Lecture en flux : les nœuds sont comptés sans charger la carte
+                        headers.append((filename[:-5], map_stream.read_map_header(filepath)))
                     except Exception as e:
                         print(f"Erreur lecture {filename}: {e}")
                         continue
         
+        maps = [MindMapManager.localize(summary, language)
+                for summary in MindMapManager.summaries_from_headers(headers)]
+        for summary in maps:
+            summary['thumbnail'] = thumbnail_url(summary['id'], versions[summary['id']])
+        
         # Trier par date de modification (plus récent en premier)
         return sorted(maps, key=lambda x: x.get('modified', ''), reverse=True)
     
+    @staticmethod
+    def summaries_from_headers(headers):
+        """Résumés de cartes lues en flux, scores GRINDE manquants calculés en un seul lot"""
+        return map_catalog.summaries_from_headers(headers, MindMapManager.cached_grinde_score,
+                                                  MindMapManager.remember_grinde_score)
+    
+    @staticmethod
+    def summarize(map_id, data):
+        """Résumé d'une carte tel qu'affiché dans les listes (sans score GRINDE)"""
+        return map_catalog.summarize_header(
+            map_id, data, len(data.get('nodes', [])), len(data.get('connections', [])))
+    
+    @staticmethod
+    def localize(summary, language='fr'):
+        """Copie d'un résumé avec le titre par défaut traduit si la carte n'en a pas"""
+        summary = dict(summary)
+        if summary['title'] is None:
+            summary['title'] = TRANSLATIONS[language]['untitled']
+        return summary
+    
     @staticmethod
     def calculate_grinde_score(data):
         """Calculer le score GRINDE d'une carte"""
         if data.get('mode') != 'grinde':
             return None
         
-        score = {
-            'grouped': 0,
-            'reflective': 0,
-            'interconnected': 0,
-            'nonverbal': 0,
-            'directional': 0,
-            'emphasized': 0,
-            'total': 0
-        }
-        
-        nodes = data.get('nodes', [])
-        connections = data.get('connections', [])
-        
-        # G - Grouped: Présence de groupes
-        group_nodes = [n for n in nodes if n.get('type') == 'group']
-        score['grouped'] = min(100, len(group_nodes) * 25)
-        
-        # R - Reflective: Diversité du vocabulaire
-        unique_words = set()
-        for node in nodes:
-            words = node.get('text', '').lower().split()
-            unique_words.update(words)
-        score['reflective'] = min(100, len(unique_words) * 3)
-        
-        # I - Interconnected: Ratio connexions/nœuds
-        if len(nodes) > 1:
-            connectivity_ratio = len(connections) / (len(nodes) - 1)
-            score['interconnected'] = min(100, int(connectivity_ratio * 60))
-        
-        # N - Non-verbal: Présence d'émojis/symboles
-        emoji_count = 0
-        for node in nodes:
-            text = node.get('text', '')
-            # Compter les émojis (caractères Unicode dans certaines plages)
-            emoji_count += sum(1 for c in text if ord(c) > 127)
-        score['nonverbal'] = min(100, emoji_count * 15)
+        tally = GrindeTally.from_map(data.get('nodes', []), data.get('connections', []))
+        return grinde.score(tally, 'mini')
+    
+    @staticmethod
+    def grinde_fingerprint(data):
+        """Empreinte des seuls champs qui influencent le score GRINDE"""
+        return GrindeFingerprint.from_map(data.get('nodes', []), data.get('connections', []),
+                                          MindMapManager.GRINDE_SCORE_VERSION).hexdigest()
+    
+    @staticmethod
+    def get_grinde_score(data, fingerprint=None):
+        """Score GRINDE mémorisé : recalculé uniquement si l'empreinte de la carte a changé"""
+        if data.get('mode') != 'grinde':
+            return None
         
-        # D - Directional: Connexions directionnelles
-        arrow_connections = [c for c in connections if c.get('type') == 'arrow']
-        if connections:
-            score['directional'] = int((len(arrow_connections) / len(connections)) * 100)
+        fingerprint = fingerprint or MindMapManager.grinde_fingerprint(data)
+        score = MindMapManager.cached_grinde_score(data, fingerprint)
+        if score is None:
+            score = MindMapManager.calculate_grinde_score(data)
+            MindMapManager.remember_grinde_score(fingerprint, score)
+        return score
+    
+    @staticmethod
+    def cached_grinde_score(data, fingerprint):
+        """Score GRINDE déjà connu pour cette empreinte, ou None"""
+        stats = MindMapManager.grinde_cache_stats
         
-        # E - Emphasized: Variété de tailles et couleurs
-        sizes = set(n.get('size', 20) for n in nodes)
-        colors = set(n.get('color', '#6366f1') for n in nodes)
-        score['emphasized'] = min(100, (len(sizes) * 10 + len(colors) * 10))
+        # 1. Score persisté avec la carte lors de sa sauvegarde
+        score = map_catalog.persisted_score(data, fingerprint)
+        if score is not None:
+            stats['hits'] += 1
+            return score
         
-        # Score total
-        score['total'] = sum([score[k] for k in ['grouped', 'reflective', 'interconnected', 
-                                                  'nonverbal', 'directional', 'emphasized']]) // 6
+        # 2. Score déjà calculé par ce processus (cartes importées, éditées à la main...)
+        cache = MindMapManager._grinde_cache
+        if fingerprint in cache:
+            cache.move_to_end(fingerprint)
+            stats['hits'] += 1
+            return cache[fingerprint]
         
-        return score
+        stats['misses'] += 1
+        return None
+    
+    @staticmethod
+    def remember_grinde_score(fingerprint, score):
+        """Mémoriser un score calculé (LRU borné)"""
+        cache = MindMapManager._grinde_cache
+        cache[fingerprint] = score
+        if len(cache) > MindMapManager.GRINDE_CACHE_SIZE:
+            cache.popitem(last=False)
     
     @staticmethod
     def load_map(map_id):
@@ -207,7 +286,32 @@ class MindMapManager:
         """Sauvegarder une carte en JSON avec backup automatique"""
         if not map_id:
             map_id = MindMapManager.generate_id()
+        MindMapManager.prepare_map(map_id, data)
+        
+        # Créer un backup de l'ancienne version si elle existe
+        filepath = MindMapManager.get_map_path(map_id)
+        if os.path.exists(filepath):
+            backup_path = os.path.join(BACKUP_FOLDER, f"{map_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            shutil.copy2(filepath, backup_path)
+        
+        # Sauvegarder la nouvelle version (champs d'en-tête en premier pour la lecture en flux)
+        MindMapManager.write_map(filepath, data)
+        MAP_CATALOG.upsert(map_id, data, filepath, prepared=True)
+        EXPORT_CACHE.invalidate(map_id)
+        THUMBNAILS.schedule(map_id)
+        
+        # Créer une sauvegarde automatique
+        autosave_path = os.path.join(AUTOSAVE_FOLDER, f"{map_id}_latest.json")
+        shutil.copy2(filepath, autosave_path)
+        
+        # Nettoyer les vieilles sauvegardes
+        MindMapManager.cleanup_old_backups(map_id)
         
+        return map_id
+    
+    @staticmethod
+    def prepare_map(map_id, data):
+        """Compléter une carte avant écriture : id, dates, langue, score GRINDE et aperçu"""
         # Ajouter les métadonnées
         data['id'] = map_id
         data['modified'] = datetime.now().isoformat()
@@ -215,35 +319,35 @@ class MindMapManager:
             data['created'] = datetime.now().isoformat()
         
         # Ajouter les métadonnées de langue si non présentes
-        if 'metadata' not in data:
+        if not isinstance(data.get('metadata'), dict):
             data['metadata'] = {}
         if 'language' not in data['metadata']:
             data['metadata']['language'] = app.config['DEFAULT_LANGUAGE']
         
+        # Persister le score GRINDE avec l'empreinte qui permet de le réutiliser.
+        # Celui reçu du client n'est jamais repris : l'empreinte se calcule
+        # à partir de la carte, un score forgé passerait la vérification
+        data['metadata'].pop('grinde', None)
+        if data.get('mode') == 'grinde':
+            fingerprint = MindMapManager.grinde_fingerprint(data)
+            data['metadata']['grinde'] = {
+                'hash': fingerprint,
+                'score': MindMapManager.get_grinde_score(data, fingerprint)
+            }
+        
         # Générer un aperçu textuel
         if 'nodes' in data and len(data['nodes']) > 0:
             central = next((n for n in data['nodes'] if n.get('type') == 'central'), None)
             if central:
                 data['preview'] = central.get('text', '')[:50]
-        
-        # Créer un backup de l'ancienne version si elle existe
-        filepath = MindMapManager.get_map_path(map_id)
-        if os.path.exists(filepath):
-            backup_path = os.path.join(BACKUP_FOLDER, f"{map_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            shutil.copy2(filepath, backup_path)
-        
-        # Sauvegarder la nouvelle version
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        # Créer une sauvegarde automatique
-        autosave_path = os.path.join(AUTOSAVE_FOLDER, f"{map_id}_latest.json")
-        shutil.copy2(filepath, autosave_path)
-        
-        # Nettoyer les vieilles sauvegardes
-        MindMapManager.cleanup_old_backups(map_id)
-        
-        return map_id
+        return data
+    
+    @staticmethod
+    def write_map(filepath, data, exclusive=False):
+        """Écrire le fichier JSON d'une carte, champs d'en-tête en premier"""
+        # exclusive : FileExistsError plutôt qu'écraser une carte existante
+        with open(filepath, 'x' if exclusive else 'w', encoding='utf-8') as f:
+            json.dump(map_stream.header_first(data), f, indent=2, ensure_ascii=False)
     
     @staticmethod
     def cleanup_old_backups(map_id, keep_days=7):
@@ -286,6 +390,9 @@ class MindMapManager:
             file_path = MindMapManager.get_map_path(map_id)
             if os.path.exists(file_path):
                 os.remove(file_path)
+                MAP_CATALOG.discard(map_id)
+                EXPORT_CACHE.invalidate(map_id)
+                THUMBNAILS.discard(map_id)
                 return True
             return False
         except Exception as e:
@@ -306,6 +413,9 @@ class MindMapManager:
                 
                 with open(file_path, 'w', encoding='utf-8') as f:
                     json.dump(data, f, ensure_ascii=False, indent=2)
+                MAP_CATALOG.upsert(map_id, data, file_path)
+                EXPORT_CACHE.invalidate(map_id)
+                THUMBNAILS.schedule(map_id)
                 
                 return True
             return False
@@ -313,6 +423,443 @@ class MindMapManager:
             print(f"Erreur lors du renommage de {map_id}: {e}")
             return False
 
+# ==============================================================================
+# CATALOGUE DES CARTES ET STATISTIQUES INCRÉMENTALES
+# ==============================================================================
+
+class MapCatalog(map_catalog.MapCatalog):
+    """Catalogue des cartes de l'application : titres traduits, vignettes et scores GRINDE mémorisés"""
+    
+    def upsert(self, map_id, data, filepath=None, prepared=False):
+        """Enregistrer la version d'une carte qui vient d'être écrite"""
+        self._put(self.entry_for(map_id, data, filepath, prepared))
+    
+    @staticmethod
+    def entry_for(map_id, data, filepath=None, prepared=False):
+        """Entrée du catalogue d'une carte qui vient d'être écrite"""
+        # prepared : score GRINDE tout juste calculé par prepare_map, repris
+        # sans recalculer l'empreinte
+        entry = MindMapManager.summarize(map_id, data)
+        if data.get('mode') == 'grinde':
+            entry['grindeScore'] = (data['metadata']['grinde']['score'] if prepared
+                                    else MindMapManager.get_grinde_score(data))
+        try:
+            entry['_mtime'] = os.stat(filepath or MindMapManager.get_map_path(map_id)).st_mtime_ns
+        except OSError:
+            entry['_mtime'] = 0
+        return entry
+    
+    def summaries(self, headers):
+        return MindMapManager.summaries_from_headers(headers)
+    
+    def public(self, entry, language='fr'):
+        """Résumé exposé par l'API (sans les champs internes)"""
+        summary = MindMapManager.localize(entry, language)
+        summary['thumbnail'] = thumbnail_url(entry['id'], summary.pop('_mtime', 0))
+        summary.pop('_changed', None)
+        return summary
+
+MAP_CATALOG = MapCatalog(MAPS_FOLDER, os.path.join(MAPS_FOLDER, '.catalog.json'))
+
+@app.before_request
+def start_map_catalog():
+    """Démarrer le catalogue à la première requête (serveur de développement comme WSGI)"""
+    MAP_CATALOG.ensure_started(app.config['CATALOG_WORKERS'], app.config['CATALOG_SYNC_INTERVAL'])
+
+# ==============================================================================
+# CACHE DES EXPORTS
+# ==============================================================================
+
+class ExportCache:
+    """Exports rendus, indexés par (map_id, version du fichier, format, langue)"""
+    # LRU borné en octets. La version est dérivée du stat du fichier : une
+    # carte modifiée hors de l'application n'est jamais servie périmée, et
+    # save_map libère aussitôt les rendus de l'ancienne version.
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.items = OrderedDict()      # clé -> (contenu, titre)
+        self.by_map = defaultdict(set)  # map_id -> clés en cache
+        self.size = 0
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    @staticmethod
+    def version(filepath):
+        """Version d'un fichier de carte, sans le lire"""
+        stat = os.stat(filepath)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                self.counters['misses'] += 1
+                return None
+            self.items.move_to_end(key)
+            self.counters['hits'] += 1
+            return item
+    
+    def put(self, key, body, title):
+        # Un rendu plus gros que tout le cache n'y entre pas
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            self._remove(key)
+            self.items[key] = (body, title)
+            self.by_map[key[0]].add(key)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.items)))
+                self.counters['evictions'] += 1
+    
+    def _remove(self, key):
+        item = self.items.pop(key, None)
+        if item:
+            self.size -= len(item[0])
+            keys = self.by_map[key[0]]
+            keys.discard(key)
+            if not keys:
+                del self.by_map[key[0]]
+    
+    def record(self, key, title, chunks):
+        """Transmettre les morceaux d'un rendu et le mettre en cache une fois complet"""
+        # Seuls les rendus d'au plus un quart du cache sont conservés : un
+        # export géant traverse le cache sans y être accumulé
+        kept, size = [], 0
+        for chunk in chunks:
+            if kept is not None:
+                size += len(chunk)
+                if size <= self.max_bytes // 4:
+                    kept.append(chunk)
+                else:
+                    kept = None
+            yield chunk
+        if kept is not None:
+            self.put(key, b''.join(kept), title)
+    
+    def invalidate(self, map_id):
+        """Oublier tous les rendus d'une carte"""
+        with self.lock:
+            for key in list(self.by_map.get(map_id, ())):
+                self._remove(key)
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return dict(self.counters,
+                        entries=len(self.items),
+                        bytes=self.size,
+                        maxBytes=self.max_bytes,
+                        hitRate=round(self.counters['hits'] / lookups, 3) if lookups else 0)
+
+EXPORT_CACHE = ExportCache(app.config['EXPORT_CACHE_BYTES'])
+
+# ==============================================================================
+# VIGNETTES DES CARTES
+# ==============================================================================
+
+class ThumbnailStore:
+    """Vignettes PNG des cartes, rendues en arrière-plan et conservées sur disque par version"""
+    # Chaque vignette est rangée sous thumbnails/<map_id>/<version>.png, la
+    # version étant le mtime (ns) du fichier de la carte : le contenu d'une
+    # URL versionnée ne change jamais et le navigateur la garde sans
+    # revalider. Les sauvegardes sont rendues une à une par un seul thread
+    # de fond ; une carte déjà en attente n'est pas remise en file.
+    
+    def __init__(self, folder, size):
+        # Chemin absolu : send_file résout les chemins relatifs depuis
+        # app.root_path, pas depuis le répertoire de lancement
+        self.folder = os.path.abspath(folder)
+        self.size = size
+        self.queue = queue.Queue()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.worker = None
+        self.counters = {'rendered': 0, 'errors': 0}
+    
+    def path(self, map_id, version):
+        return os.path.join(self.folder, map_id, f"{version}.png")
+    
+    def schedule(self, map_id):
+        """Demander le rendu de la version courante d'une carte"""
+        if map_thumbnail is None:
+            return
+        with self.lock:
+            if map_id in self.pending:
+                return
+            self.pending.add(map_id)
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._work, name='map-thumbnails', daemon=True)
+                self.worker.start()
+        self.queue.put(map_id)
+    
+    def _work(self):
+        while True:
+            map_id = self.queue.get()
+            # Retirée avant le rendu : une sauvegarde pendant le rendu la remet en file
+            with self.lock:
+                self.pending.discard(map_id)
+            try:
+                self.render(map_id)
+            except Exception as e:
+                self.counters['errors'] += 1
+                print(f"Erreur vignette {map_id}: {e}")
+    
+    def render(self, map_id):
+        """Chemin de la vignette de la version courante, rendue si absente ; None si la carte n'existe pas"""
+        try:
+            version = os.stat(MindMapManager.get_map_path(map_id)).st_mtime_ns
+        except OSError:
+            return None
+        path = self.path(map_id, version)
+        if os.path.exists(path):
+            return path
+        
+        data = MindMapManager.load_map(map_id)
+        if not isinstance(data, dict):
+            return None
+        nodes, connections = data.get('nodes'), data.get('connections')
+        png = map_thumbnail.render_png(nodes if isinstance(nodes, list) else [],
+                                       connections if isinstance(connections, list) else [],
+                                       self.size)
+        
+        # Écriture atomique : une requête concurrente ne lit jamais un PNG partiel
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(png)
+        os.replace(temp_path, path)
+        self.counters['rendered'] += 1
+        self.discard(map_id, keep=path)
+        return path
+    
+    def discard(self, map_id, keep=None):
+        """Supprimer les vignettes d'une carte (sauf `keep`)"""
+        folder = os.path.join(self.folder, map_id)
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(folder, name)
+            if path != keep and name.endswith('.png'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if keep is None:
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+    
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, pending=len(self.pending), available=map_thumbnail is not None)
+
+THUMBNAILS = ThumbnailStore(THUMBNAILS_FOLDER, app.config['THUMBNAIL_SIZE'])
+
+def thumbnail_url(map_id, version):
+    """URL versionnée de la vignette d'une carte (None sans PIL)"""
+    if map_thumbnail is None:
+        return None
+    return f"/api/map/{map_id}/thumbnail.png?v={version}"
+
+# ==============================================================================
+# IMPORT EN LOT
+# ==============================================================================
+
+def read_import(fp):
+    """Carte lue en flux depuis un fichier binaire UTF-8, dans les limites configurées"""
+    return map_stream.load_map(codecs.getreader('utf-8')(fp),
+                               max_nodes=app.config['IMPORT_MAX_NODES'],
+                               max_connections=app.config['IMPORT_MAX_CONNECTIONS'],
+                               max_text_length=app.config['IMPORT_MAX_TEXT_LENGTH'],
+                               max_depth=app.config['IMPORT_MAX_DEPTH'])
+
+_IMPORT_ARCHIVES = {}  # chemin -> ZipFile ouvert, propre à chaque processus
+
+def open_import_source(path, member=None):
+    """Flux binaire d'un fichier à importer : fichier reçu, ou membre d'une archive ZIP"""
+    if member is None:
+        return open(path, 'rb')
+    # Archive ouverte une seule fois par processus pour tous ses membres ;
+    # le membre est décompressé au fil de la lecture, jamais en entier
+    archive = _IMPORT_ARCHIVES.get(path)
+    if archive is None:
+        archive = _IMPORT_ARCHIVES[path] = zipfile.ZipFile(path)
+    return archive.open(member)
+
+def close_import_archives(paths):
+    """Fermer les archives ouvertes par open_import_source dans ce processus"""
+    for path in paths:
+        archive = _IMPORT_ARCHIVES.pop(path, None)
+        if archive:
+            archive.close()
+
+def import_entry(task):
+    """(nom, map_id, entrée du catalogue, erreur) d'un fichier importé ; exécuté dans les processus de travail"""
+    # Contrairement à save_map, ni sauvegarde de l'ancienne version (l'id
+    # est neuf) ni nettoyage des backups : le fichier est seulement validé,
+    # complété puis écrit, et le catalogue est mis à jour par l'appelant
+    name, path, member = task
+    try:
+        with open_import_source(path, member) as fp:
+            data = read_import(fp)
+        map_schema.normalize_map(data)
+        # Des milliers d'ids tirés dans la même seconde peuvent se
+        # rencontrer : le fichier est créé en exclusif et l'id retiré
+        for _ in range(10):
+            map_id = MindMapManager.generate_id()
+            filepath = MindMapManager.get_map_path(map_id)
+            try:
+                MindMapManager.write_map(filepath, MindMapManager.prepare_map(map_id, data), exclusive=True)
+                return name, map_id, MapCatalog.entry_for(map_id, data, filepath, prepared=True), None
+            except FileExistsError:
+                continue
+        return name, None, None, 'Could not allocate a map id'
+    except Exception as e:
+        return name, None, None, f"{type(e).__name__}: {e}"
+
+def is_importable_member(name):
+    """Fichier d'archive à importer : les cartes JSON, sans le manifeste ni les templates d'export_all"""
+    parts = name.split('/')
+    return (name.endswith('.json') and parts[-1] != 'manifest.json'
+            and not parts[-1].startswith('.') and parts[0] not in ('templates', '__MACOSX'))
+
+class ImportJob:
+    """Import en lot exécuté en arrière-plan, avec son avancement et le rapport par fichier"""
+    
+    CHUNK_SIZE = 16  # fichiers confiés à la fois à un processus
+    
+    def __init__(self, workdir, uploads):
+        self.id = uuid.uuid4().hex
+        self.workdir = workdir
+        self.uploads = uploads      # [(nom envoyé, chemin du fichier reçu)]
+        self.lock = threading.Lock()
+        self.state = 'queued'
+        self.total = 0
+        self.processed = 0
+        self.imported = []          # [{'file': ..., 'id': ...}]
+        self.errors = []            # [{'file': ..., 'error': ...}]
+        self.error = None
+        self.created = datetime.now().isoformat()
+        self.finished = None
+    
+    def sources(self):
+        """(nom, chemin reçu, membre d'archive ou None, taille décompressée) de chaque fichier à importer"""
+        # Seuls les répertoires des archives sont lus ici : les membres sont
+        # décompressés en flux par les processus de travail
+        sources = []
+        for upload_name, path in self.uploads:
+            if zipfile.is_zipfile(path):
+                with zipfile.ZipFile(path) as archive:
+                    sources.extend((f"{upload_name}/{info.filename}", path, info.filename, info.file_size)
+                                   for info in archive.infolist()
+                                   if not info.is_dir() and is_importable_member(info.filename))
+            else:
+                sources.append((upload_name, path, None, os.path.getsize(path)))
+        return sources
+    
+    def run(self, workers=None):
+        """Valider et écrire tous les fichiers, puis mettre à jour le catalogue en une fois"""
+        pool, entries = None, []
+        max_bytes = app.config['IMPORT_MAX_BYTES']
+        try:
+            self.state = 'running'
+            sources = self.sources()
+            self.total = len(sources)
+            if workers and workers > 1 and len(sources) > self.CHUNK_SIZE:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            
+            # Fichiers soumis par fenêtres : l'avancement progresse lot par lot
+            window = (workers or 1) * self.CHUNK_SIZE * 4
+            for start in range(0, len(sources), window):
+                batch = []
+                for name, path, member, size in sources[start:start + window]:
+                    # Taille annoncée par l'archive : un membre qui se décompresse
+                    # en gigaoctets est écarté sans être ouvert (zipfile ne
+                    # décompresse jamais au-delà de cette taille)
+                    if size > max_bytes:
+                        self.record(name, None, f"LimitError: file is larger than {max_bytes} bytes")
+                    else:
+                        batch.append((name, path, member))
+                results = (pool.map(import_entry, batch, chunksize=self.CHUNK_SIZE) if pool
+                           else map(import_entry, batch))
+                for name, map_id, entry, error in results:
+                    if entry:
+                        entries.append(entry)
+                    self.record(name, map_id, error)
+        except Exception as e:
+            self.state = 'failed'
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            if pool:
+                pool.shutdown()
+            close_import_archives(path for _, path in self.uploads)
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            
+            # Une seule mise à jour du catalogue pour tout le lot
+            MAP_CATALOG.upsert_many(entries)
+            MAP_CATALOG.flush()
+            for entry in entries:
+                THUMBNAILS.schedule(entry['id'])
+            with self.lock:
+                self.finished = datetime.now().isoformat()
+                if self.state == 'running':
+                    self.state = 'done'
+    
+    def record(self, name, map_id, error):
+        with self.lock:
+            self.processed += 1
+            if error:
+                self.errors.append({'file': name, 'error': error})
+            else:
+                self.imported.append({'file': name, 'id': map_id})
+    
+    def status(self):
+        with self.lock:
+            return {
+                'id': self.id,
+                'state': self.state,
+                'total': self.total,
+                'processed': self.processed,
+                'progress': round(self.processed / self.total * 100, 1) if self.total else (100.0 if self.finished else 0.0),
+                'importedCount': len(self.imported),
+                'errorCount': len(self.errors),
+                'imported': list(self.imported),
+                'errors': list(self.errors),
+                'error': self.error,
+                'created': self.created,
+                'finished': self.finished
+            }
+
+class ImportJobs:
+    """Imports en lot récents, consultables par id"""
+    
+    KEEP = 20  # imports terminés conservés pour consultation
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+    
+    def start(self, job, workers=None):
+        with self.lock:
+            self.jobs[job.id] = job
+            finished = [job_id for job_id, known in self.jobs.items() if known.finished]
+            for job_id in finished[:max(0, len(finished) - self.KEEP)]:
+                del self.jobs[job_id]
+        thread = threading.Thread(target=job.run, args=(workers,), name=f'map-import-{job.id[:8]}', daemon=True)
+        thread.start()
+        return job
+    
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+IMPORT_JOBS = ImportJobs()
+
 # ==============================================================================
 # TEMPLATES AMÉLIORÉS
 # ==============================================================================
@@ -502,15 +1049,416 @@ def init_templates():
                 with open(filepath, 'w', encoding='utf-8') as f:
                     json.dump(template_data[lang], f, indent=2, ensure_ascii=False)
 
+class TemplateRegistry:
+    """Templates chargés en mémoire : résumés et corps JSON pré-sérialisés par langue"""
+    # Le dossier est revérifié au plus toutes les `interval` secondes, par
+    # ses seuls stats : uniquement les fichiers ajoutés, modifiés ou
+    # supprimés sont relus, et les réponses sont alors reconstruites.
+    # Entre deux vérifications, chaque appel est une simple lecture de dict.
+    
+    def __init__(self, folder, interval):
+        self.folder = folder
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.files = {}         # nom de fichier -> ((mtime_ns, taille), template_id, langue, données, mtime)
+        self.listings = {}      # langue -> (corps, etag, last_modified)
+        self.bodies = {}        # (template_id, langue) -> (corps, etag, last_modified)
+        self.checked = None
+    
+    @staticmethod
+    def _serialized(payload, last_modified):
+        body = app.json.dumps(payload).encode('utf-8')
+        return body, hashlib.sha1(body).hexdigest(), datetime.fromtimestamp(last_modified, timezone.utc)
+    
+    def refresh(self, force=False):
+        """Relire les fichiers modifiés depuis la dernière vérification"""
+        now = time.monotonic()
+        if not force and self.checked is not None and now - self.checked < self.interval:
+            return
+        with self.lock:
+            # Un autre thread vient peut-être de faire la vérification
+            if not force and self.checked is not None and now - self.checked < self.interval:
+                return
+            self.checked = now
+            on_disk = {}
+            try:
+                for entry in os.scandir(self.folder):
+                    if entry.name.endswith('.json') and not entry.name.startswith('.') and '_' in entry.name:
+                        stat = entry.stat()
+                        on_disk[entry.name] = ((stat.st_mtime_ns, stat.st_size), stat.st_mtime)
+            except OSError:
+                pass
+            
+            changed = set(self.files) - set(on_disk)
+            for name in changed:
+                del self.files[name]
+            for name, (version, mtime) in on_disk.items():
+                if name in self.files and self.files[name][0] == version:
+                    continue
+                try:
+                    with open(os.path.join(self.folder, name), 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if not isinstance(data, dict):
+                        raise ValueError('not a template object')
+                except (OSError, ValueError) as e:
+                    print(f"Erreur lecture du template {name}: {e}")
+                    self.files.pop(name, None)
+                else:
+                    template_id, language = name[:-len('.json')].rsplit('_', 1)
+                    self.files[name] = (version, template_id, language, data, mtime)
+                changed.add(name)
+            if changed:
+                self._build()
+    
+    def _build(self):
+        """Précalculer la liste de chaque langue et le corps de chaque template"""
+        by_language = defaultdict(list)
+        bodies = {}
+        for _, template_id, language, data, mtime in sorted(self.files.values(), key=lambda f: f[1]):
+            nodes = data.get('nodes')
+            by_language[language].append(({
+                'id': template_id,
+                'title': data.get('title', 'Template'),
+                'mode': data.get('mode', 'grinde'),
+                'nodeCount': len(nodes or []),
+                'preview': str(nodes[0].get('text', ''))[:30] if nodes and isinstance(nodes[0], dict) else ''
+            }, mtime))
+            bodies[template_id, language] = self._serialized({'success': True, 'data': data}, mtime)
+        
+        self.listings = {
+            language: self._serialized({'success': True, 'templates': [summary for summary, _ in entries]},
+                                       max(mtime for _, mtime in entries))
+            for language, entries in by_language.items()
+        }
+        self.bodies = bodies
+    
+    def listing(self, language):
+        """(corps, etag, last_modified) de la liste des templates d'une langue"""
+        self.refresh()
+        listing = self.listings.get(language)
+        if listing is None:
+            listing = self._serialized({'success': True, 'templates': []}, 0)
+        return listing
+    
+    def body(self, template_id, language):
+        """(corps, etag, last_modified) d'un template, en anglais si la langue manque ; None s'il n'existe pas"""
+        self.refresh()
+        return self.bodies.get((template_id, language)) or self.bodies.get((template_id, 'en'))
+
+# Templates par défaut créés dès le chargement du module : aussi sous un serveur WSGI
+init_templates()
+TEMPLATES = TemplateRegistry(TEMPLATES_FOLDER, app.config['TEMPLATES_CHECK_INTERVAL'])
+TEMPLATES.refresh(force=True)
+
+# ==============================================================================
+# REQUÊTES CONDITIONNELLES (ETag / Last-Modified)
+# ==============================================================================
+
+def file_validators(filepath, salt=''):
+    """ETag fort et Last-Modified d'un fichier, sans le lire"""
+    stat = os.stat(filepath)
+    etag = hashlib.sha1(f"{salt}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()
+    return etag, datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+def not_modified(etag, last_modified=None):
+    """Réponse 304 si le client possède déjà la représentation courante, sinon None"""
+    if request.if_none_match:
+        # Comparaison faible : les variantes compressées portent un ETag faible
+        unchanged = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified:
+        unchanged = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        unchanged = False
+    
+    if unchanged:
+        return with_validators(make_response('', 304), etag, last_modified)
+    return None
+
+def with_validators(response, etag, last_modified=None):
+    """Ajouter ETag, Last-Modified et l'obligation de revalider à une réponse"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# ==============================================================================
+# COMPRESSION DES RÉPONSES
+# ==============================================================================
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/markdown',
+    'text/css', 'application/javascript', 'image/svg+xml', 'text/x-opml'
+}
+
+def negotiate_encoding():
+    """Choisir le meilleur encodage accepté par le client parmi ceux disponibles"""
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    return request.accept_encodings.best_match(offered) or 'identity'
+
+def compress(data, encoding, level=None):
+    """Compresser des octets avec l'encodage demandé"""
+    if encoding == 'br':
+        quality = 11 if level is None else min(11, level)
+        return brotli.compress(data, quality=quality)
+    if encoding == 'gzip':
+        # mtime=0 : sortie déterministe, réutilisable d'une requête à l'autre
+        return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+    return data
+
+def compress_stream(chunks, encoding, level=None):
+    """Compresser à la volée une suite de morceaux d'octets"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=11 if level is None else min(11, level))
+        compress_chunk, finish = compressor.process, compressor.finish
+    elif encoding == 'gzip':
+        # wbits=31 : en-tête gzip (date nulle, comme gzip.compress(mtime=0))
+        compressor = zlib.compressobj(9 if level is None else level, zlib.DEFLATED, 31)
+        compress_chunk, finish = compressor.compress, compressor.flush
+    else:
+        yield from chunks
+        return
+    for chunk in chunks:
+        data = compress_chunk(chunk)
+        if data:
+            yield data
+    yield finish()
+
+def mark_encoded(response, encoding):
+    """En-têtes d'une réponse encodée (l'ETag devient faible : les octets diffèrent)"""
+    response.vary.add('Accept-Encoding')
+    if encoding == 'identity':
+        return response
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compresser à la volée les réponses textuelles au-delà du seuil configuré"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or (response.content_length or 0) < app.config['COMPRESSION_MIN_SIZE']):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if encoding == 'identity':
+        return response
+    
+    response.set_data(compress(response.get_data(), encoding, app.config['COMPRESSION_LEVEL']))
+    return mark_encoded(response, encoding)
+
+# ==============================================================================
+# RÉPONSES EN FLUX
+# ==============================================================================
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def encode_chunks(pieces, chunk_size=STREAM_CHUNK_SIZE):
+    """Regrouper des morceaux de texte en blocs UTF-8 d'environ `chunk_size` octets"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+def iter_file(filepath, chunk_size=STREAM_CHUNK_SIZE):
+    """Contenu d'un fichier, bloc par bloc"""
+    with open(filepath, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+def stream_response(chunks, mimetype, filename):
+    """Téléchargement envoyé en transfert chunké, compressé à la volée si le client l'accepte"""
+    # compress_response ne touche pas aux réponses en flux : la
+    # compression est appliquée ici, morceau par morceau
+    encoding = negotiate_encoding() if mimetype in COMPRESSIBLE_MIMETYPES else 'identity'
+    chunks = compress_stream(chunks, encoding, app.config['COMPRESSION_LEVEL'])
+    response = Response(stream_with_context(chunks), content_type=f'{mimetype}; charset=utf-8')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return mark_encoded(response, encoding)
+
+# ==============================================================================
+# ARCHIVES ZIP EN FLUX
+# ==============================================================================
+
+class ZipChunkBuffer(io.RawIOBase):
+    """Flux non positionnable dont les octets écrits par zipfile sont récupérés au fur et à mesure"""
+    
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.size = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+    
+    def drain(self):
+        """Octets écrits depuis le dernier appel"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+def stream_zip(entries, chunk_size=64 * 1024):
+    """Produire une archive ZIP morceau par morceau à partir de (nom, chemin ou octets)"""
+    # Sur un flux non positionnable, zipfile écrit les tailles dans un
+    # descripteur après chaque fichier : rien n'est à réécrire, chaque
+    # morceau compressé peut partir dès que `chunk_size` octets sont prêts
+    buffer = ZipChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for arcname, source in entries:
+            if isinstance(source, bytes):
+                archive.writestr(arcname, source)
+            else:
+                info = zipfile.ZipInfo.from_file(source, arcname)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(source, 'rb') as src, archive.open(info, 'w') as dst:
+                    while True:
+                        data = src.read(chunk_size)
+                        if not data:
+                            break
+                        dst.write(data)
+                        if buffer.size >= chunk_size:
+                            yield buffer.drain()
+            if buffer.size >= chunk_size:
+                yield buffer.drain()
+    # Fin du dernier fichier et répertoire central
+    yield buffer.drain()
+
+# ==============================================================================
+# FRONTEND EN MÉMOIRE (empreinte, cache navigateur, pré-compression)
+# ==============================================================================
+
+FRONTEND_PAGES = {
+    'index': 'mindmap-mini-multilingual.html',
+    'tool': 'mindmap-tool.html',
+    'standalone': 'mindmap-standalone-v.html'
+}
+
+VERBATIM_BLOCK = re.compile(r'(<(pre|textarea)\b.*?</\2>)', re.IGNORECASE | re.DOTALL)
+HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+
+def minify_html(text):
+    """Minification prudente : indentation, lignes vides et commentaires HTML"""
+    # Les retours à la ligne sont conservés pour ne pas changer la sémantique
+    # du JavaScript embarqué (commentaires //, insertion automatique de ;)
+    parts = VERBATIM_BLOCK.split(text)
+    output = []
+    # split() avec deux groupes : [texte, bloc, balise, texte, bloc, balise, ...]
+    for index in range(0, len(parts), 3):
+        chunk = HTML_COMMENT.sub('', parts[index])
+        output.append('\n'.join(line.strip() for line in chunk.splitlines() if line.strip()))
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return ''.join(output)
+
+class PrecompressedAsset:
+    """Page statique lue une seule fois, empreinte et pré-compressée en mémoire"""
+    
+    def __init__(self, filepath, mimetype, minify=False):
+        self.filepath = filepath
+        self.mimetype = mimetype
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        if minify and mimetype == 'text/html':
+            raw = minify_html(raw.decode('utf-8')).encode('utf-8')
+        
+        self.etag = hashlib.sha256(raw).hexdigest()[:32]
+        stem, ext = os.path.splitext(os.path.basename(filepath))
+        self.fingerprinted_name = f"{stem}.{self.etag[:12]}{ext}"
+        
+        self.variants = {'identity': raw, 'gzip': compress(raw, 'gzip')}
+        if brotli:
+            self.variants['br'] = compress(raw, 'br')
+    
+    def response(self, immutable=False):
+        """Réponse dans le meilleur encodage accepté, sans compression par requête"""
+        if immutable:
+            # URL versionnée : son contenu ne changera jamais
+            cache_control = f"public, max-age={app.config['STATIC_MAX_AGE']}, immutable"
+        else:
+            cache_control = 'no-cache'
+        
+        if request.if_none_match.contains_weak(self.etag):
+            response = make_response('', 304)
+            response.set_etag(self.etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        
+        encoding = negotiate_encoding()
+        response = make_response(self.variants[encoding])
+        response.mimetype = self.mimetype
+        response.set_etag(self.etag)
+        response.headers['Cache-Control'] = cache_control
+        return mark_encoded(response, encoding)
+
+STATIC_ASSETS = {}
+
+def load_static_assets():
+    """Charger, minifier si demandé et pré-compresser les pages du frontend"""
+    for name, filename in FRONTEND_PAGES.items():
+        filepath = os.path.join(app.root_path, filename)
+        if os.path.exists(filepath):
+            STATIC_ASSETS[name] = PrecompressedAsset(
+                filepath, 'text/html', minify=app.config['MINIFY_STATIC_HTML'])
+
+def asset_url(name):
+    """URL versionnée (mise en cache longue durée) d'une page du frontend"""
+    return f"/app/{STATIC_ASSETS[name].fingerprinted_name}"
+
+load_static_assets()
+
 # ==============================================================================
 # ROUTES FLASK AMÉLIORÉES
 # ==============================================================================
 
+def request_language():
+    """Langue demandée (?lang=), ramenée à la langue par défaut si elle n'est pas traduite"""
+    # Vérifiée avant toute réponse : un export en flux ne peut plus changer
+    # de statut une fois ses en-têtes envoyés
+    language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
+    return language if language in TRANSLATIONS else app.config['DEFAULT_LANGUAGE']
+
 @app.route('/')
 def index():
     """Page principale avec détection de langue"""
+    if 'index' in STATIC_ASSETS:
+        return STATIC_ASSETS['index'].response()
     return send_file('mindmap-mini-multilingual.html')
 
+@app.route('/app/<filename>')
+def frontend_page(filename):
+    """Pages du frontend, par nom de fichier ou par nom versionné (empreinte du contenu)"""
+    for asset in STATIC_ASSETS.values():
+        if filename == asset.fingerprinted_name:
+            return asset.response(immutable=True)
+        if filename == os.path.basename(asset.filepath):
+            return asset.response()
+    return jsonify({'success': False, 'error': 'Page not found'}), 404
+
+@app.route('/api/assets', methods=['GET'])
+def get_assets():
+    """URLs versionnées des pages du frontend"""
+    return jsonify({'success': True, 'assets': {name: asset_url(name) for name in STATIC_ASSETS}})
+
 
 @app.route('/api/settings', methods=['GET'])
 def get_settings():
@@ -524,34 +1472,146 @@ def get_settings():
     }
     return jsonify(settings)
 
+MAPS_PAGE_PARAMS = ('limit', 'cursor', 'sort', 'order', 'mode', 'language', 'from', 'to')
+MAPS_PAGE_MAX = 500
+
+def parse_date_bound(value, end=False):
+    """Borne `from`/`to` normalisée en date ISO comparable aux dates des cartes"""
+    # Une date seule couvre toute la journée : `to=2026-10-19` inclut les
+    # cartes modifiées ce jour-là. ValueError si la date est illisible
+    if not value:
+        return None
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValueError(f"Invalid date: {value}")
+    return datetime.combine(day, day_time.max if end else day_time.min).isoformat()
+
+def encode_cursor(sort, order, key):
+    """Curseur opaque désignant la dernière carte d'une page"""
+    raw = json.dumps([sort, order, list(key)], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, sort, order):
+    """Position (clé de tri, id) d'un curseur, ou ValueError s'il ne correspond pas à la requête"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_order, (value, map_id) = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if (cursor_sort, cursor_order) != (sort, order) or not isinstance(map_id, str):
+        raise ValueError('Cursor does not match sort order')
+    return (value, map_id)
+
 @app.route('/api/maps', methods=['GET'])
 def get_maps():
     """Obtenir la liste des cartes avec support multilingue"""
-    language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
-    maps = MindMapManager.list_maps(language)
-    return jsonify({'success': True, 'maps': maps})
+    language = request_language()
+    # Validateurs tirés de la révision du catalogue : ni parcours ni stat du dossier
+    etag, last_modified = MAP_CATALOG.validators(salt=f"{language}?{request.query_string.decode()}")
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+    
+    # Sans paramètre de pagination : liste complète, comme auparavant, lue dans le catalogue
+    if not any(param in request.args for param in MAPS_PAGE_PARAMS):
+        maps, _, _ = MAP_CATALOG.page(limit=None, language=language)
+        return with_validators(jsonify({'success': True, 'maps': maps}), etag, last_modified)
+    
+    sort = request.args.get('sort', 'modified')
+    order = request.args.get('order', MapCatalog.DEFAULT_ORDER.get(sort))
+    if sort not in MapCatalog.SORT_KEYS or order not in ('asc', 'desc'):
+        return jsonify({'success': False, 'error': 'Invalid sort'}), 400
+    try:
+        limit = min(MAPS_PAGE_MAX, max(1, int(request.args.get('limit', 50))))
+        cursor = request.args.get('cursor')
+        position = decode_cursor(cursor, sort, order) if cursor else None
+        date_from = parse_date_bound(request.args.get('from'))
+        date_to = parse_date_bound(request.args.get('to'), end=True)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        maps, last, total = MAP_CATALOG.page(
+            sort=sort, order=order, limit=limit, cursor=position,
+            mode=request.args.get('mode'),
+            map_language=request.args.get('language'),
+            date_from=date_from,
+            date_to=date_to,
+            language=language
+        )
+    except TypeError:
+        # Clé de curseur d'un type incompatible avec l'index
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    return with_validators(jsonify({
+        'success': True,
+        'maps': maps,
+        'nextCursor': encode_cursor(sort, order, last) if last else None,
+        'totalMaps': total
+    }), etag, last_modified)
 
 @app.route('/api/map/<map_id>', methods=['GET'])
 def get_map(map_id):
     """Obtenir une carte spécifique"""
+    filepath = MindMapManager.get_map_path(map_id)
+    if not os.path.exists(filepath):
+        return jsonify({'success': False, 'error': 'Map not found'}), 404
+    
+    etag, last_modified = file_validators(filepath, salt=map_id)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+    
     data = MindMapManager.load_map(map_id)
     if data:
         # Calculer le score GRINDE si applicable
         if data.get('mode') == 'grinde':
-            data['grindeScore'] = MindMapManager.calculate_grinde_score(data)
-        return jsonify({'success': True, 'data': data})
+            data['grindeScore'] = MindMapManager.get_grinde_score(data)
+        return with_validators(jsonify({'success': True, 'data': data}), etag, last_modified)
     return jsonify({'success': False, 'error': 'Map not found'}), 404
 
 @app.route('/api/map', methods=['POST'])
 def save_map():
     """Sauvegarder une carte (nouvelle ou existante)"""
     data = request.json
+    try:
+        # Normalisée une fois à l'entrée : exports et scores lisent des données propres
+        report = map_schema.normalize_map(data)
+    except map_schema.SchemaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     map_id = data.get('id')
     
     # Sauvegarder
     map_id = MindMapManager.save_map(map_id, data)
     
-    return jsonify({'success': True, 'id': map_id})
+    result = {'success': True, 'id': map_id}
+    if map_schema.changed(report):
+        result['normalized'] = report
+    return jsonify(result)
+
+@app.route('/api/map/<map_id>/thumbnail.png', methods=['GET'])
+def get_map_thumbnail(map_id):
+    """Vignette PNG d'une carte, rendue à la demande si le thread de fond ne l'a pas encore produite"""
+    if map_thumbnail is None:
+        return jsonify({'success': False, 'error': 'Thumbnails unavailable'}), 404
+    if map_id.startswith('.') or os.path.basename(map_id) != map_id:
+        return jsonify({'success': False, 'error': 'Map not found'}), 404
+    
+    path = THUMBNAILS.render(map_id)
+    if not path:
+        return jsonify({'success': False, 'error': 'Map not found'}), 404
+    
+    version = os.path.basename(path)[:-len('.png')]
+    etag = f"{map_id}-{version}"
+    response = not_modified(etag) or with_validators(send_file(path, mimetype='image/png', etag=False), etag)
+    if request.args.get('v') == version:
+        # URL versionnée (liste des cartes) : contenu immuable
+        response.headers['Cache-Control'] = f"public, max-age={app.config['STATIC_MAX_AGE']}, immutable"
+    return response
 
 @app.route('/api/map/<map_id>', methods=['DELETE'])
 def delete_map(map_id):
@@ -568,7 +1628,14 @@ def rename_map(map_id):
         if not data or 'title' not in data:
             return jsonify({'success': False, 'error': 'Title is required'}), 400
         
-        if MindMapManager.rename_map(map_id, data['title']):
+        # Même règle que les cartes sauvegardées : un titre numérique est écrit en texte
+        update = {'title': data['title']}
+        try:
+            map_schema.normalize_map(update)
+        except map_schema.SchemaError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if MindMapManager.rename_map(map_id, update['title']):
             return jsonify({'success': True})
         return jsonify({'success': False, 'error': 'Map not found'}), 404
     except Exception as e:
@@ -577,7 +1644,7 @@ def rename_map(map_id):
 @app.route('/api/map/<map_id>/duplicate', methods=['POST'])
 def duplicate_map(map_id):
     """Dupliquer une carte"""
-    language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
+    language = request_language()
     original = MindMapManager.load_map(map_id)
     if original:
         new_id = MindMapManager.generate_id()
@@ -592,7 +1659,7 @@ def duplicate_map(map_id):
 def search_maps():
     """Rechercher dans les cartes"""
     query = request.args.get('q', '')
-    language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
+    language = request_language()
     
     if not query:
         return jsonify({'success': False, 'error': 'No query provided'}), 400
@@ -617,110 +1684,147 @@ def autosave():
 def get_templates():
     """Obtenir la liste des templates dans la langue demandée"""
     language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
-    templates = []
-    
-    for filename in os.listdir(TEMPLATES_FOLDER):
-        if filename.endswith(f'_{language}.json'):
-            template_id = filename.replace(f'_{language}.json', '')
-            with open(os.path.join(TEMPLATES_FOLDER, filename), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                templates.append({
-                    'id': template_id,
-                    'title': data.get('title', 'Template'),
-                    'mode': data.get('mode', 'grinde'),
-                    'nodeCount': len(data.get('nodes', [])),
-                    'preview': data.get('nodes', [{}])[0].get('text', '')[:30] if data.get('nodes') else ''
-                })
-    
-    return jsonify({'success': True, 'templates': templates})
+    # Liste précalculée par le registre : ni lecture de dossier ni sérialisation
+    body, etag, last_modified = TEMPLATES.listing(language)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+    return with_validators(app.response_class(body, mimetype='application/json'), etag, last_modified)
 
 @app.route('/api/template/<template_id>', methods=['GET'])
 def get_template(template_id):
     """Obtenir un template spécifique dans la langue demandée"""
     language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
-    filepath = os.path.join(TEMPLATES_FOLDER, f"{template_id}_{language}.json")
     
     # Fallback vers l'anglais si la traduction n'existe pas
-    if not os.path.exists(filepath):
-        filepath = os.path.join(TEMPLATES_FOLDER, f"{template_id}_en.json")
-    
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return jsonify({'success': True, 'data': data})
-    
-    return jsonify({'success': False, 'error': 'Template not found'}), 404
+    template = TEMPLATES.body(template_id, language)
+    if template is None:
+        return jsonify({'success': False, 'error': 'Template not found'}), 404
+    
+    body, etag, last_modified = template
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+    return with_validators(app.response_class(body, mimetype='application/json'), etag, last_modified)
 
 @app.route('/api/export/<map_id>/<format>', methods=['GET'])
 def export_map(map_id, format):
     """Exporter une carte dans différents formats avec support multilingue"""
-    language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
-    data = MindMapManager.load_map(map_id)
-    
-    if not data:
+    language = request_language()
+    filepath = MindMapManager.get_map_path(map_id)
+    try:
+        key = (map_id, ExportCache.version(filepath), format, language)
+    except OSError:
         return jsonify({'success': False, 'error': 'Map not found'}), 404
     
-    t = TRANSLATIONS[language]
-    
     if format == 'json':
-        # Export JSON
-        response = make_response(json.dumps(data, indent=2, ensure_ascii=False))
-        response.headers['Content-Type'] = 'application/json; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename="{data.get("title", "mindmap")}.json"'
-        return response
-    
-    elif format == 'text':
-        # Export texte simple
-        text = generate_text_export(data, language)
-        response = make_response(text)
-        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename="{data.get("title", "mindmap")}.txt"'
-        return response
-    
-    elif format == 'markdown':
-        # Export Markdown
-        md = generate_markdown_export(data, language)
-        response = make_response(md)
-        response.headers['Content-Type'] = 'text/markdown; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename="{data.get("title", "mindmap")}.md"'
-        return response
-    
-    elif format == 'html':
-        # Export HTML autonome
-        html = generate_html_export(data, language)
-        response = make_response(html)
-        response.headers['Content-Type'] = 'text/html; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename="{data.get("title", "mindmap")}.html"'
+        # Export JSON : le fichier est écrit avec la même mise en forme
+        # (indent=2, ensure_ascii=False), il est envoyé tel quel sans être chargé
+        MAP_CATALOG.ensure_loaded()
+        entry = MAP_CATALOG.entries.get(map_id) or {}
+        title = entry.get('title') or 'mindmap'
+        return stream_response(iter_file(filepath), 'application/json', f'{title}.json')
+    
+    renderers = {
+        'text': (iter_text_export, 'text/plain', 'txt'),            # Export texte simple
+        'markdown': (iter_markdown_export, 'text/markdown', 'md'),  # Export Markdown
+        'html': (iter_html_export, 'text/html', 'html')              # Export HTML autonome
+    }
+    # Plans hiérarchiques (Markdown imbriqué, texte indenté, OPML)
+    for style, (_, mimetype, extension) in map_outline.FORMATS.items():
+        renderers[style] = (partial(iter_outline_export, style=style), mimetype, extension)
+    if format not in renderers:
+        return jsonify({'success': False, 'error': 'Format not supported'}), 400
+    render, mimetype, extension = renderers[format]
+    
+    # Rendu réutilisé tant que le fichier de la carte n'a pas changé
+    cached = EXPORT_CACHE.get(key)
+    if cached:
+        body, title = cached
+        response = make_response(body)
+        response.headers['Content-Type'] = f'{mimetype}; charset=utf-8'
+        response.headers['Content-Disposition'] = f'attachment; filename="{title}.{extension}"'
         return response
     
-    return jsonify({'success': False, 'error': 'Format not supported'}), 400
+    # Premier rendu : envoyé au fil de sa génération et mis en cache au passage
+    data = MindMapManager.load_map(map_id)
+    if not data:
+        return jsonify({'success': False, 'error': 'Map not found'}), 404
+    title = data.get('title', 'mindmap')
+    chunks = EXPORT_CACHE.record(key, title, encode_chunks(render(data, language)))
+    return stream_response(chunks, mimetype, f'{title}.{extension}')
+
+def encode_export_cursor(timestamp):
+    """Curseur opaque de synchronisation (date du catalogue en ns)"""
+    raw = json.dumps(['export', timestamp]).encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def parse_export_since(since):
+    """Date (ns) d'un paramètre `since` : date ISO ou curseur d'un export précédent"""
+    try:
+        return int(datetime.fromisoformat(since).timestamp() * 10**9)
+    except ValueError:
+        pass
+    try:
+        raw = base64.urlsafe_b64decode(since + '=' * (-len(since) % 4))
+        kind, timestamp = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid since parameter')
+    if kind != 'export' or not isinstance(timestamp, int):
+        raise ValueError('Invalid since parameter')
+    return timestamp
 
 @app.route('/api/export-all', methods=['GET'])
 def export_all():
-    """Exporter toutes les cartes en ZIP"""
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Ajouter toutes les cartes
-        for filename in os.listdir(MAPS_FOLDER):
-            if filename.endswith('.json') and not filename.startswith('.'):
-                filepath = os.path.join(MAPS_FOLDER, filename)
-                zip_file.write(filepath, f'maps/{filename}')
-        
-        # Ajouter les templates
-        for filename in os.listdir(TEMPLATES_FOLDER):
-            if filename.endswith('.json'):
-                filepath = os.path.join(TEMPLATES_FOLDER, filename)
-                zip_file.write(filepath, f'templates/{filename}')
-    
-    zip_buffer.seek(0)
-    
-    return send_file(
-        zip_buffer,
-        mimetype='application/zip',
-        as_attachment=True,
-        download_name=f'mindmap_mini_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+    """Exporter les cartes en ZIP (filtres optionnels : mode, from, to, since)"""
+    since = request.args.get('since')
+    try:
+        since_ns = parse_export_since(since) if since else None
+        date_from = parse_date_bound(request.args.get('from'))
+        date_to = parse_date_bound(request.args.get('to'), end=True)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # Cartes sélectionnées d'après le catalogue, sans ouvrir les fichiers ;
+    # avec `since`, seules les cartes modifiées depuis sont relues
+    changes = MAP_CATALOG.changes(
+        since=since_ns,
+        mode=request.args.get('mode'),
+        date_from=date_from,
+        date_to=date_to
     )
+    cursor = encode_export_cursor(changes['cursor'])
+    
+    def entries():
+        exported = []
+        for map_id in changes['updated']:
+            filepath = MindMapManager.get_map_path(map_id)
+            if os.path.exists(filepath):
+                exported.append(map_id)
+                yield f'maps/{map_id}.json', filepath
+        
+        # Les templates ne changent qu'avec l'application : export complet seulement
+        if changes['full']:
+            for filename in sorted(os.listdir(TEMPLATES_FOLDER)):
+                if filename.endswith('.json'):
+                    yield f'templates/{filename}', os.path.join(TEMPLATES_FOLDER, filename)
+        
+        # Manifeste en dernier : il ne liste que les cartes réellement écrites
+        manifest = {
+            'since': since,
+            'full': changes['full'],
+            'cursor': cursor,
+            'maps': exported,
+            'deleted': changes['deleted']
+        }
+        yield 'manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    kind = 'backup' if changes['full'] else 'changes'
+    download_name = f'mindmap_mini_{kind}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+    response = Response(stream_with_context(stream_zip(entries())), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+    response.headers['X-Export-Cursor'] = cursor
+    return response
 
 @app.route('/api/import', methods=['POST'])
 def import_map():
@@ -733,47 +1837,59 @@ def import_map():
         return jsonify({'success': False, 'error': 'No file selected'}), 400
     
     try:
-        # Lire le fichier JSON
-        content = file.read().decode('utf-8')
-        data = json.loads(content)
+        # Lecture en flux depuis le fichier reçu : rejet dès qu'une limite est dépassée
+        data = read_import(file.stream)
+        map_schema.normalize_map(data)
         
         # Générer un nouvel ID et sauvegarder
         new_id = MindMapManager.save_map(None, data)
         
         return jsonify({'success': True, 'id': new_id})
+    except map_stream.LimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/import/bulk', methods=['POST'])
+def import_bulk():
+    """Importer en arrière-plan une archive d'export_all ou plusieurs fichiers JSON"""
+    files = [file for file in request.files.getlist('files') + request.files.getlist('file') if file.filename]
+    if not files:
+        return jsonify({'success': False, 'error': 'No file provided'}), 400
+    
+    # Les fichiers reçus sont recopiés : ils disparaissent avec la requête
+    workdir = tempfile.mkdtemp(prefix='mindmap_import_')
+    uploads = []
+    for position, file in enumerate(files):
+        path = os.path.join(workdir, f"{position}.upload")
+        file.save(path)
+        uploads.append((file.filename, path))
+    
+    job = IMPORT_JOBS.start(ImportJob(workdir, uploads), app.config['IMPORT_WORKERS'])
+    status_url = f"/api/import/jobs/{job.id}"
+    response = jsonify({'success': True, 'jobId': job.id, 'status': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+@app.route('/api/import/jobs/<job_id>', methods=['GET'])
+def import_job_status(job_id):
+    """Avancement et rapport par fichier d'un import en lot"""
+    job = IMPORT_JOBS.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Import job not found'}), 404
+    return jsonify({'success': True, 'job': job.status()})
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Obtenir les statistiques globales avec support multilingue"""
-    language = request.args.get('lang', app.config['DEFAULT_LANGUAGE'])
-    maps = MindMapManager.list_maps(language)
-    
-    # Calculer les statistiques détaillées
-    total_nodes = sum(m['nodeCount'] for m in maps)
-    total_connections = sum(m.get('connectionCount', 0) for m in maps)
-    grinde_maps = [m for m in maps if m['mode'] == 'grinde']
-    buzan_maps = [m for m in maps if m['mode'] == 'buzan']
-    
-    # Score GRINDE moyen
-    avg_grinde_score = 0
-    if grinde_maps:
-        scores = [m.get('grindeScore', {}).get('total', 0) for m in grinde_maps if m.get('grindeScore')]
-        if scores:
-            avg_grinde_score = sum(scores) / len(scores)
-    
-    stats = {
-        'totalMaps': len(maps),
-        'totalNodes': total_nodes,
-        'totalConnections': total_connections,
-        'grindeCount': len(grinde_maps),
-        'buzanCount': len(buzan_maps),
-        'avgGrindeScore': round(avg_grinde_score, 1),
-        'recentMaps': maps[:5],
-        'mostUsedMode': 'grinde' if len(grinde_maps) >= len(buzan_maps) else 'buzan',
-        'avgNodesPerMap': round(total_nodes / len(maps), 1) if maps else 0
-    }
+    language = request_language()
+    
+    # Agrégats tenus à jour par le catalogue : coût constant quel que soit le nombre de cartes
+    stats = MAP_CATALOG.stats(language)
+    stats['grindeCache'] = dict(MindMapManager.grinde_cache_stats)
+    stats['exportCache'] = EXPORT_CACHE.stats()
+    stats['thumbnails'] = THUMBNAILS.stats()
     
     return jsonify({'success': True, 'stats': stats})
 
@@ -781,15 +1897,15 @@ def get_stats():
 # FONCTIONS D'EXPORT MULTILINGUES
 # ==============================================================================
 
-def generate_text_export(data, language='fr'):
-    """Générer un export en texte simple avec support multilingue"""
+def iter_text_export(data, language='fr'):
+    """Morceaux successifs de l'export texte"""
     t = TRANSLATIONS[language]
     
-    text = f"{data.get('title', t['mind_map'])}\n"
-    text += "=" * len(data.get('title', t['mind_map'])) + "\n\n"
-    text += f"{t['mode']}: {data.get('mode', 'grinde').upper()}\n"
-    text += f"{t['created']}: {data.get('created', '')[:10]}\n"
-    text += f"{t['modified']}: {data.get('modified', '')[:10]}\n\n"
+    yield f"{data.get('title', t['mind_map'])}\n"
+    yield "=" * len(data.get('title', t['mind_map'])) + "\n\n"
+    yield f"{t['mode']}: {data.get('mode', 'grinde').upper()}\n"
+    yield f"{t['created']}: {data.get('created', '')[:10]}\n"
+    yield f"{t['modified']}: {data.get('modified', '')[:10]}\n\n"
     
     # Organiser les nœuds par type
     nodes_by_type = defaultdict(list)
@@ -799,56 +1915,58 @@ def generate_text_export(data, language='fr'):
     
     # Afficher les nœuds
     if 'central' in nodes_by_type:
-        text += f"{t['central_idea']}:\n"
+        yield f"{t['central_idea']}:\n"
         for item in nodes_by_type['central']:
-            text += f"  ★ {item}\n"
-        text += "\n"
+            yield f"  ★ {item}\n"
+        yield "\n"
     
     if 'group' in nodes_by_type:
-        text += f"{t['groups']}:\n"
+        yield f"{t['groups']}:\n"
         for item in nodes_by_type['group']:
-            text += f"  ◆ {item}\n"
-        text += "\n"
+            yield f"  ◆ {item}\n"
+        yield "\n"
     
     if 'concept' in nodes_by_type:
-        text += f"{t['concepts']}:\n"
+        yield f"{t['concepts']}:\n"
         for item in nodes_by_type['concept']:
-            text += f"  • {item}\n"
-        text += "\n"
+            yield f"  • {item}\n"
+        yield "\n"
     
     if 'detail' in nodes_by_type:
-        text += f"{t['details']}:\n"
+        yield f"{t['details']}:\n"
         for item in nodes_by_type['detail']:
-            text += f"  - {item}\n"
-        text += "\n"
+            yield f"  - {item}\n"
+        yield "\n"
     
     # Statistiques
-    text += f"\n{t['statistics']}:\n"
-    text += f"  {t['total_nodes']}: {len(data.get('nodes', []))}\n"
-    text += f"  {t['total_connections']}: {len(data.get('connections', []))}\n"
-    
-    return text
+    yield f"\n{t['statistics']}:\n"
+    yield f"  {t['total_nodes']}: {len(data.get('nodes', []))}\n"
+    yield f"  {t['total_connections']}: {len(data.get('connections', []))}\n"
 
-def generate_markdown_export(data, language='fr'):
-    """Générer un export en Markdown avec support multilingue"""
+def generate_text_export(data, language='fr'):
+    """Générer un export en texte simple avec support multilingue"""
+    return ''.join(iter_text_export(data, language))
+
+def iter_markdown_export(data, language='fr'):
+    """Morceaux successifs de l'export Markdown"""
     t = TRANSLATIONS[language]
     
-    md = f"# {data.get('title', t['mind_map'])}\n\n"
-    md += f"**{t['mode']}:** {data.get('mode', 'grinde').upper()}  \n"
-    md += f"**{t['created']}:** {data.get('created', '')[:10]}  \n"
-    md += f"**{t['modified']}:** {data.get('modified', '')[:10]}  \n\n"
+    yield f"# {data.get('title', t['mind_map'])}\n\n"
+    yield f"**{t['mode']}:** {data.get('mode', 'grinde').upper()}  \n"
+    yield f"**{t['created']}:** {data.get('created', '')[:10]}  \n"
+    yield f"**{t['modified']}:** {data.get('modified', '')[:10]}  \n\n"
     
     # Score GRINDE si applicable
     if data.get('mode') == 'grinde':
-        score = MindMapManager.calculate_grinde_score(data)
+        score = MindMapManager.get_grinde_score(data)
         if score:
-            md += f"## 📊 Score GRINDE: {score['total']}/100\n\n"
-            md += f"- Grouped: {score['grouped']}/100\n"
-            md += f"- Reflective: {score['reflective']}/100\n"
-            md += f"- Interconnected: {score['interconnected']}/100\n"
-            md += f"- Non-verbal: {score['nonverbal']}/100\n"
-            md += f"- Directional: {score['directional']}/100\n"
-            md += f"- Emphasized: {score['emphasized']}/100\n\n"
+            yield f"## 📊 Score GRINDE: {score['total']}/100\n\n"
+            yield f"- Grouped: {score['grouped']}/100\n"
+            yield f"- Reflective: {score['reflective']}/100\n"
+            yield f"- Interconnected: {score['interconnected']}/100\n"
+            yield f"- Non-verbal: {score['nonverbal']}/100\n"
+            yield f"- Directional: {score['directional']}/100\n"
+            yield f"- Emphasized: {score['emphasized']}/100\n\n"
     
     # Organiser les nœuds
     nodes_by_type = defaultdict(list)
@@ -858,39 +1976,41 @@ def generate_markdown_export(data, language='fr'):
     
     # Afficher les nœuds
     if 'central' in nodes_by_type:
-        md += f"## 🎯 {t['central_idea']}\n\n"
+        yield f"## 🎯 {t['central_idea']}\n\n"
         for item in nodes_by_type['central']:
-            md += f"**{item}**\n\n"
+            yield f"**{item}**\n\n"
     
     if 'group' in nodes_by_type:
-        md += f"## 📦 {t['groups']}\n\n"
+        yield f"## 📦 {t['groups']}\n\n"
         for item in nodes_by_type['group']:
-            md += f"### {item}\n\n"
+            yield f"### {item}\n\n"
     
     if 'concept' in nodes_by_type:
-        md += f"## 💡 {t['concepts']}\n\n"
+        yield f"## 💡 {t['concepts']}\n\n"
         for item in nodes_by_type['concept']:
-            md += f"- {item}\n"
-        md += "\n"
+            yield f"- {item}\n"
+        yield "\n"
     
     if 'detail' in nodes_by_type:
-        md += f"## 📝 {t['details']}\n\n"
+        yield f"## 📝 {t['details']}\n\n"
         for item in nodes_by_type['detail']:
-            md += f"  - {item}\n"
-        md += "\n"
+            yield f"  - {item}\n"
+        yield "\n"
     
     # Ajouter les connexions si présentes
     if data.get('connections'):
-        md += f"\n## 🔗 {t['connections']}\n\n"
-        md += f"{t['total_connections']}: {len(data['connections'])}\n"
-    
-    return md
+        yield f"\n## 🔗 {t['connections']}\n\n"
+        yield f"{t['total_connections']}: {len(data['connections'])}\n"
 
-def generate_html_export(data, language='fr'):
-    """Générer un export HTML autonome avec visualisation et support multilingue"""
+def generate_markdown_export(data, language='fr'):
+    """Générer un export en Markdown avec support multilingue"""
+    return ''.join(iter_markdown_export(data, language))
+
+def iter_html_export(data, language='fr'):
+    """Morceaux successifs de l'export HTML"""
     t = TRANSLATIONS[language]
     
-    html = f"""<!DOCTYPE html>
+    yield f"""<!DOCTYPE html>
 <html lang="{language}">
 <head>
     <meta charset="UTF-8">
@@ -1034,9 +2154,9 @@ def generate_html_export(data, language='fr'):
     
     # Ajouter le score GRINDE si applicable
     if data.get('mode') == 'grinde':
-        score = MindMapManager.calculate_grinde_score(data)
+        score = MindMapManager.get_grinde_score(data)
         if score:
-            html += f"""
+            yield f"""
         <div class="grinde-score">
             <h2>📊 Score GRINDE: {score['total']}/100</h2>
             <div>
@@ -1074,35 +2194,43 @@ def generate_html_export(data, language='fr'):
     # Central
     if 'central' in nodes_by_type:
         for node in nodes_by_type['central']:
-            html += f'<div class="central">{node.get("text", "")}</div>'
+            yield f'<div class="central">{node.get("text", "")}</div>'
     
     # Groupes
     if 'group' in nodes_by_type:
-        html += f'<div class="section"><h2>📦 {t["groups"]}</h2>'
+        yield f'<div class="section"><h2>📦 {t["groups"]}</h2>'
         for node in nodes_by_type['group']:
-            html += f'<div class="group">{node.get("text", "")}</div>'
-        html += '</div>'
+            yield f'<div class="group">{node.get("text", "")}</div>'
+        yield '</div>'
     
     # Concepts
     if 'concept' in nodes_by_type:
-        html += f'<div class="section"><h2>💡 {t["concepts"]}</h2>'
+        yield f'<div class="section"><h2>💡 {t["concepts"]}</h2>'
         for node in nodes_by_type['concept']:
-            html += f'<div class="concept">{node.get("text", "")}</div>'
-        html += '</div>'
+            yield f'<div class="concept">{node.get("text", "")}</div>'
+        yield '</div>'
     
     # Détails
     if 'detail' in nodes_by_type:
-        html += f'<div class="section"><h2>📝 {t["details"]}</h2>'
+        yield f'<div class="section"><h2>📝 {t["details"]}</h2>'
         for node in nodes_by_type['detail']:
-            html += f'<div class="detail">• {node.get("text", "")}</div>'
-        html += '</div>'
+            yield f'<div class="detail">• {node.get("text", "")}</div>'
+        yield '</div>'
     
-    html += """
+    yield """
     </div>
 </body>
 </html>"""
-    
-    return html
+
+def iter_outline_export(data, language='fr', style='outline'):
+    """Morceaux successifs du plan hiérarchique construit à partir des connexions"""
+    t = TRANSLATIONS[language]
+    return map_outline.iter_outline(style, data.get('title', t['mind_map']), data.get('nodes', []),
+                                    data.get('connections', []), t['unconnected'])
+
+def generate_html_export(data, language='fr'):
+    """Générer un export HTML autonome avec visualisation et support multilingue"""
+    return ''.join(iter_html_export(data, language))
 
 # ==============================================================================
 # INITIALISATION
@@ -1110,7 +2238,10 @@ def generate_html_export(data, language='fr'):
 
 def initialize():
     """Initialiser l'application au premier démarrage"""
-    init_templates()
+    # Démarrage à froid : les cartes absentes du catalogue sont lues en parallèle
+    MAP_CATALOG.ensure_started(workers=app.config['CATALOG_WORKERS'],
+                               interval=app.config['CATALOG_SYNC_INTERVAL'],
+                               progress=map_catalog.progress_printer("📇 Catalogue des cartes"))
     print("✅ Mind Map Mini initialisé")
     print(f"📁 Dossier des cartes : {os.path.abspath(MAPS_FOLDER)}")
     print(f"💾 Dossier de sauvegarde auto : {os.path.abspath(AUTOSAVE_FOLDER)}")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MindMap Master - Test de charge de la collaboration temps réel
+Ouvre des sockets de collaboration par paliers contre un seul processus
+flask-backend.py et mesure combien il en tient avant de se dégrader.
+
+Usage :
+    SOCKETIO_ASYNC_MODE=eventlet python flask-backend.py --production --port 5000
+    python collaboration-loadtest.py --url http://localhost:5000 --step 250 --max-clients 5000
+
+Nécessite : python-socketio[asyncio_client] (aiohttp)
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import socketio
+
+
+class CollaboratorPool:
+    """Ensemble de clients Socket.IO répartis sur plusieurs cartes"""
+
+    def __init__(self, url, maps, connect_timeout):
+        self.url = url
+        self.map_ids = [f'loadtest-{i}' for i in range(maps)]
+        self.connect_timeout = connect_timeout
+        self.clients = []
+        self.failures = 0
+        self.connect_times = []
+        self.received = 0
+
+    async def open_client(self, index):
+        """Connecter un client et rejoindre la carte qui lui est attribuée"""
+        client = socketio.AsyncClient(reconnection=False)
+        map_id = self.map_ids[index % len(self.map_ids)]
+        user_id = str(uuid.uuid4())
+        client.map_id = map_id
+        client.user_id = user_id
+        client.latencies = {}
+
+        @client.on('cursor_position')
+        async def on_cursor(data):
+            self.received += 1
+            sent_at = client.latencies.pop(data.get('x'), None)
+            if sent_at is not None:
+                client.latencies['last'] = time.perf_counter() - sent_at
+
+        start = time.perf_counter()
+        try:
+            await client.connect(self.url, transports=['websocket'],
+                                 wait_timeout=self.connect_timeout)
+            await client.emit('join_collaboration', {
+                'map_id': map_id,
+                'user_id': user_id,
+                'username': f'load_{index}'
+            })
+        except Exception:
+            self.failures += 1
+            return None
+
+        self.connect_times.append(time.perf_counter() - start)
+        self.clients.append(client)
+        return client
+
+    async def grow(self, count, concurrency):
+        """Ouvrir `count` nouveaux clients avec au plus `concurrency` connexions en vol"""
+        semaphore = asyncio.Semaphore(concurrency)
+        base = len(self.clients) + self.failures
+
+        async def bounded(i):
+            async with semaphore:
+                await self.open_client(base + i)
+
+        await asyncio.gather(*(bounded(i) for i in range(count)))
+
+    async def probe_latency(self, samples, timeout):
+        """Mesurer l'aller-retour d'un cursor_move entre deux collaborateurs d'une même carte"""
+        by_map = {}
+        for client in self.clients:
+            by_map.setdefault(client.map_id, []).append(client)
+
+        pairs = [members[:2] for members in by_map.values() if len(members) >= 2][:samples]
+        latencies = []
+        for sender, receiver in pairs:
+            marker = time.perf_counter_ns()
+            receiver.latencies[marker] = time.perf_counter()
+            receiver.latencies.pop('last', None)
+            await sender.emit('cursor_move', {
+                'map_id': sender.map_id,
+                'user_id': sender.user_id,
+                'x': marker,
+                'y': 0
+            })
+            deadline = time.perf_counter() + timeout
+            while 'last' not in receiver.latencies and time.perf_counter() < deadline:
+                await asyncio.sleep(0.001)
+            if 'last' in receiver.latencies:
+                latencies.append(receiver.latencies.pop('last'))
+            else:
+                receiver.latencies.pop(marker, None)
+                latencies.append(timeout)
+        return latencies
+
+    async def close(self):
+        await asyncio.gather(*(c.disconnect() for c in self.clients), return_exceptions=True)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args):
+    pool = CollaboratorPool(args.url, args.maps, args.connect_timeout)
+    held = 0
+
+    print(f"🔌 Cible : {args.url} ({args.maps} cartes, paliers de {args.step})")
+    print(f"{'sockets':>8} {'échecs':>7} {'connexion p95':>14} {'latence p50':>12} {'latence p95':>12}")
+
+    try:
+        while len(pool.clients) < args.max_clients:
+            pool.connect_times = []
+            await pool.grow(args.step, args.concurrency)
+            await asyncio.sleep(args.settle)
+
+            latencies = await pool.probe_latency(args.probes, args.latency_budget * 4)
+            p95 = percentile(latencies, 95)
+            print(f"{len(pool.clients):>8} {pool.failures:>7} "
+                  f"{percentile(pool.connect_times, 95) * 1000:>12.1f}ms "
+                  f"{statistics.median(latencies) * 1000 if latencies else 0:>10.1f}ms "
+                  f"{p95 * 1000:>10.1f}ms")
+
+            failure_rate = pool.failures / max(1, len(pool.clients) + pool.failures)
+            if failure_rate > args.max_failure_rate or p95 > args.latency_budget:
+                print("⚠️  Dégradation détectée, arrêt de la montée en charge")
+                break
+            held = len(pool.clients)
+
+        await asyncio.sleep(args.hold)
+    finally:
+        await pool.close()
+
+    print(f"\n✅ Sockets de collaboration tenus par le processus : {held}")
+    print(f"📨 Événements cursor_position reçus : {pool.received}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MindMap Master - Test de charge collaboration')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--maps', type=int, default=50, help='Nombre de cartes partagées')
+    parser.add_argument('--step', type=int, default=250, help='Sockets ajoutés par palier')
+    parser.add_argument('--max-clients', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=100, help='Connexions ouvertes en parallèle')
+    parser.add_argument('--connect-timeout', type=float, default=10.0)
+    parser.add_argument('--probes', type=int, default=20, help='Mesures de latence par palier')
+    parser.add_argument('--latency-budget', type=float, default=0.25, help='p95 maximal (secondes)')
+    parser.add_argument('--max-failure-rate', type=float, default=0.01)
+    parser.add_argument('--settle', type=float, default=1.0, help='Pause après chaque palier (secondes)')
+    parser.add_argument('--hold', type=float, default=0.0, help='Maintien final des sockets (secondes)')
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,64 @@
 # app.py - Application Flask pour MindMap Master
 
-from flask import Flask, render_template, request, jsonify, send_file, session
+import os
+
+# Le mode async de production (eventlet/gevent) doit patcher la stdlib avant tout autre import
+ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE') or None
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, render_template, request, jsonify, send_file, session, make_response
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
-import os
 import uuid
 import datetime
+import signal
+import argparse
 from werkzeug.utils import secure_filename
 import base64
-from io import BytesIO
+from io import RawIOBase
 from PIL import Image
 import hashlib
+import math
+from xml.sax.saxutils import escape, quoteattr
+
+import grinde
+import map_outline
+import map_schema
+from grinde import GrindeTally
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'mindmap-master-secret-key-2024'
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 
+# Configuration du serveur temps réel (surchargeable par variables d'environnement)
+app.config['SOCKETIO_ASYNC_MODE'] = ASYNC_MODE  # None = détection automatique
+app.config['SOCKETIO_PING_INTERVAL'] = int(os.environ.get('SOCKETIO_PING_INTERVAL', 25))  # secondes
+app.config['SOCKETIO_PING_TIMEOUT'] = int(os.environ.get('SOCKETIO_PING_TIMEOUT', 20))  # secondes
+app.config['SOCKETIO_MAX_CONNECTIONS'] = int(os.environ.get('SOCKETIO_MAX_CONNECTIONS', 0))  # 0 = illimité
+app.config['HTTP_POOL_HEADROOM'] = int(os.environ.get('HTTP_POOL_HEADROOM', 100))  # requêtes REST au-delà des sockets
+app.config['SOCKETIO_MESSAGE_QUEUE'] = os.environ.get('SOCKETIO_MESSAGE_QUEUE')  # ex: redis:// pour plusieurs workers
+app.config['SHUTDOWN_GRACE_PERIOD'] = int(os.environ.get('SHUTDOWN_GRACE_PERIOD', 5))  # secondes
+
+# Export SVG : en dessous de ce zoom, les nœuds de détail ne sont pas dessinés
+app.config['SVG_DETAIL_MIN_ZOOM'] = float(os.environ.get('SVG_DETAIL_MIN_ZOOM', 0.5))
+
 # Configuration CORS et SocketIO pour collaboration temps réel
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+    ping_interval=app.config['SOCKETIO_PING_INTERVAL'],
+    ping_timeout=app.config['SOCKETIO_PING_TIMEOUT'],
+    message_queue=app.config['SOCKETIO_MESSAGE_QUEUE']
+)
 
 # Créer les dossiers nécessaires
 os.makedirs('uploads', exist_ok=True)
@@ -32,6 +70,7 @@ os.makedirs('static', exist_ok=True)
 mindmaps_db = {}
 sessions_db = {}
 collaborations = {}
+active_connections = {}  # sid -> ensemble des cartes rejointes
 
 # ==============================================================================
 # MODÈLES DE DONNÉES
@@ -45,8 +84,9 @@ class MindMap:
         self.user_id = user_id
         self.created_at = datetime.datetime.now().isoformat()
         self.updated_at = datetime.datetime.now().isoformat()
-        self.nodes = []
-        self.connections = []
+        self._nodes = []
+        self._connections = []
+        self.tally = GrindeTally()  # comptages GRINDE maintenus à chaque mutation
         self.collaborators = []
         self.version = 1
         self.tags = []
@@ -57,6 +97,25 @@ class MindMap:
             'theme': 'default'
         }
     
+    @property
+    def nodes(self):
+        return self._nodes
+    
+    @nodes.setter
+    def nodes(self, nodes):
+        # Remplacement complet (mise à jour, import) : recompter une seule fois
+        self._nodes = nodes
+        self.tally = GrindeTally.from_map(self._nodes, self._connections)
+    
+    @property
+    def connections(self):
+        return self._connections
+    
+    @connections.setter
+    def connections(self, connections):
+        self._connections = connections
+        self.tally = GrindeTally.from_map(self._nodes, self._connections)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -73,37 +132,115 @@ class MindMap:
             'metadata': self.metadata
         }
     
+    @staticmethod
+    def normalized_node(node):
+        """Nœud normalisé sur place par map_schema : les comptages GRINDE ne peuvent plus échouer"""
+        if not isinstance(node, dict):
+            raise map_schema.SchemaError('Not a node object')
+        map_schema.normalize_map({'nodes': [node]})
+        return node
+    
     def add_node(self, node_data):
+        # Nœud validé avant toute modification : en cas d'erreur, ni la carte,
+        # ni les comptages, ni la version ne changent
+        self.normalized_node(node_data)
         node_data['id'] = str(uuid.uuid4())
         node_data['created_at'] = datetime.datetime.now().isoformat()
-        self.nodes.append(node_data)
+        self.tally.add_node(node_data)
+        self._nodes.append(node_data)
         self.updated_at = datetime.datetime.now().isoformat()
         self.version += 1
         return node_data
     
     def update_node(self, node_id, updates):
-        for node in self.nodes:
+        for position, node in enumerate(self._nodes):
             if node['id'] == node_id:
-                node.update(updates)
+                # Nouvelle version construite à part, puis substituée
+                updated = self.normalized_node(dict(node, **updates))
+                self.tally.remove_node(node)
+                self.tally.add_node(updated)
+                self._nodes[position] = updated
                 self.updated_at = datetime.datetime.now().isoformat()
                 self.version += 1
-                return node
+                return updated
         return None
     
     def delete_node(self, node_id):
-        self.nodes = [n for n in self.nodes if n['id'] != node_id]
-        self.connections = [c for c in self.connections 
-                           if c['source'] != node_id and c['target'] != node_id]
+        kept_nodes = []
+        for node in self._nodes:
+            if node['id'] == node_id:
+                self.tally.remove_node(node)
+            else:
+                kept_nodes.append(node)
+        
+        kept_connections = []
+        for connection in self._connections:
+            if connection['source'] == node_id or connection['target'] == node_id:
+                self.tally.remove_connection(connection)
+            else:
+                kept_connections.append(connection)
+        
+        self._nodes = kept_nodes
+        self._connections = kept_connections
         self.updated_at = datetime.datetime.now().isoformat()
         self.version += 1
     
     def add_connection(self, connection_data):
         connection_data['id'] = str(uuid.uuid4())
-        self.connections.append(connection_data)
+        self._connections.append(connection_data)
+        self.tally.add_connection(connection_data)
         self.updated_at = datetime.datetime.now().isoformat()
         self.version += 1
         return connection_data
 
+# ==============================================================================
+# CONCURRENCE OPTIMISTE
+# ==============================================================================
+
+def version_etag(mindmap):
+    """ETag fort d'une carte, dérivé de son numéro de version"""
+    return f'{mindmap.id}-v{mindmap.version}'
+
+def check_base_version(mindmap, data=None):
+    """Refuser (409) une modification basée sur une version périmée de la carte"""
+    # Version attendue via If-Match (ETag reçu) ou base_version (corps ou paramètre) ;
+    # sans l'un ni l'autre, la modification est appliquée sans vérification
+    if request.if_match and not request.if_match.contains(version_etag(mindmap)):
+        return version_conflict(mindmap)
+    
+    base_version = data.pop('base_version', None) if isinstance(data, dict) else None
+    if base_version is None:
+        base_version = request.args.get('base_version')
+    if base_version is None:
+        return None
+    
+    try:
+        base_version = int(base_version)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'base_version invalide'}), 400
+    
+    if base_version != mindmap.version:
+        return version_conflict(mindmap)
+    return None
+
+def version_conflict(mindmap):
+    """Réponse 409 contenant la version courante pour que le client puisse se resynchroniser"""
+    response = jsonify({
+        'success': False,
+        'error': 'Conflit de version',
+        'version': mindmap.version,
+        'mindmap': mindmap.to_dict()
+    })
+    response.status_code = 409
+    response.set_etag(version_etag(mindmap))
+    return response
+
+def versioned_response(payload, mindmap):
+    """Réponse JSON portant l'ETag de la version courante de la carte"""
+    response = jsonify(payload)
+    response.set_etag(version_etag(mindmap))
+    return response
+
 # ==============================================================================
 # ROUTES PRINCIPALES
 # ==============================================================================
@@ -135,15 +272,27 @@ def get_mindmap(map_id):
     if map_id not in mindmaps_db:
         return jsonify({'success': False, 'error': 'Carte non trouvée'}), 404
     
-    return jsonify({
+    mindmap = mindmaps_db[map_id]
+    
+    # Le client possède déjà cette version : inutile de renvoyer la carte
+    if request.if_none_match.contains(version_etag(mindmap)):
+        response = make_response('', 304)
+        response.set_etag(version_etag(mindmap))
+        return response
+    
+    return versioned_response({
         'success': True,
-        'mindmap': mindmaps_db[map_id].to_dict()
-    })
+        'mindmap': mindmap.to_dict()
+    }, mindmap)
 
 @app.route('/api/mindmap', methods=['POST'])
 def create_mindmap():
     """Créer une nouvelle carte"""
     data = request.json
+    try:
+        map_schema.normalize_map(data)
+    except map_schema.SchemaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     user_id = session.get('user_id', str(uuid.uuid4()))
     session['user_id'] = user_id
     
@@ -166,10 +315,10 @@ def create_mindmap():
     
     mindmaps_db[mindmap.id] = mindmap
     
-    return jsonify({
+    return versioned_response({
         'success': True,
         'mindmap': mindmap.to_dict()
-    })
+    }, mindmap)
 
 @app.route('/api/mindmap/<map_id>', methods=['PUT'])
 def update_mindmap(map_id):
@@ -180,6 +329,18 @@ def update_mindmap(map_id):
     data = request.json
     mindmap = mindmaps_db[map_id]
     
+    conflict = check_base_version(mindmap, data)
+    if conflict:
+        return conflict
+    
+    try:
+        # Normalisée une fois à l'entrée ; des connexions envoyées seules sont
+        # vérifiées contre les nœuds existants
+        node_ids = None if 'nodes' in data else [node['id'] for node in mindmap.nodes]
+        map_schema.normalize_map(data, node_ids)
+    except map_schema.SchemaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
     # Mettre à jour les propriétés
     if 'title' in data:
         mindmap.title = data['title']
@@ -204,10 +365,10 @@ def update_mindmap(map_id):
             'data': mindmap.to_dict()
         }, room=map_id)
     
-    return jsonify({
+    return versioned_response({
         'success': True,
         'mindmap': mindmap.to_dict()
-    })
+    }, mindmap)
 
 @app.route('/api/mindmap/<map_id>', methods=['DELETE'])
 def delete_mindmap(map_id):
@@ -215,6 +376,10 @@ def delete_mindmap(map_id):
     if map_id not in mindmaps_db:
         return jsonify({'success': False, 'error': 'Carte non trouvée'}), 404
     
+    conflict = check_base_version(mindmaps_db[map_id])
+    if conflict:
+        return conflict
+    
     del mindmaps_db[map_id]
     
     return jsonify({'success': True})
@@ -231,19 +396,29 @@ def add_node(map_id):
     
     data = request.json
     mindmap = mindmaps_db[map_id]
-    node = mindmap.add_node(data)
+    
+    conflict = check_base_version(mindmap, data)
+    if conflict:
+        return conflict
+    
+    try:
+        # Normalisé par map_schema avant l'ajout (MindMap.normalized_node)
+        node = mindmap.add_node(data)
+    except map_schema.SchemaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     # Notifier les collaborateurs
     if map_id in collaborations:
         socketio.emit('node_added', {
             'map_id': map_id,
-            'node': node
+            'node': node,
+            'version': mindmap.version
         }, room=map_id)
     
-    return jsonify({
+    return versioned_response({
         'success': True,
         'node': node
-    })
+    }, mindmap)
 
 @app.route('/api/mindmap/<map_id>/node/<node_id>', methods=['PUT'])
 def update_node(map_id, node_id):
@@ -253,23 +428,31 @@ def update_node(map_id, node_id):
     
     data = request.json
     mindmap = mindmaps_db[map_id]
+    
+    conflict = check_base_version(mindmap, data)
+    if conflict:
+        return conflict
+    
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Not a node object'}), 400
     node = mindmap.update_node(node_id, data)
     
     if not node:
         return jsonify({'success': False, 'error': 'Nœud non trouvé'}), 404
     
-    # Notifier les collaborateurs
+    # Notifier les collaborateurs (valeurs normalisées, champs invalides retirés)
     if map_id in collaborations:
         socketio.emit('node_updated', {
             'map_id': map_id,
             'node_id': node_id,
-            'updates': data
+            'updates': {key: node[key] for key in data if key in node},
+            'version': mindmap.version
         }, room=map_id)
     
-    return jsonify({
+    return versioned_response({
         'success': True,
         'node': node
-    })
+    }, mindmap)
 
 @app.route('/api/mindmap/<map_id>/node/<node_id>', methods=['DELETE'])
 def delete_node(map_id, node_id):
@@ -278,16 +461,22 @@ def delete_node(map_id, node_id):
         return jsonify({'success': False, 'error': 'Carte non trouvée'}), 404
     
     mindmap = mindmaps_db[map_id]
+    
+    conflict = check_base_version(mindmap)
+    if conflict:
+        return conflict
+    
     mindmap.delete_node(node_id)
     
     # Notifier les collaborateurs
     if map_id in collaborations:
         socketio.emit('node_deleted', {
             'map_id': map_id,
-            'node_id': node_id
+            'node_id': node_id,
+            'version': mindmap.version
         }, room=map_id)
     
-    return jsonify({'success': True})
+    return versioned_response({'success': True}, mindmap)
 
 # ==============================================================================
 # GESTION DES CONNEXIONS
@@ -301,19 +490,31 @@ def add_connection(map_id):
     
     data = request.json
     mindmap = mindmaps_db[map_id]
+    
+    conflict = check_base_version(mindmap, data)
+    if conflict:
+        return conflict
+    
+    # Normalisée comme une carte reçue : une connexion vers un nœud inconnu est refusée
+    connection_update = {'connections': [data]}
+    map_schema.normalize_map(connection_update, node_ids=[node['id'] for node in mindmap.nodes])
+    if not connection_update['connections']:
+        return jsonify({'success': False, 'error': 'Connexion invalide ou nœud inconnu'}), 400
+    
     connection = mindmap.add_connection(data)
     
     # Notifier les collaborateurs
     if map_id in collaborations:
         socketio.emit('connection_added', {
             'map_id': map_id,
-            'connection': connection
+            'connection': connection,
+            'version': mindmap.version
         }, room=map_id)
     
-    return jsonify({
+    return versioned_response({
         'success': True,
         'connection': connection
-    })
+    }, mindmap)
 
 # ==============================================================================
 # EXPORT ET IMPORT
@@ -327,21 +528,30 @@ def export_mindmap(map_id, format):
     
     mindmap = mindmaps_db[map_id]
     
+    # Les exports sont produits morceau par morceau pendant l'envoi : send_file
+    # transmet un flux non BytesIO en transfert chunké, sans le charger
     if format == 'json':
         # Export JSON
-        data = json.dumps(mindmap.to_dict(), indent=2)
+        data = iter_json(mindmap)
         return send_file(
-            BytesIO(data.encode()),
+            GeneratorReader(data),
             mimetype='application/json',
             as_attachment=True,
             download_name=f'{mindmap.title}.json'
         )
     
     elif format == 'svg':
-        # Export SVG (génération basique)
-        svg = generate_svg(mindmap)
+        # Export SVG : recadrage optionnel (viewBox=x,y,largeur,hauteur) et zoom
+        try:
+            view = parse_view_box(request.args.get('viewBox'))
+            zoom = float(request.args.get('zoom', 1))
+            if not math.isfinite(zoom) or zoom <= 0:
+                raise ValueError
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Paramètres SVG invalides'}), 400
+        svg = iter_svg(mindmap, view=view, zoom=zoom, detail_min_zoom=app.config['SVG_DETAIL_MIN_ZOOM'])
         return send_file(
-            BytesIO(svg.encode()),
+            GeneratorReader(svg),
             mimetype='image/svg+xml',
             as_attachment=True,
             download_name=f'{mindmap.title}.svg'
@@ -349,14 +559,26 @@ def export_mindmap(map_id, format):
     
     elif format == 'markdown':
         # Export Markdown
-        md = generate_markdown(mindmap)
+        md = iter_markdown(mindmap)
         return send_file(
-            BytesIO(md.encode()),
+            GeneratorReader(md),
             mimetype='text/markdown',
             as_attachment=True,
             download_name=f'{mindmap.title}.md'
         )
     
+    elif format in map_outline.FORMATS:
+        # Plan hiérarchique construit à partir des connexions (outline, outline-text, opml)
+        _, mimetype, extension = map_outline.FORMATS[format]
+        outline = map_outline.iter_outline(format, mindmap.title, list(mindmap.nodes),
+                                           list(mindmap.connections), 'Idées non reliées')
+        return send_file(
+            GeneratorReader(outline),
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=f'{mindmap.title}.{extension}'
+        )
+    
     else:
         return jsonify({'success': False, 'error': 'Format non supporté'}), 400
 
@@ -374,6 +596,7 @@ def import_mindmap():
         # Lire le contenu du fichier
         content = file.read().decode('utf-8')
         data = json.loads(content)
+        map_schema.normalize_map(data)
         
         # Créer une nouvelle carte
         user_id = session.get('user_id', str(uuid.uuid4()))
@@ -404,6 +627,34 @@ def import_mindmap():
 # COLLABORATION TEMPS RÉEL (WebSocket)
 # ==============================================================================
 
+@socketio.on('connect')
+def handle_connect(auth=None):
+    """Accepter une connexion tant que la limite configurée n'est pas atteinte"""
+    max_connections = app.config['SOCKETIO_MAX_CONNECTIONS']
+    if max_connections and len(active_connections) >= max_connections:
+        return False
+    
+    active_connections[request.sid] = set()
+
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    """Libérer les sessions de collaboration d'un socket déconnecté"""
+    for map_id in active_connections.pop(request.sid, set()):
+        if map_id not in collaborations:
+            continue
+        
+        departed = [u for u in collaborations[map_id] if u['sid'] == request.sid]
+        collaborations[map_id] = [u for u in collaborations[map_id] if u['sid'] != request.sid]
+        
+        for user in departed:
+            emit('user_left', {
+                'user_id': user['user_id'],
+                'users': collaborations[map_id]
+            }, room=map_id)
+        
+        if not collaborations[map_id]:
+            del collaborations[map_id]
+
 @socketio.on('join_collaboration')
 def handle_join_collaboration(data):
     """Rejoindre une session de collaboration"""
@@ -412,6 +663,7 @@ def handle_join_collaboration(data):
     username = data.get('username', f'User_{user_id[:8]}')
     
     join_room(map_id)
+    active_connections.setdefault(request.sid, set()).add(map_id)
     
     if map_id not in collaborations:
         collaborations[map_id] = []
@@ -436,6 +688,7 @@ def handle_leave_collaboration(data):
     user_id = data.get('user_id')
     
     leave_room(map_id)
+    active_connections.get(request.sid, set()).discard(map_id)
     
     if map_id in collaborations:
         collaborations[map_id] = [
@@ -473,63 +726,177 @@ def handle_node_dragging(data):
 # FONCTIONS UTILITAIRES
 # ==============================================================================
 
+class GeneratorReader(RawIOBase):
+    """Fichier binaire en lecture seule alimenté par un générateur de texte"""
+    
+    def __init__(self, pieces):
+        super().__init__()
+        self.pieces = iter(pieces)
+        self.pending = b''
+        self.offset = 0
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while self.offset >= len(self.pending):
+            try:
+                self.pending, self.offset = next(self.pieces).encode('utf-8'), 0
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self.pending) - self.offset)
+        buffer[:size] = self.pending[self.offset:self.offset + size]
+        self.offset += size
+        return size
+
+class SnapshotList(list):
+    """Liste dont chaque élément est copié au moment où l'encodeur JSON l'atteint"""
+    # Un nœud modifié pendant l'envoi (node.update) est encodé soit avant,
+    # soit après la modification, jamais à moitié
+    def __iter__(self):
+        for item in list.__iter__(self):
+            yield dict(item) if isinstance(item, dict) else item
+
+def iter_json(mindmap):
+    """Morceaux successifs de l'export JSON d'une mindmap"""
+    data = mindmap.to_dict()
+    data['nodes'] = SnapshotList(data['nodes'])
+    data['connections'] = SnapshotList(data['connections'])
+    return json.JSONEncoder(indent=2).iterencode(data)
+
+SVG_PADDING = 40
+SVG_DEFAULT_CANVAS = (0, 0, 1200, 800)  # carte vide
+
+def parse_view_box(value):
+    """(x, y, largeur, hauteur) d'un paramètre viewBox, ou None ; ValueError si invalide"""
+    if not value:
+        return None
+    numbers = [float(part) for part in value.replace(',', ' ').split()]
+    if len(numbers) != 4 or not all(map(math.isfinite, numbers)) or numbers[2] <= 0 or numbers[3] <= 0:
+        raise ValueError(f"viewBox invalide: {value}")
+    return tuple(numbers)
+
+def _number(value, default):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return number if math.isfinite(number) else default
+
+def _fmt(value):
+    """Nombre SVG compact (une décimale au plus)"""
+    text = f'{value:.1f}'
+    return text[:-2] if text.endswith('.0') else text
+
+def node_shape(node):
+    """(x, y, demi-largeur, demi-hauteur, cercle ?) d'un nœud tel que dessiné"""
+    x = _number(node.get('x'), 100)
+    y = _number(node.get('y'), 100)
+    size = _number(node.get('size'), 20)
+    if node.get('type') == 'central':
+        return x, y, size, size, True
+    return x, y, (len(str(node.get('text', ''))) * 8 + 20) / 2, size, False
+
+def _border_point(shape, toward_x, toward_y):
+    """Point du contour d'un nœud sur le segment qui le relie à (toward_x, toward_y)"""
+    x, y, half_width, half_height, circle = shape
+    dx, dy = toward_x - x, toward_y - y
+    if not dx and not dy:
+        return x, y
+    if circle:
+        scale = half_width / math.hypot(dx, dy)
+    else:
+        scale = min(half_width / abs(dx) if dx else math.inf, half_height / abs(dy) if dy else math.inf)
+    if scale >= 1:
+        return x, y  # nœuds qui se chevauchent
+    return x + dx * scale, y + dy * scale
+
+def iter_svg(mindmap, view=None, zoom=1.0, detail_min_zoom=None):
+    """Morceaux successifs du SVG d'une mindmap"""
+    # Les extrémités des connexions sont résolues par un index id -> forme ;
+    # le cadre est la boîte englobante des nœuds (ou le viewBox demandé) et
+    # tout ce qui en sort est omis, ce qui borne la taille d'un recadrage
+    hide_details = detail_min_zoom is not None and zoom < detail_min_zoom
+    shapes = {}
+    for node in list(mindmap.nodes):
+        if not (hide_details and node.get('type') == 'detail'):
+            shapes[node.get('id')] = (node, node_shape(node))
+    
+    if view:
+        min_x, min_y, width, height = view
+    elif shapes:
+        min_x = min(x - w for _, (x, y, w, h, _) in shapes.values()) - SVG_PADDING
+        min_y = min(y - h for _, (x, y, w, h, _) in shapes.values()) - SVG_PADDING
+        width = max(x + w for _, (x, y, w, h, _) in shapes.values()) + SVG_PADDING - min_x
+        height = max(y + h for _, (x, y, w, h, _) in shapes.values()) + SVG_PADDING - min_y
+    else:
+        min_x, min_y, width, height = SVG_DEFAULT_CANVAS
+    max_x, max_y = min_x + width, min_y + height
+    
+    def visible(x0, y0, x1, y1):
+        return x1 >= min_x and x0 <= max_x and y1 >= min_y and y0 <= max_y
+    
+    yield (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+           f'<svg xmlns="http://www.w3.org/2000/svg" width="{_fmt(width * zoom)}" height="{_fmt(height * zoom)}" '
+           f'viewBox="{_fmt(min_x)} {_fmt(min_y)} {_fmt(width)} {_fmt(height)}">\n'
+           '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+           'orient="auto-start-reverse"><path d="M0 0L10 5L0 10z" fill="#6366f1"/></marker></defs>\n'
+           '<style>\n'
+           '#nodes rect, #nodes circle { fill: #6366f1; stroke: white; stroke-width: 2; }\n'
+           '#nodes text { fill: white; font-family: Arial; font-size: 14px; text-anchor: middle; }\n'
+           '.connection { stroke: #6366f1; stroke-width: 2; fill: none; }\n'
+           '</style>\n')
+    
+    # Connexions : un seul chemin par type de trait au lieu d'un élément par connexion
+    connections = list(mindmap.connections)
+    markers = {'arrow': ' marker-end="url(#arrow)"', 'double': ' marker-start="url(#arrow)" marker-end="url(#arrow)"'}
+    for kind in ('line', 'arrow', 'double'):
+        started = False
+        for conn in connections:
+            if (conn.get('type') if conn.get('type') in markers else 'line') != kind:
+                continue
+            source, target = shapes.get(conn.get('source')), shapes.get(conn.get('target'))
+            if not source or not target or source is target:
+                continue
+            x1, y1 = _border_point(source[1], target[1][0], target[1][1])
+            x2, y2 = _border_point(target[1], source[1][0], source[1][1])
+            if not visible(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)):
+                continue
+            if not started:
+                yield f'<path class="connection" data-type="{kind}"{markers.get(kind, "")} d="'
+                started = True
+            yield f'M{_fmt(x1)} {_fmt(y1)}L{_fmt(x2)} {_fmt(y2)}'
+        if started:
+            yield '"/>\n'
+    
+    # Nœuds (dans leur ordre d'origine : les plus récents au-dessus)
+    yield '<g id="nodes">\n'
+    for node, (x, y, half_width, half_height, circle) in shapes.values():
+        if not visible(x - half_width, y - half_height, x + half_width, y + half_height):
+            continue
+        fill = f' style={quoteattr("fill: " + str(node["color"]))}' if node.get('color') else ''
+        if circle:
+            yield f'<circle cx="{_fmt(x)}" cy="{_fmt(y)}" r="{_fmt(half_width)}"{fill}/>'
+        else:
+            yield (f'<rect x="{_fmt(x - half_width)}" y="{_fmt(y - half_height)}" width="{_fmt(half_width * 2)}" '
+                   f'height="{_fmt(half_height * 2)}" rx="10"{fill}/>')
+        yield f'<text x="{_fmt(x)}" y="{_fmt(y + 5)}">{escape(str(node.get("text", "")))}</text>\n'
+    yield '</g>\n</svg>\n'
+
 def generate_svg(mindmap):
     """Générer un SVG à partir d'une mindmap"""
-    svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-    <svg xmlns="http://www.w3.org/2000/svg" width="1200" height="800">
-        <style>
-            .node {{ fill: #6366f1; stroke: white; stroke-width: 2; }}
-            .text {{ fill: white; font-family: Arial; font-size: 14px; text-anchor: middle; }}
-            .connection {{ stroke: #6366f1; stroke-width: 2; fill: none; }}
-        </style>
-        <g id="connections">'''
-    
-    # Ajouter les connexions
-    for conn in mindmap.connections:
-        svg += f'''
-            <line class="connection" 
-                  x1="{conn.get('x1', 0)}" y1="{conn.get('y1', 0)}"
-                  x2="{conn.get('x2', 0)}" y2="{conn.get('y2', 0)}" />'''
-    
-    svg += '''
-        </g>
-        <g id="nodes">'''
-    
-    # Ajouter les nœuds
-    for node in mindmap.nodes:
-        x = node.get('x', 100)
-        y = node.get('y', 100)
-        text = node.get('text', '')
-        size = node.get('size', 20)
-        
-        if node.get('type') == 'central':
-            svg += f'''
-                <circle class="node" cx="{x}" cy="{y}" r="{size}" />
-                <text class="text" x="{x}" y="{y+5}">{text}</text>'''
-        else:
-            width = len(text) * 8 + 20
-            height = size * 2
-            svg += f'''
-                <rect class="node" x="{x-width/2}" y="{y-height/2}" 
-                      width="{width}" height="{height}" rx="10" />
-                <text class="text" x="{x}" y="{y+5}">{text}</text>'''
-    
-    svg += '''
-        </g>
-    </svg>'''
-    
-    return svg
+    return ''.join(iter_svg(mindmap))
 
-def generate_markdown(mindmap):
-    """Générer un document Markdown à partir d'une mindmap"""
-    md = f"# {mindmap.title}\n\n"
-    md += f"*Créé le {mindmap.created_at}*\n\n"
-    md += f"**Mode:** {mindmap.mode.upper()}\n\n"
+def iter_markdown(mindmap):
+    """Morceaux successifs du document Markdown d'une mindmap"""
+    yield f"# {mindmap.title}\n\n"
+    yield f"*Créé le {mindmap.created_at}*\n\n"
+    yield f"**Mode:** {mindmap.mode.upper()}\n\n"
     
     # Trouver le nœud central
     central = next((n for n in mindmap.nodes if n.get('type') == 'central'), None)
     if central:
-        md += f"## 🎯 Idée Centrale: {central.get('text', 'Sans titre')}\n\n"
+        yield f"## 🎯 Idée Centrale: {central.get('text', 'Sans titre')}\n\n"
     
     # Grouper les nœuds par type
     groups = {}
@@ -548,17 +915,19 @@ def generate_markdown(mindmap):
     }
     
     for node_type, nodes in groups.items():
-        md += f"### {type_names.get(node_type, node_type.title())}\n\n"
+        yield f"### {type_names.get(node_type, node_type.title())}\n\n"
         for node in nodes:
-            md += f"- {node.get('text', 'Sans titre')}\n"
-        md += "\n"
+            yield f"- {node.get('text', 'Sans titre')}\n"
+        yield "\n"
     
     # Ajouter les tags
     if mindmap.tags:
-        md += f"### 🏷️ Tags\n\n"
-        md += ', '.join(f"`{tag}`" for tag in mindmap.tags) + "\n\n"
-    
-    return md
+        yield f"### 🏷️ Tags\n\n"
+        yield ', '.join(f"`{tag}`" for tag in mindmap.tags) + "\n\n"
+
+def generate_markdown(mindmap):
+    """Générer un document Markdown à partir d'une mindmap"""
+    return ''.join(iter_markdown(mindmap))
 
 # ==============================================================================
 # TEMPLATES ET MODÈLES PRÉ-DÉFINIS
@@ -716,60 +1085,85 @@ def get_mindmap_stats(map_id):
 
 def calculate_grinde_score(mindmap):
     """Calculer un score basé sur les principes GRINDE"""
-    score = {
-        'grouped': 0,
-        'reflective': 0,
-        'interconnected': 0,
-        'non_verbal': 0,
-        'directional': 0,
-        'emphasized': 0,
-        'total': 0
-    }
+    # Lecture en O(1) des comptages maintenus par MindMap.tally
+    return grinde.score(mindmap.tally, 'master')
+
+# ==============================================================================
+# SERVEUR DE PRODUCTION
+# ==============================================================================
+
+def drain_connections():
+    """Prévenir les collaborateurs de l'arrêt, puis déconnecter ceux encore présents après le délai de grâce"""
+    # Les clients gardent SHUTDOWN_GRACE_PERIOD secondes pour enregistrer
+    # leur travail et se déconnecter d'eux-mêmes
+    socketio.emit('server_shutdown', {
+        'reconnect_after': app.config['SHUTDOWN_GRACE_PERIOD']
+    })
+    socketio.sleep(app.config['SHUTDOWN_GRACE_PERIOD'])
+    for sid in list(active_connections):
+        socketio.server.disconnect(sid)
+
+def install_shutdown_handlers():
+    """Arrêter proprement le serveur sur SIGTERM/SIGINT en prévenant les collaborateurs"""
+    requested = []
+    
+    def drain():
+        # Le handler de signal ne peut pas bloquer la boucle d'événements :
+        # une tâche de fond surveille la demande d'arrêt et vide les sockets
+        while not requested:
+            socketio.sleep(0.5)
+        
+        drain_connections()
+        
+        # Terminer le serveur comme un Ctrl+C
+        os.kill(os.getpid(), signal.SIGINT)
+    
+    def shutdown(signum, frame):
+        print(f"🛑 Signal {signum} reçu, arrêt du serveur...")
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        requested.append(signum)
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    socketio.start_background_task(drain)
+
+def run_production(host='0.0.0.0', port=5000):
+    """Lancer le serveur eventlet/gevent sans debug ni rechargement automatique"""
+    if socketio.async_mode == 'threading':
+        raise RuntimeError("Le mode production requiert eventlet ou gevent "
+                           "(SOCKETIO_ASYNC_MODE=eventlet)")
     
-    # G - Grouped: Vérifier la présence de groupes
-    group_nodes = [n for n in mindmap.nodes if n.get('type') == 'group']
-    score['grouped'] = min(100, len(group_nodes) * 25)
+    install_shutdown_handlers()
+    print(f"🚀 MindMap Master (production, {socketio.async_mode}) sur http://{host}:{port}")
     
-    # R - Reflective: Vérifier la variété du vocabulaire
-    unique_words = set()
-    for node in mindmap.nodes:
-        words = node.get('text', '').lower().split()
-        unique_words.update(words)
-    score['reflective'] = min(100, len(unique_words) * 5)
-    
-    # I - Interconnected: Ratio connexions/nœuds
-    if len(mindmap.nodes) > 1:
-        connectivity_ratio = len(mindmap.connections) / (len(mindmap.nodes) - 1)
-        score['interconnected'] = min(100, int(connectivity_ratio * 50))
-    
-    # N - Non-verbal: Vérifier la présence d'images/symboles
-    nodes_with_visuals = [n for n in mindmap.nodes 
-                          if n.get('image') or any(c in n.get('text', '') 
-                          for c in '🎯💡📊🔥✨🚀💎⭐')]
-    score['non_verbal'] = min(100, len(nodes_with_visuals) * 20)
-    
-    # D - Directional: Vérifier les connexions directionnelles
-    directional_connections = [c for c in mindmap.connections 
-                              if c.get('type') in ['arrow', 'double']]
-    if mindmap.connections:
-        score['directional'] = int((len(directional_connections) / 
-                                   len(mindmap.connections)) * 100)
-    
-    # E - Emphasized: Vérifier la hiérarchie (tailles différentes)
-    sizes = set(n.get('size', 20) for n in mindmap.nodes)
-    colors = set(n.get('color', '#6366f1') for n in mindmap.nodes)
-    score['emphasized'] = min(100, (len(sizes) + len(colors)) * 15)
-    
-    # Score total
-    score['total'] = sum(score.values()) // 6
-    
-    return score
+    socketio.run(app, host=host, port=port, debug=False, use_reloader=False,
+                 log_output=False, **server_options(socketio.async_mode))
+
+def server_options(async_mode):
+    """Options du serveur eventlet : pool de greenthreads plus grand que la limite de sockets"""
+    # Chaque websocket occupe un greenthread : un pool de la taille de la
+    # limite serait épuisé par les sockets, et les requêtes REST comme les
+    # poignées de main à refuser par handle_connect resteraient en attente
+    max_connections = app.config['SOCKETIO_MAX_CONNECTIONS']
+    if async_mode != 'eventlet' or not max_connections:
+        return {}
+    import eventlet.wsgi
+    return {'max_size': max(eventlet.wsgi.DEFAULT_MAX_SIMULTANEOUS_REQUESTS,
+                            max_connections + app.config['HTTP_POOL_HEADROOM'])}
 
 # ==============================================================================
 # MAIN
 # ==============================================================================
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MindMap Master - Backend')
+    parser.add_argument('--production', action='store_true',
+                        help='Serveur eventlet/gevent sans debug')
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    args = parser.parse_args()
+    
     # Créer le template HTML s'il n'existe pas
     with open('templates/index.html', 'w', encoding='utf-8') as f:
         # Ici on devrait copier le contenu HTML de l'artifact précédent
@@ -799,4 +1193,7 @@ if __name__ == '__main__':
     print("📚 Documentation API disponible")
     print("🔥 WebSocket activé pour collaboration temps réel")
     
-    socketio.run(app, debug=True, port=5000)
\ No newline at end of file
+    if args.production:
+        run_production(host=args.host, port=args.port)
+    else:
+        socketio.run(app, debug=True, host=args.host, port=args.port)
\ No newline at end of file
@@ -0,0 +1,313 @@
+# grinde.py - Comptages et scores GRINDE partagés par app.py et flask-backend.py
+
+import hashlib
+import json
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np  # Optionnel : scoring vectorisé des corpus
+except ImportError:
+    np = None
+
+# Symboles reconnus comme éléments visuels par le backend collaboratif
+VISUAL_SYMBOLS = '🎯💡📊🔥✨🚀💎⭐'
+
+DEFAULT_SIZE = 20
+DEFAULT_COLOR = '#6366f1'
+
+# Tables compilées une seule fois au chargement du module
+NON_ASCII_RE = re.compile('[^\x00-\x7f]')
+VISUAL_RE = re.compile('[' + re.escape(VISUAL_SYMBOLS) + ']')
+
+
+def tokenize(text):
+    """Tokenizer unique des scores GRINDE : mots en minuscules"""
+    return text.lower().split()
+
+
+def node_words(node):
+    """Mots (en minuscules) du texte d'un nœud"""
+    return tokenize(node.get('text') or '')
+
+
+def scan_text(text):
+    """(caractères hors ASCII, présence d'un symbole visuel) d'un texte"""
+    # La plupart des textes sont en ASCII pur : aucun émoji possible
+    if text.isascii():
+        return 0, False
+    return len(NON_ASCII_RE.findall(text)), VISUAL_RE.search(text) is not None
+
+
+def _discard(counter, key):
+    """Décrémenter une clé en supprimant les entrées tombées à zéro"""
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+class GrindeTally:
+    """Comptages nécessaires au score GRINDE, tenus à jour à chaque mutation"""
+    # Les scores se lisent ensuite en O(1) au lieu de re-parcourir
+    # tous les nœuds et connexions de la carte
+
+    def __init__(self):
+        self.node_count = 0
+        self.group_count = 0
+        self.words = Counter()          # multiset des mots de tous les nœuds
+        self.non_ascii_chars = 0        # caractères hors ASCII (émojis, symboles)
+        self.visual_nodes = 0           # nœuds avec image ou symbole visuel
+        self.sizes = Counter()
+        self.colors = Counter()
+        self.connection_count = 0
+        self.arrow_count = 0
+        self.double_count = 0
+
+    @classmethod
+    def from_map(cls, nodes, connections):
+        """Construire les comptages d'une carte complète"""
+        tally = cls()
+        for node in nodes:
+            tally.add_node(node)
+        for connection in connections:
+            tally.add_connection(connection)
+        return tally
+
+    # -- Nœuds ---------------------------------------------------------------
+
+    def add_node(self, node):
+        text = node.get('text') or ''
+        non_ascii, visual = scan_text(text)
+        self.node_count += 1
+        if node.get('type') == 'group':
+            self.group_count += 1
+        self.words.update(tokenize(text))
+        self.non_ascii_chars += non_ascii
+        if visual or node.get('image'):
+            self.visual_nodes += 1
+        self.sizes[node.get('size', DEFAULT_SIZE)] += 1
+        self.colors[node.get('color', DEFAULT_COLOR)] += 1
+
+    def remove_node(self, node):
+        text = node.get('text') or ''
+        non_ascii, visual = scan_text(text)
+        self.node_count -= 1
+        if node.get('type') == 'group':
+            self.group_count -= 1
+        for word in tokenize(text):
+            _discard(self.words, word)
+        self.non_ascii_chars -= non_ascii
+        if visual or node.get('image'):
+            self.visual_nodes -= 1
+        _discard(self.sizes, node.get('size', DEFAULT_SIZE))
+        _discard(self.colors, node.get('color', DEFAULT_COLOR))
+
+    # -- Connexions ----------------------------------------------------------
+
+    def add_connection(self, connection):
+        self.connection_count += 1
+        if connection.get('type') == 'arrow':
+            self.arrow_count += 1
+        elif connection.get('type') == 'double':
+            self.double_count += 1
+
+    def remove_connection(self, connection):
+        self.connection_count -= 1
+        if connection.get('type') == 'arrow':
+            self.arrow_count -= 1
+        elif connection.get('type') == 'double':
+            self.double_count -= 1
+
+    # -- Lectures ------------------------------------------------------------
+
+    @property
+    def unique_words(self):
+        return len(self.words)
+
+    @property
+    def distinct_sizes(self):
+        return len(self.sizes)
+
+    @property
+    def distinct_colors(self):
+        return len(self.colors)
+
+    def features(self):
+        """Vecteur de caractéristiques (ordre de FEATURES) utilisé par les scores"""
+        return (self.node_count, self.group_count, self.unique_words,
+                self.non_ascii_chars, self.visual_nodes, self.connection_count,
+                self.arrow_count, self.double_count, self.distinct_sizes,
+                self.distinct_colors)
+
+
+class GrindeFingerprint:
+    """Empreinte des seuls champs qui influencent le score GRINDE, construite élément par élément"""
+    # Nœuds et connexions sont hachés séparément : l'empreinte ne dépend pas
+    # de l'ordre des clés du fichier, ce qui permet de la calculer en flux
+
+    def __init__(self, version):
+        self.version = version
+        self._nodes = hashlib.blake2b(digest_size=16)
+        self._connections = hashlib.blake2b(digest_size=16)
+
+    @classmethod
+    def from_map(cls, nodes, connections, version):
+        fingerprint = cls(version)
+        for node in nodes:
+            fingerprint.add_node(node)
+        for connection in connections:
+            fingerprint.add_connection(connection)
+        return fingerprint
+
+    # repr() échappe les caractères non imprimables (surrogates compris) :
+    # l'encodage UTF-8 ne peut pas échouer
+    def add_node(self, node):
+        relevant = (node.get('text'), node.get('type'), node.get('size', DEFAULT_SIZE), node.get('color', DEFAULT_COLOR))
+        self._nodes.update(repr(relevant).encode('utf-8') + b'\n')
+
+    def add_connection(self, connection):
+        self._connections.update(repr(connection.get('type')).encode('utf-8') + b'\n')
+
+    def hexdigest(self):
+        digest = hashlib.blake2b(str(self.version).encode('ascii'), digest_size=16)
+        digest.update(self._nodes.digest())
+        digest.update(self._connections.digest())
+        return digest.hexdigest()
+
+
+# ==============================================================================
+# PROFILS DE SCORE
+# ==============================================================================
+
+FEATURES = ('node_count', 'group_count', 'unique_words', 'non_ascii_chars',
+            'visual_nodes', 'connection_count', 'arrow_count', 'double_count',
+            'distinct_sizes', 'distinct_colors')
+
+# Chaque backend a historiquement ses propres coefficients et noms de clés.
+# Toute modification d'un profil doit incrémenter sa version : elle entre
+# dans l'empreinte des scores persistés, qui sont alors recalculés.
+PROFILES = {
+    'mini': {                   # app.py
+        'version': 1,
+        'nonverbal_key': 'nonverbal',
+        'grouped': 25,
+        'reflective': 3,
+        'interconnected': 60,
+        'nonverbal': 15,
+        'nonverbal_feature': 'non_ascii_chars',
+        'count_double': False,
+        'size_weight': 10,
+        'color_weight': 10
+    },
+    'master': {                 # flask-backend.py
+        'version': 1,
+        'nonverbal_key': 'non_verbal',
+        'grouped': 25,
+        'reflective': 5,
+        'interconnected': 50,
+        'nonverbal': 20,
+        'nonverbal_feature': 'visual_nodes',
+        'count_double': True,
+        'size_weight': 15,
+        'color_weight': 15
+    }
+}
+
+SUBSCORES = ('grouped', 'reflective', 'interconnected', 'nonverbal', 'directional', 'emphasized')
+
+
+def score(tally, profile='mini'):
+    """Score GRINDE d'une carte à partir de ses comptages"""
+    return score_features([tally.features()], profile)[0]
+
+
+def _score_row(row, p):
+    """Score d'un vecteur de caractéristiques, en Python pur"""
+    f = dict(zip(FEATURES, row))
+    nodes, connections = f['node_count'], f['connection_count']
+    directional = f['arrow_count'] + (f['double_count'] if p['count_double'] else 0)
+
+    values = {
+        'grouped': min(100, f['group_count'] * p['grouped']),
+        'reflective': min(100, f['unique_words'] * p['reflective']),
+        'interconnected': min(100, int(connections / (nodes - 1) * p['interconnected'])) if nodes > 1 else 0,
+        'nonverbal': min(100, f[p['nonverbal_feature']] * p['nonverbal']),
+        'directional': int((directional / connections) * 100) if connections else 0,
+        'emphasized': min(100, f['distinct_sizes'] * p['size_weight'] + f['distinct_colors'] * p['color_weight'])
+    }
+    return values
+
+
+def score_features(rows, profile='mini'):
+    """Scores GRINDE de plusieurs cartes, vectorisés avec NumPy si disponible"""
+    p = PROFILES[profile]
+    if not rows:
+        return []
+
+    if np is None:
+        columns = [_score_row(row, p) for row in rows]
+        columns = {k: [c[k] for c in columns] for k in SUBSCORES}
+    else:
+        f = np.asarray(rows, dtype=np.int64).reshape(len(rows), len(FEATURES))
+        col = {name: f[:, i] for i, name in enumerate(FEATURES)}
+        nodes, connections = col['node_count'], col['connection_count']
+        directional = col['arrow_count'] + (col['double_count'] if p['count_double'] else 0)
+
+        ratio = np.divide(connections, nodes - 1, out=np.zeros(len(f)), where=nodes > 1)
+        share = np.divide(directional, connections, out=np.zeros(len(f)), where=connections > 0)
+
+        columns = {
+            'grouped': np.minimum(100, col['group_count'] * p['grouped']),
+            'reflective': np.minimum(100, col['unique_words'] * p['reflective']),
+            'interconnected': np.where(nodes > 1, np.minimum(100, np.floor(ratio * p['interconnected'])), 0),
+            'nonverbal': np.minimum(100, col[p['nonverbal_feature']] * p['nonverbal']),
+            'directional': np.floor(share * 100),
+            'emphasized': np.minimum(100, col['distinct_sizes'] * p['size_weight']
+                                     + col['distinct_colors'] * p['color_weight'])
+        }
+        columns = {k: v.astype(np.int64).tolist() for k, v in columns.items()}
+
+    totals = [sum(values) // 6 for values in zip(*(columns[k] for k in SUBSCORES))]
+    scores = []
+    for i, total in enumerate(totals):
+        result = {k: columns[k][i] for k in SUBSCORES}
+        result[p['nonverbal_key']] = result.pop('nonverbal')
+        result['total'] = total
+        scores.append(result)
+    return scores
+
+
+# ==============================================================================
+# CORPUS DE CARTES
+# ==============================================================================
+
+def map_features(data):
+    """Caractéristiques GRINDE d'une carte complète (un seul parcours)"""
+    return GrindeTally.from_map(data.get('nodes', []), data.get('connections', [])).features()
+
+
+def load_features(path):
+    """Lire un fichier de carte et en extraire (mode, caractéristiques)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data.get('mode', 'grinde'), map_features(data)
+
+
+def iter_file_features(paths, processes=None, chunksize=32):
+    """(chemin, mode, caractéristiques) de chaque carte, en parallèle si processes > 1"""
+    paths = list(paths)
+    if processes and processes > 1 and len(paths) > chunksize:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = pool.map(load_features, paths, chunksize=chunksize)
+            for path, result in zip(paths, results):
+                if result:
+                    yield (path,) + result
+    else:
+        for path in paths:
+            result = load_features(path)
+            if result:
+                yield (path,) + result
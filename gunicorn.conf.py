@@ -0,0 +1,28 @@
+# gunicorn.conf.py - Configuration de production pour MindMap Master (flask-backend.py)
+#
+# Lancement :
+#   SOCKETIO_ASYNC_MODE=eventlet gunicorn -c gunicorn.conf.py 'flask-backend:app'
+#
+# Socket.IO exige des sessions collantes : n'augmenter WEB_WORKERS qu'avec
+# SOCKETIO_MESSAGE_QUEUE (redis://...) et un load balancer "sticky".
+
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}"
+worker_class = os.environ.get('SOCKETIO_ASYNC_MODE') or 'eventlet'
+workers = int(os.environ.get('WEB_WORKERS', 1))
+
+# Nombre maximal de connexions simultanées par worker : les sockets de
+# collaboration (refusés au-delà de SOCKETIO_MAX_CONNECTIONS) plus une marge
+# pour les requêtes REST, sans quoi les sockets épuiseraient le worker
+_max_sockets = int(os.environ.get('SOCKETIO_MAX_CONNECTIONS', 0))
+worker_connections = max(1000, _max_sockets + int(os.environ.get('HTTP_POOL_HEADROOM', 100)))
+
+# Les websockets sont des requêtes longues : pas de timeout de worker,
+# mais un délai d'arrêt laissant aux clients le temps d'être prévenus
+timeout = 0
+graceful_timeout = int(os.environ.get('SHUTDOWN_GRACE_PERIOD', 5)) + 5
+
+accesslog = None
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
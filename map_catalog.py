@@ -0,0 +1,486 @@
+# map_catalog.py - Catalogue des cartes (résumés, index triés, agrégats) partagé par app.py et l'installeur
+
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import grinde
+import map_stream
+
+# Version des scores GRINDE stockés : un catalogue d'une autre version est reconstruit
+GRINDE_SCORE_VERSION = grinde.PROFILES['mini']['version']
+
+# ==============================================================================
+# RÉSUMÉS DES CARTES
+# ==============================================================================
+
+def header_text(value, default=''):
+    """Champ texte d'en-tête : les nombres sont écrits, les autres valeurs remplacées par `default`"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return default
+
+def summarize_header(map_id, header, node_count, connection_count):
+    """Résumé construit à partir des seuls champs d'en-tête d'une carte"""
+    # Les fichiers peuvent être modifiés à la main : les champs triés ou
+    # comparés (titre, dates) sont toujours des chaînes, un titre absent
+    # reste None (titre par défaut traduit à l'affichage)
+    metadata = header.get('metadata')
+    if not isinstance(metadata, dict):
+        metadata = {}
+    return {
+        'id': map_id,
+        'title': header_text(header.get('title'), None),
+        'mode': header_text(header.get('mode'), 'grinde'),
+        'created': header_text(header.get('created')),
+        'modified': header_text(header.get('modified')),
+        'nodeCount': node_count,
+        'connectionCount': connection_count,
+        'preview': header_text(header.get('preview')),
+        'language': header_text(metadata.get('language'), 'fr'),
+        'grindeScore': None
+    }
+
+def persisted_score(data, fingerprint):
+    """Score GRINDE enregistré avec la carte, s'il correspond encore à son contenu"""
+    metadata = data.get('metadata')
+    persisted = metadata.get('grinde') if isinstance(metadata, dict) else None
+    if isinstance(persisted, dict) and persisted.get('hash') == fingerprint:
+        return persisted['score']
+    return None
+
+def summaries_from_headers(headers, cached_score=persisted_score, remember_score=None):
+    """Résumés de cartes lues en flux, scores GRINDE manquants calculés en un seul lot"""
+    summaries = []
+    pending = []  # cartes GRINDE dont le score doit être calculé
+    for map_id, header in headers:
+        summary = summarize_header(map_id, header, header['nodeCount'], header['connectionCount'])
+        summaries.append(summary)
+        
+        # Score GRINDE persisté ou mémorisé, sinon calculé en lot ci-dessous
+        if header.get('mode') == 'grinde' and header.get('grinde'):
+            fingerprint = header['grinde']['hash']
+            summary['grindeScore'] = cached_score(header, fingerprint)
+            if summary['grindeScore'] is None:
+                pending.append((summary, fingerprint, header['grinde']['features']))
+    
+    scores = grinde.score_features([features for _, _, features in pending], 'mini')
+    for (summary, fingerprint, _), score in zip(pending, scores):
+        summary['grindeScore'] = score
+        if remember_score:
+            remember_score(fingerprint, score)
+    return summaries
+
+def progress_printer(label):
+    """Callback de progression (fait, total) affichant l'avancement par paliers de 10 %"""
+    last = {'step': None}
+    
+    def report(done, total):
+        step = done * 10 // total if total else 10
+        if step != last['step']:
+            last['step'] = step
+            print(f"   {label} : {done}/{total} ({step * 10}%)")
+    return report
+
+# ==============================================================================
+# CATALOGUE
+# ==============================================================================
+
+class MapCatalog:
+    """Résumés de toutes les cartes et agrégats globaux, tenus à jour à chaque écriture"""
+    # Les statistiques se lisent en O(1) ; le fichier .catalog.json évite de
+    # relire toutes les cartes au démarrage et une réconciliation périodique
+    # rattrape les fichiers modifiés hors de l'application. app.py le
+    # complète (titres traduits, vignettes, scores mémorisés) ; l'installeur
+    # l'utilise tel quel pour reconstruire le catalogue sans charger Flask.
+    
+    FORMAT_VERSION = 1
+    BATCH_SIZE = 512  # résumés intégrés à la fois lors d'une réconciliation
+    TOMBSTONE_DAYS = 90  # durée de conservation des suppressions pour les exports incrémentaux
+    
+    # Index triés maintenus pour la pagination de /api/maps
+    SORT_KEYS = {
+        'modified': lambda e: e['modified'],
+        'title': lambda e: (e['title'] or '').lower(),
+        'nodeCount': lambda e: e['nodeCount'],
+        'grindeScore': lambda e: e['grindeScore'].get('total', 0) if e.get('grindeScore') else -1
+    }
+    DEFAULT_ORDER = {'modified': 'desc', 'title': 'asc', 'nodeCount': 'desc', 'grindeScore': 'desc'}
+    
+    def __init__(self, folder, path):
+        self.folder = folder
+        self.path = path
+        self.lock = threading.RLock()
+        self.entries = {}       # map_id -> résumé (+ '_mtime' du fichier, '_changed' vu par le catalogue)
+        self.indexes = {name: [] for name in self.SORT_KEYS}  # (clé de tri, map_id) triés
+        self.tombstones = {}    # map_id -> date de suppression (ns)
+        # Les changements antérieurs à cette date (ns) ne sont pas tous
+        # connus : un export incrémental plus ancien devient un export complet
+        self.horizon = time.time_ns()
+        self.totals = {}
+        self.modes = Counter()
+        self.loaded = False
+        self.dirty = False
+        self.sync_thread = None
+        # Révision incrémentée à chaque changement : ETag de /api/maps sans
+        # parcourir le dossier. L'identifiant d'instance évite de confondre
+        # les révisions d'un processus précédent
+        self.instance = uuid.uuid4().hex
+        self.revision = 0
+        self.changed_at = time.time()
+        self._reset_totals()
+    
+    def _touch(self):
+        self.revision += 1
+        self.changed_at = time.time()
+    
+    def _reset_totals(self):
+        self.totals = {'maps': 0, 'nodes': 0, 'connections': 0, 'grindeScored': 0, 'grindeScoreSum': 0}
+        self.modes = Counter()
+    
+    def _contribution(self, entry):
+        """Clés d'index et valeurs agrégées d'une entrée, vérifiées avant toute modification"""
+        # Une entrée invalide (fichier ou catalogue modifié à la main) lève
+        # une exception ici, sans laisser le catalogue à moitié mis à jour
+        score = entry.get('grindeScore')
+        total = score.get('total', 0) if score else 0
+        if not (isinstance(entry['nodeCount'], int) and isinstance(entry['connectionCount'], int)
+                and isinstance(entry['mode'], str) and isinstance(entry['modified'], str)
+                and isinstance(total, (int, float))):
+            raise ValueError(f"invalid catalog entry for {entry['id']!r}")
+        keys = {name: (sort_key(entry), entry['id']) for name, sort_key in self.SORT_KEYS.items()}
+        return keys, entry['nodeCount'], entry['connectionCount'], entry['mode'], total if score else None
+    
+    def _account(self, entry, sign, contribution=None):
+        """Ajouter (+1) ou retirer (-1) une carte des agrégats"""
+        keys, nodes, connections, mode, score = contribution or self._contribution(entry)
+        self.totals['maps'] += sign
+        self.totals['nodes'] += sign * nodes
+        self.totals['connections'] += sign * connections
+        self.modes[mode] += sign
+        if score is not None:
+            self.totals['grindeScored'] += sign
+            self.totals['grindeScoreSum'] += sign * score
+        
+        for name, key in keys.items():
+            index = self.indexes[name]
+            if sign > 0:
+                bisect.insort(index, key)
+            else:
+                position = bisect.bisect_left(index, key)
+                if position < len(index) and index[position] == key:
+                    del index[position]
+    
+    def _put(self, entry):
+        with self.lock:
+            contribution = self._contribution(entry)
+            previous = self.entries.get(entry['id'])
+            if previous:
+                self._account(previous, -1)
+            entry['_changed'] = time.time_ns()
+            self.tombstones.pop(entry['id'], None)
+            self.entries[entry['id']] = entry
+            self._account(entry, +1, contribution)
+            self.dirty = True
+            self._touch()
+    
+    # -- Crochets appelés par la couche de stockage --------------------------
+    
+    def upsert_many(self, entries):
+        """Enregistrer en une seule fois des entrées construites par entry_for (import en lot)"""
+        with self.lock:
+            for entry in entries:
+                self._put(entry)
+    
+    def discard(self, map_id):
+        """Retirer une carte supprimée"""
+        with self.lock:
+            entry = self.entries.pop(map_id, None)
+            if entry:
+                self._account(entry, -1)
+                self.tombstones[map_id] = time.time_ns()
+                self.dirty = True
+                self._touch()
+    
+    # -- Persistance et réconciliation ---------------------------------------
+    
+    def ensure_loaded(self, workers=None, progress=None):
+        """Charger le catalogue persisté et le réconcilier avec le dossier (une seule fois)"""
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            self.load()
+            self.reconcile(workers, progress)
+            self.loaded = True
+    
+    def ensure_started(self, workers=None, interval=None, progress=None):
+        """Charger, écrire et synchroniser le catalogue une seule fois par processus"""
+        # Appelé au premier usage plutôt qu'au lancement du script : le
+        # catalogue est aussi persisté et réconcilié sous un serveur WSGI, et
+        # chaque worker démarre son propre thread après le fork
+        if self.sync_thread is not None:
+            return
+        with self.lock:
+            if self.sync_thread is not None:
+                return
+            self.ensure_loaded(workers, progress)
+            self.flush()
+            self.sync_thread = self.start_sync(interval)
+    
+    def rebuild(self, workers=None, progress=None):
+        """Reconstruire entièrement le catalogue en relisant toutes les cartes"""
+        with self.lock:
+            self.entries = {}
+            self.indexes = {name: [] for name in self.SORT_KEYS}
+            self._reset_totals()
+            # Les cartes disparues depuis la dernière réconciliation ne laissent pas de trace
+            self.horizon = time.time_ns()
+            self.dirty = True
+            self._touch()
+            changed = self.reconcile(workers, progress)
+            self.loaded = True
+        return changed
+    
+    def load(self):
+        """Relire le catalogue persisté, s'il est présent et compatible"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if stored.get('version') != self.FORMAT_VERSION or stored.get('grinde') != GRINDE_SCORE_VERSION:
+            return
+        with self.lock:
+            self.entries = {}
+            self.indexes = {name: [] for name in self.SORT_KEYS}
+            self._reset_totals()
+            for entry in stored.get('entries', []):
+                # Entrée modifiée à la main : ignorée, la réconciliation relit la carte
+                try:
+                    contribution = self._contribution(entry)
+                except Exception as e:
+                    print(f"Entrée du catalogue ignorée: {type(e).__name__}: {e}")
+                    continue
+                self.entries[entry['id']] = entry
+                self._account(entry, +1, contribution)
+            self.tombstones = stored.get('tombstones', {})
+            # Catalogue écrit avant le suivi des suppressions : historique inconnu
+            self.horizon = stored.get('horizon', time.time_ns())
+            self._touch()
+    
+    def reconcile(self, workers=None, progress=None):
+        """Rattraper les cartes ajoutées, modifiées ou supprimées hors de l'application"""
+        # Instantané pris avant le parcours : une carte écrite entre-temps
+        # ne peut pas être prise pour une carte supprimée
+        with self.lock:
+            known = {map_id: entry.get('_mtime') for map_id, entry in self.entries.items()}
+        
+        on_disk = {}
+        if os.path.exists(self.folder):
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith('.json') and not entry.name.startswith('.'):
+                    try:
+                        on_disk[entry.name[:-5]] = (entry.path, entry.stat().st_mtime_ns)
+                    except OSError:
+                        continue
+        
+        changed = 0
+        for map_id in set(known) - set(on_disk):
+            self.discard(map_id)
+            changed += 1
+        
+        # Cartes nouvelles ou modifiées : lues sur `workers` processus et
+        # intégrées par lots (scores GRINDE manquants calculés par lot)
+        stale = {filepath: (map_id, mtime) for map_id, (filepath, mtime) in on_disk.items()
+                 if known.get(map_id) != mtime}
+        headers, done = [], 0
+        for filepath, header, error in map_stream.iter_headers(stale, processes=workers):
+            done += 1
+            if error:
+                print(f"Erreur lecture {filepath}: {error}")
+            else:
+                headers.append((stale[filepath][0], header))
+            if len(headers) >= self.BATCH_SIZE or done == len(stale):
+                for summary in self.summaries(headers):
+                    # Une carte illisible est signalée et ignorée, sans bloquer les autres
+                    try:
+                        summary['_mtime'] = on_disk[summary['id']][1]
+                        self._put(summary)
+                    except Exception as e:
+                        print(f"Erreur catalogue {summary.get('id')}: {type(e).__name__}: {e}")
+                        continue
+                    changed += 1
+                headers = []
+            if progress:
+                progress(done, len(stale))
+        return changed
+    
+    def flush(self):
+        """Écrire le catalogue sur disque s'il a changé (remplacement atomique)"""
+        with self.lock:
+            if not self.dirty:
+                return False
+            self._prune_tombstones()
+            stored = {
+                'version': self.FORMAT_VERSION,
+                'grinde': GRINDE_SCORE_VERSION,
+                'entries': list(self.entries.values()),
+                'tombstones': dict(self.tombstones),
+                'horizon': self.horizon
+            }
+            self.dirty = False
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(stored, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Erreur écriture du catalogue: {e}")
+            self.dirty = True
+            return False
+        return True
+    
+    def _prune_tombstones(self):
+        """Oublier les suppressions plus anciennes que TOMBSTONE_DAYS"""
+        cutoff = time.time_ns() - self.TOMBSTONE_DAYS * 86400 * 10**9
+        expired = [map_id for map_id, deleted in self.tombstones.items() if deleted < cutoff]
+        for map_id in expired:
+            self.horizon = max(self.horizon, self.tombstones.pop(map_id) + 1)
+    
+    def start_sync(self, interval):
+        """Thread de fond : réconciliation puis écriture toutes les `interval` secondes"""
+        def sync():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reconcile()
+                    self.flush()
+                except Exception as e:
+                    print(f"Erreur synchronisation du catalogue: {e}")
+        
+        thread = threading.Thread(target=sync, name='map-catalog-sync', daemon=True)
+        thread.start()
+        return thread
+    
+    # -- Lectures ------------------------------------------------------------
+    
+    def recent(self, count=5, language='fr'):
+        """Résumés des `count` cartes modifiées le plus récemment"""
+        with self.lock:
+            keys = self.indexes['modified'][-count:][::-1] if count else []
+            return [self.public(self.entries[map_id], language) for _, map_id in keys]
+    
+    def validators(self, salt=''):
+        """ETag et Last-Modified des listes de cartes, dérivés de la révision du catalogue"""
+        with self.lock:
+            revision, changed_at = self.revision, self.changed_at
+        etag = hashlib.sha1(f"{salt}:{self.instance}:{revision}".encode()).hexdigest()
+        return etag, datetime.fromtimestamp(changed_at, timezone.utc)
+    
+    def page(self, sort='modified', order=None, limit=50, cursor=None, mode=None,
+             map_language=None, date_from=None, date_to=None, language='fr'):
+        """Une page de résumés triés et filtrés, et le curseur de la page suivante"""
+        # Parcours d'un index trié à partir du curseur : le coût dépend de la
+        # taille de la page (et des cartes écartées par les filtres), pas du
+        # nombre total de cartes. limit=None : toutes les cartes retenues.
+        # Les bornes de date sont des dates ISO normalisées (parse_date_bound)
+        self.ensure_loaded()
+        order = order or self.DEFAULT_ORDER[sort]
+        
+        def matches(entry):
+            return ((not mode or entry['mode'] == mode)
+                    and (not map_language or entry['language'] == map_language)
+                    and (not date_from or entry['modified'] >= date_from)
+                    and (not date_to or entry['modified'] <= date_to))
+        
+        with self.lock:
+            index = self.indexes[sort]
+            if order == 'asc':
+                start = bisect.bisect_right(index, cursor) if cursor else 0
+                positions = range(start, len(index))
+            else:
+                start = bisect.bisect_left(index, cursor) if cursor else len(index)
+                positions = range(start - 1, -1, -1)
+            
+            results, last = [], None
+            for position in positions:
+                key = index[position]
+                # Index par date : inutile de continuer au-delà de la borne
+                if sort == 'modified' and ((order == 'desc' and date_from and key[0] < date_from)
+                                           or (order == 'asc' and date_to and key[0] > date_to)):
+                    last = None
+                    break
+                entry = self.entries[key[1]]
+                if matches(entry):
+                    if len(results) == limit:
+                        break
+                    results.append(self.public(entry, language))
+                    last = key
+            else:
+                last = None
+            total = len(index)
+        
+        return results, last, total
+    
+    def changes(self, since=None, mode=None, date_from=None, date_to=None):
+        """Cartes modifiées et supprimées depuis `since` (ns), avec le curseur de la synchronisation suivante"""
+        # Sans `since`, ou si l'historique des suppressions ne remonte pas
+        # assez loin, toutes les cartes sont sélectionnées (export complet)
+        self.ensure_loaded()
+        if since is not None:
+            # Fichiers modifiés hors de l'application depuis la dernière synchronisation
+            self.reconcile()
+        
+        with self.lock:
+            cursor = time.time_ns()
+            full = since is None or since < self.horizon
+            updated = sorted(
+                map_id for map_id, entry in self.entries.items()
+                if (full or entry.get('_changed', 0) >= since)
+                and (not mode or entry['mode'] == mode)
+                and (not date_from or entry['modified'] >= date_from)
+                and (not date_to or entry['modified'] <= date_to)
+            )
+            deleted = [] if full else sorted(
+                map_id for map_id, when in self.tombstones.items() if when >= since
+            )
+        return {'updated': updated, 'deleted': deleted, 'cursor': cursor, 'full': full}
+    
+    def summaries(self, headers):
+        """Résumés des cartes relues lors d'une réconciliation"""
+        return summaries_from_headers(headers)
+    
+    def public(self, entry, language='fr'):
+        """Résumé exposé (sans les champs internes)"""
+        return {key: value for key, value in entry.items() if not key.startswith('_')}
+    
+    def stats(self, language='fr'):
+        """Statistiques globales, sans parcourir les cartes"""
+        self.ensure_loaded()
+        with self.lock:
+            totals = dict(self.totals)
+            grinde_count = self.modes.get('grinde', 0)
+            buzan_count = self.modes.get('buzan', 0)
+        
+        avg_grinde_score = totals['grindeScoreSum'] / totals['grindeScored'] if totals['grindeScored'] else 0
+        return {
+            'totalMaps': totals['maps'],
+            'totalNodes': totals['nodes'],
+            'totalConnections': totals['connections'],
+            'grindeCount': grinde_count,
+            'buzanCount': buzan_count,
+            'avgGrindeScore': round(avg_grinde_score, 1),
+            'recentMaps': self.recent(5, language),
+            'mostUsedMode': 'grinde' if grinde_count >= buzan_count else 'buzan',
+            'avgNodesPerMap': round(totals['nodes'] / totals['maps'], 1) if totals['maps'] else 0
+        }
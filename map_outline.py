@@ -0,0 +1,156 @@
+# map_outline.py - Plan hiérarchique d'une carte, construit à partir de ses connexions
+
+from xml.sax.saxutils import escape, quoteattr
+
+# Préfixe des renvois vers un nœud déjà placé ailleurs dans le plan
+REFERENCE_MARK = '↪'
+
+
+# Types d'identifiants acceptés (les autres valeurs sont ignorées)
+KEY_TYPES = (str, int)
+
+
+def adjacency(nodes, connections):
+    """Nœuds indexés par id et voisins de chacun : (id voisin, n° de connexion, sortante ?)"""
+    index = {}
+    for node in nodes:
+        if isinstance(node, dict) and type(node.get('id')) in KEY_TYPES:
+            index.setdefault(node['id'], node)
+
+    neighbours = {node_id: [] for node_id in index}
+    for position, connection in enumerate(connections):
+        if not isinstance(connection, dict):
+            continue
+        source, target = connection.get('source'), connection.get('target')
+        if type(source) not in KEY_TYPES or type(target) not in KEY_TYPES or source == target:
+            continue
+        if source in index and target in index:
+            neighbours[source].append((target, position, True))
+            neighbours[target].append((source, position, False))
+    return index, neighbours
+
+
+def build_outline(nodes, connections):
+    """Entrées (profondeur, nœud, renvoi ?) rattachées au nœud central, puis celles des îlots détachés"""
+    # Chaque nœud est placé une seule fois, au niveau de sa distance au
+    # nœud central (parcours en largeur, quel que soit le sens des
+    # connexions), puis le plan est émis en préordre sans récursion :
+    # O(V + E) au total. Une connexion vers un nœud déjà placé (cycle,
+    # nœud partagé d'un DAG) devient un renvoi sous sa source.
+    index, neighbours = adjacency(nodes, connections)
+    parent_edge = {}    # nœud -> n° de la connexion par laquelle il a été placé
+    tree_edges = set()
+
+    def walk(root, entries):
+        parent_edge[root] = None
+        level = [root]
+        while level:
+            discovered = []
+            for node_id in level:
+                for neighbour, position, _ in neighbours[node_id]:
+                    if neighbour not in parent_edge:
+                        parent_edge[neighbour] = position
+                        tree_edges.add(position)
+                        discovered.append(neighbour)
+            level = discovered
+
+        entries.append((0, index[root], False))
+        stack = [(0, iter(neighbours[root]))]
+        while stack:
+            depth, pending = stack[-1]
+            for neighbour, position, outgoing in pending:
+                if parent_edge[neighbour] == position:
+                    entries.append((depth + 1, index[neighbour], False))
+                    stack.append((depth + 1, iter(neighbours[neighbour])))
+                    break
+                if outgoing and position not in tree_edges:
+                    entries.append((depth + 1, index[neighbour], True))
+            else:
+                stack.pop()
+
+    roots = [node_id for node_id, node in index.items() if node.get('type') == 'central'] or list(index)[:1]
+    attached = []
+    for root in roots:
+        if root not in parent_edge:
+            walk(root, attached)
+
+    # Nœuds orphelins et composantes sans lien avec le nœud central
+    detached = []
+    for node_id in index:
+        if node_id not in parent_edge:
+            walk(node_id, detached)
+    return attached, detached
+
+
+def label(node):
+    """Texte d'un nœud sur une seule ligne"""
+    return ' '.join(str(node.get('text') or '').split()) or '…'
+
+
+def _entry_label(node, reference):
+    return f'{REFERENCE_MARK} {label(node)}' if reference else label(node)
+
+
+# ==============================================================================
+# RENDUS
+# ==============================================================================
+
+def iter_markdown(title, attached, detached, detached_label):
+    """Plan en listes Markdown imbriquées"""
+    yield f"# {title}\n\n"
+    for depth, node, reference in attached:
+        yield f"{'  ' * depth}- {_entry_label(node, reference)}\n"
+    if detached:
+        yield f"\n## {detached_label}\n\n"
+        for depth, node, reference in detached:
+            yield f"{'  ' * depth}- {_entry_label(node, reference)}\n"
+
+
+def iter_text(title, attached, detached, detached_label):
+    """Plan en texte indenté"""
+    yield f"{title}\n{'=' * len(title)}\n\n"
+    for depth, node, reference in attached:
+        yield f"{'    ' * depth}{_entry_label(node, reference)}\n"
+    if detached:
+        yield f"\n{detached_label}\n{'-' * len(detached_label)}\n"
+        for depth, node, reference in detached:
+            yield f"{'    ' * depth}{_entry_label(node, reference)}\n"
+
+
+def iter_opml(title, attached, detached, detached_label):
+    """Plan au format OPML 2.0 (éléments <outline> imbriqués)"""
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n<opml version="2.0">\n'
+           f'  <head>\n    <title>{escape(title)}</title>\n  </head>\n  <body>\n')
+
+    rows = [(depth, _entry_label(node, reference)) for depth, node, reference in attached]
+    if detached:
+        rows.append((0, detached_label))
+        rows.extend((depth + 1, _entry_label(node, reference)) for depth, node, reference in detached)
+    rows.append((-1, None))  # sentinelle : ferme tous les éléments ouverts
+
+    # Un élément n'est ouvert que si l'entrée suivante est plus profonde
+    opened = []
+    for (depth, text), (next_depth, _) in zip(rows, rows[1:]):
+        indent = '  ' * (depth + 2)
+        if next_depth > depth:
+            yield f'{indent}<outline text={quoteattr(text)}>\n'
+            opened.append(depth)
+        else:
+            yield f'{indent}<outline text={quoteattr(text)}/>\n'
+        while opened and opened[-1] >= next_depth:
+            yield f"{'  ' * (opened.pop() + 2)}</outline>\n"
+    yield '  </body>\n</opml>\n'
+
+
+# Formats d'export : nom -> (rendu, type MIME, extension)
+FORMATS = {
+    'outline': (iter_markdown, 'text/markdown', 'md'),
+    'outline-text': (iter_text, 'text/plain', 'txt'),
+    'opml': (iter_opml, 'text/x-opml', 'opml')
+}
+
+
+def iter_outline(style, title, nodes, connections, detached_label):
+    """Morceaux successifs du plan d'une carte dans le format demandé"""
+    attached, detached = build_outline(nodes, connections)
+    return FORMATS[style][0](title, attached, detached, detached_label)
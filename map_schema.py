@@ -0,0 +1,210 @@
+# map_schema.py - Validation et normalisation des cartes reçues par app.py et flask-backend.py
+
+import math
+import uuid
+
+MODES = ('grinde', 'buzan')
+DEFAULT_MODE = 'grinde'
+
+# Types d'identifiants acceptés tels quels (bool est exclu explicitement)
+KEY_TYPES = (str, int)
+
+_DROP = object()  # valeur invalide : le champ est retiré, les lecteurs appliquent leur défaut
+
+
+class SchemaError(ValueError):
+    """Carte inutilisable, même après normalisation"""
+
+
+# ==============================================================================
+# CONVERSIONS DE CHAMPS
+# ==============================================================================
+
+def _number(value, pool):
+    """Nombre fini ; les chaînes numériques ("12.5") sont converties"""
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return _DROP
+        if value.is_integer():
+            value = int(value)
+    elif type(value) not in (int, float):
+        return _DROP
+    if isinstance(value, float) and not math.isfinite(value):
+        return _DROP
+    return value
+
+
+def _text(value, pool):
+    """Texte ; les nombres sont écrits, None devient une chaîne vide"""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)):
+        return str(value)
+    return _DROP
+
+
+def _symbol(value, pool):
+    """Valeur répétée d'un nœud à l'autre (type, couleur, forme) : une seule chaîne par carte"""
+    if isinstance(value, str):
+        return pool.setdefault(value, value)
+    return _DROP
+
+
+def _reference(value, pool):
+    """Extrémité de connexion : un id, ou un nœud sérialisé {'id': ...}"""
+    if isinstance(value, dict):
+        value = value.get('id')
+    return value if type(value) in KEY_TYPES else _DROP
+
+
+# Tables compilées une seule fois : (champ, types acceptés sans conversion,
+# conversion). Les autres champs (images, dates, champs propres à un
+# client) sont conservés tels quels.
+_INTEGER = (int,)   # un float doit être vérifié (NaN, infini)
+_STRING = (str,)
+_SHARED = ()        # toujours converti : partage de la chaîne
+
+NODE_FIELDS = (
+    ('text', _STRING, _text),
+    ('x', _INTEGER, _number),
+    ('y', _INTEGER, _number),
+    ('size', _INTEGER, _number),
+    ('shapeWidth', _INTEGER, _number),
+    ('shapeHeight', _INTEGER, _number),
+    ('type', _SHARED, _symbol),
+    ('shape', _SHARED, _symbol),
+    ('color', _SHARED, _symbol)
+)
+
+CONNECTION_FIELDS = (
+    ('source', KEY_TYPES, _reference),
+    ('target', KEY_TYPES, _reference),
+    ('type', _SHARED, _symbol),
+    ('color', _SHARED, _symbol),
+    ('text', _STRING, _text)
+)
+
+
+def _coerce(item, fields, pool):
+    """Convertir sur place les champs connus d'un élément ; nombre de champs corrigés"""
+    fixed = 0
+    for key, accepted, convert in fields:
+        if key in item:
+            value = item[key]
+            if type(value) in accepted:
+                continue
+            converted = convert(value, pool)
+            if converted is _DROP:
+                del item[key]
+                fixed += 1
+            elif converted is not value:
+                item[key] = converted
+                if type(converted) is not type(value) or converted != value:
+                    fixed += 1
+    return fixed
+
+
+def _unique_id(value, seen):
+    """Identifiant libre : `value` s'il n'est pas encore pris, sinon `value_2`, `value_3`..."""
+    if value not in seen:
+        return value
+    suffix = 2
+    while f"{value}_{suffix}" in seen:
+        suffix += 1
+    return f"{value}_{suffix}"
+
+
+# ==============================================================================
+# CARTES
+# ==============================================================================
+
+def normalize_map(data, node_ids=None):
+    """Normaliser une carte sur place et renvoyer le décompte des corrections"""
+    # Un seul passage sur les nœuds puis un sur les connexions, O(V + E) :
+    # types convertis, ids manquants créés et doublons renommés, connexions
+    # vers un nœud inconnu retirées, valeurs répétées partagées. Les champs
+    # absents le restent, ce qui permet de normaliser une mise à jour
+    # partielle ; `node_ids` donne alors les nœuds existants si la mise à
+    # jour ne contient que des connexions.
+    if not isinstance(data, dict):
+        raise SchemaError('Not a map object')
+    report = {'fields': 0, 'renamedIds': 0, 'droppedNodes': 0, 'droppedConnections': 0}
+    pool = {}
+
+    for key in ('title', 'mode'):
+        value = data.get(key)
+        if value is not None and not isinstance(value, str):
+            if not isinstance(value, (int, float)):
+                raise SchemaError(f"'{key}' must be a string")
+            data[key] = str(value)
+            report['fields'] += 1
+    if 'mode' in data and data['mode'] not in MODES:
+        data['mode'] = DEFAULT_MODE
+        report['fields'] += 1
+    if 'metadata' in data and not isinstance(data['metadata'], dict):
+        data['metadata'] = {}
+        report['fields'] += 1
+    if 'tags' in data:
+        tags = data['tags'] if isinstance(data['tags'], list) else []
+        data['tags'] = [tag if isinstance(tag, str) else str(tag) for tag in tags
+                        if isinstance(tag, (str, int, float))]
+        report['fields'] += data['tags'] != tags
+
+    for key in ('nodes', 'connections'):
+        if key in data and not isinstance(data[key], list):
+            if data[key] is not None:
+                raise SchemaError(f"'{key}' must be a list")
+            data[key] = []
+
+    if 'nodes' in data:
+        nodes, seen = [], set()
+        for node in data['nodes']:
+            if not isinstance(node, dict):
+                report['droppedNodes'] += 1
+                continue
+            report['fields'] += _coerce(node, NODE_FIELDS, pool)
+            node_id = node.get('id')
+            if type(node_id) not in KEY_TYPES:
+                node['id'] = str(uuid.uuid4())
+                report['renamedIds'] += 1
+            elif node_id in seen:
+                # Les connexions vers cet id restent rattachées au premier nœud
+                node['id'] = _unique_id(node_id, seen)
+                report['renamedIds'] += 1
+            seen.add(node['id'])
+            nodes.append(node)
+        data['nodes'] = nodes
+    else:
+        seen = set(node_ids or ())
+
+    if 'connections' in data:
+        connections, connection_ids = [], set()
+        for connection in data['connections']:
+            if not isinstance(connection, dict):
+                report['droppedConnections'] += 1
+                continue
+            report['fields'] += _coerce(connection, CONNECTION_FIELDS, pool)
+            if connection.get('source') not in seen or connection.get('target') not in seen:
+                report['droppedConnections'] += 1
+                continue
+            if 'id' in connection:
+                connection_id = connection['id']
+                if type(connection_id) not in KEY_TYPES:
+                    connection_id = connection['id'] = str(uuid.uuid4())
+                    report['renamedIds'] += 1
+                elif connection_id in connection_ids:
+                    connection_id = connection['id'] = _unique_id(connection_id, connection_ids)
+                    report['renamedIds'] += 1
+                connection_ids.add(connection_id)
+            connections.append(connection)
+        data['connections'] = connections
+    return report
+
+
+def changed(report):
+    """La normalisation a-t-elle modifié la carte ?"""
+    return any(report.values())
@@ -0,0 +1,361 @@
+# map_stream.py - Lecture en flux des fichiers de cartes (résumés sans charger les nœuds)
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import grinde
+
+CHUNK_SIZE = 64 * 1024
+
+# En dessous de cette taille, json.load (en C) reste plus rapide et sa
+# consommation mémoire négligeable : seuls les gros fichiers sont lus en flux
+STREAM_MIN_SIZE = 1024 * 1024
+
+# Taille maximale (caractères) d'une seule valeur lue par load_map : un
+# nœud avec une image en data URL reste admis, un flux sans fin non
+MAX_VALUE_SIZE = 16 * 1024 * 1024
+
+# Champs de premier niveau repris dans les résumés de cartes
+SUMMARY_FIELDS = ('id', 'title', 'mode', 'created', 'modified', 'preview')
+METADATA_FIELDS = ('language', 'grinde')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'[-+0-9.eE]*')
+_ITEM_END = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+
+
+class JsonStreamError(ValueError):
+    """Document JSON invalide ou tronqué"""
+
+
+class LimitError(ValueError):
+    """Document qui dépasse une limite de lecture (taille d'une valeur, nombre de nœuds...)"""
+
+
+class JsonStream:
+    """Analyseur JSON incrémental lisant le fichier par morceaux"""
+    # Les conteneurs sont parcourus clé par clé / élément par élément ; les
+    # valeurs elles-mêmes sont décodées par le décodeur C de json
+    # (raw_decode), si bien que la mémoire utilisée est bornée par la plus
+    # grande valeur lue et non par la taille du document.
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE, max_value_size=None):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read(self, size):
+        """Ajouter `size` caractères au tampon en oubliant la partie déjà consommée"""
+        if self.eof:
+            return False
+        # La partie non consommée du tampon est la valeur en cours de lecture
+        if self.max_value_size and len(self.buffer) - self.pos > self.max_value_size:
+            raise LimitError(f"Value larger than {self.max_value_size} characters at offset {self.pos}")
+        chunk = self.fp.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Prochain caractère significatif, sans le consommer"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read(self.chunk_size):
+                raise JsonStreamError('Unexpected end of document')
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise JsonStreamError(f"Expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Décoder entièrement la valeur suivante"""
+        if self.peek() in '-0123456789':
+            # Un nombre en fin de tampon peut continuer dans le morceau suivant
+            while _NUMBER.match(self.buffer, self.pos).end() == len(self.buffer) and self._read(self.chunk_size):
+                pass
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise JsonStreamError(str(e))
+            # Valeur incomplète : lecture de taille croissante pour rester linéaire
+            self._read(max(self.chunk_size, len(self.buffer) - self.pos))
+
+    def skip(self):
+        """Passer la valeur suivante ; les tableaux sont sautés élément par élément"""
+        if self.peek() == '[':
+            self.count_items()
+        else:
+            self.value()
+
+    def iter_object(self):
+        """Clés d'un objet ; l'appelant doit consommer chaque valeur (value, skip, iter_*)"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise JsonStreamError(f"Expected a key at offset {self.pos}")
+            self.expect(':')
+            yield key
+            if self._separator('}') == '}':
+                return
+
+    def iter_items(self):
+        """Éléments décodés d'un tableau, un à la fois"""
+        # Chemin rapide : tant que l'élément et son séparateur sont dans le
+        # tampon, un seul appel au scanner C de json et une expression régulière
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        scan = self.decoder.scan_once
+        while True:
+            match = None
+            try:
+                item, end = scan(self.buffer, self.pos)
+                match = _ITEM_END.match(self.buffer, end)
+            except (StopIteration, json.JSONDecodeError):
+                pass
+            if match:
+                self.pos = match.end()
+                closing = match.group(1)
+            else:
+                item = self.value()
+                closing = self._separator(']')
+                if closing == ',':
+                    self.peek()
+            yield item
+            if closing == ']':
+                return
+
+    def count_items(self):
+        """Nombre d'éléments d'un tableau, chacun décodé puis aussitôt oublié"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return 0
+        scan, item_end = self.decoder.scan_once, _ITEM_END.match
+        count = 0
+        while True:
+            count += 1
+            try:
+                match = item_end(self.buffer, scan(self.buffer, self.pos)[1])
+            except (StopIteration, json.JSONDecodeError):
+                match = None
+            if match:
+                self.pos = match.end()
+                closing = match.group(1)
+            else:
+                self.skip()
+                closing = self._separator(']')
+                if closing == ',':
+                    self.peek()
+            if closing == ']':
+                return count
+
+    def _separator(self, closing):
+        char = self.peek()
+        if char != ',' and char != closing:
+            raise JsonStreamError(f"Expected ',' or '{closing}' at offset {self.pos}")
+        self.pos += 1
+        return char
+
+
+def header_first(data):
+    """Copie d'une carte dont les champs d'en-tête précèdent les nœuds et connexions"""
+    # Ordre d'écriture qui permet à read_map_header de connaître le mode et
+    # le score persisté avant de parcourir les tableaux
+    ordered = {key: data[key] for key in SUMMARY_FIELDS + ('metadata',) if key in data}
+    ordered.update(data)
+    return ordered
+
+
+def header_from_map(data, profile='mini'):
+    """Même résultat que read_map_header, pour une carte déjà chargée"""
+    header = {key: data[key] for key in SUMMARY_FIELDS if key in data}
+    metadata = data.get('metadata')
+    metadata = metadata if isinstance(metadata, dict) else {}
+    header['metadata'] = {key: metadata[key] for key in METADATA_FIELDS if key in metadata}
+
+    items = {}
+    for key in ('nodes', 'connections'):
+        values = data.get(key)
+        items[key] = [item for item in values if isinstance(item, dict)] if isinstance(values, list) else []
+        header['nodeCount' if key == 'nodes' else 'connectionCount'] = len(values) if isinstance(values, list) else 0
+
+    header['grinde'] = None
+    if header.get('mode', 'grinde') == 'grinde':
+        digest = grinde.GrindeFingerprint.from_map(items['nodes'], items['connections'],
+                                                   grinde.PROFILES[profile]['version']).hexdigest()
+        persisted = header['metadata'].get('grinde')
+        if isinstance(persisted, dict) and persisted.get('hash') == digest and 'score' in persisted:
+            features = None
+        else:
+            features = grinde.GrindeTally.from_map(items['nodes'], items['connections']).features()
+        header['grinde'] = {'features': features, 'hash': digest}
+    return header
+
+
+def read_map_header(path, profile='mini', trust_persisted=True, stream_min_size=STREAM_MIN_SIZE):
+    """Champs d'en-tête, nombres de nœuds / connexions et données GRINDE d'un fichier de carte"""
+    if os.path.getsize(path) < stream_min_size:
+        with open(path, 'r', encoding='utf-8') as f:
+            return header_from_map(json.load(f), profile)
+
+    header = {'metadata': {}, 'nodeCount': 0, 'connectionCount': 0, 'grinde': None}
+    counts = {'nodes': 'nodeCount', 'connections': 'connectionCount'}
+    tally = grinde.GrindeTally()
+    fingerprint = grinde.GrindeFingerprint(grinde.PROFILES[profile]['version'])
+    visitors = {
+        'nodes': (tally.add_node, fingerprint.add_node),
+        'connections': (tally.add_connection, fingerprint.add_connection)
+    }
+    tally_complete = True
+    remaining = set(SUMMARY_FIELDS) | set(counts) | {'metadata'}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f)
+        for key in stream.iter_object():
+            remaining.discard(key)
+            if key in counts and stream.peek() == '[':
+                # Les éléments ne sont conservés, un à la fois, que le temps
+                # d'alimenter le score GRINDE ; sinon ils sont seulement comptés
+                if header.get('mode', 'grinde') == 'grinde':
+                    # Score persisté déjà connu : seule l'empreinte qui le valide est nécessaire
+                    add_to_tally, add_to_fingerprint = visitors[key]
+                    if trust_persisted and 'grinde' in header['metadata']:
+                        add_to_tally = None
+                        tally_complete = False
+                    for item in stream.iter_items():
+                        header[counts[key]] += 1
+                        if isinstance(item, dict):
+                            add_to_fingerprint(item)
+                            if add_to_tally:
+                                add_to_tally(item)
+                else:
+                    header[counts[key]] = stream.count_items()
+            elif key == 'metadata' and stream.peek() == '{':
+                for meta_key in stream.iter_object():
+                    if meta_key in METADATA_FIELDS:
+                        header['metadata'][meta_key] = stream.value()
+                    else:
+                        stream.skip()
+            elif key in SUMMARY_FIELDS:
+                header[key] = stream.value()
+            else:
+                stream.skip()
+
+            # Tout ce qui compose le résumé a été lu : inutile de lire la suite
+            if not remaining:
+                break
+
+    if header.get('mode', 'grinde') == 'grinde':
+        digest = fingerprint.hexdigest()
+        if not tally_complete:
+            persisted = header['metadata'].get('grinde')
+            if not isinstance(persisted, dict) or persisted.get('hash') != digest or 'score' not in persisted:
+                # Carte modifiée hors de l'application : second passage pour la compter
+                return read_map_header(path, profile, trust_persisted=False, stream_min_size=0)
+        header['grinde'] = {'features': tally.features() if tally_complete else None, 'hash': digest}
+    return header
+
+
+def _check_value(value, depth, max_depth):
+    """Vérifier l'imbrication d'une valeur située à la profondeur `depth` du document"""
+    if max_depth is None or not isinstance(value, (dict, list)):
+        return
+    pending = [(value, depth)]
+    while pending:
+        value, depth = pending.pop()
+        if depth > max_depth:
+            raise LimitError(f"Nesting deeper than {max_depth} levels")
+        for child in value.values() if isinstance(value, dict) else value:
+            if isinstance(child, (dict, list)):
+                pending.append((child, depth + 1))
+
+
+def _check_text(text, name, max_text_length):
+    if max_text_length is not None and isinstance(text, str) and len(text) > max_text_length:
+        raise LimitError(f"{name} longer than {max_text_length} characters")
+
+
+def load_map(fp, max_nodes=None, max_connections=None, max_text_length=None, max_depth=None,
+             max_value_size=MAX_VALUE_SIZE):
+    """Carte complète lue en flux depuis un fichier texte, rejetée dès qu'une limite est dépassée"""
+    # Nœuds et connexions sont décodés un par un et vérifiés aussitôt : le
+    # document brut n'est jamais entièrement en mémoire, seule la carte
+    # résultante l'est. La profondeur compte l'objet racine (1), ses
+    # tableaux (2) et leurs éléments (3).
+    stream = JsonStream(fp, max_value_size=max_value_size)
+    if stream.peek() != '{':
+        raise JsonStreamError('Not a map object')
+    limits = {'nodes': max_nodes, 'connections': max_connections}
+
+    data = {}
+    for key in stream.iter_object():
+        if key in limits and stream.peek() == '[':
+            items = data[key] = []
+            for item in stream.iter_items():
+                if limits[key] is not None and len(items) >= limits[key]:
+                    raise LimitError(f"More than {limits[key]} {key}")
+                _check_value(item, 3, max_depth)
+                if key == 'nodes' and isinstance(item, dict):
+                    _check_text(item.get('text'), 'Node text', max_text_length)
+                items.append(item)
+        else:
+            value = data[key] = stream.value()
+            _check_value(value, 2, max_depth)
+            if key == 'title':
+                _check_text(value, 'Title', max_text_length)
+
+    # Comme json.loads : rien d'autre que des blancs après la carte
+    try:
+        stream.peek()
+    except JsonStreamError:
+        return data
+    raise JsonStreamError(f"Extra data at offset {stream.pos}")
+
+
+def _header_entry(path):
+    """(en-tête, erreur) d'un fichier ; exécuté dans les processus de travail"""
+    try:
+        return read_map_header(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def iter_headers(paths, processes=None, chunksize=16):
+    """(chemin, en-tête, erreur) de chaque carte, lues en parallèle si processes > 1"""
+    # Les chemins sont soumis par fenêtres : seuls quelques lots de résumés
+    # sont en mémoire à la fois, quel que soit le nombre de cartes
+    paths = list(paths)
+    if not processes or processes <= 1 or len(paths) <= chunksize:
+        for path in paths:
+            yield (path,) + _header_entry(path)
+        return
+
+    window = processes * chunksize * 4
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for start in range(0, len(paths), window):
+            batch = paths[start:start + window]
+            for path, entry in zip(batch, pool.map(_header_entry, batch, chunksize=chunksize)):
+                yield (path,) + entry
@@ -0,0 +1,98 @@
+# map_thumbnail.py - Vignettes PNG des cartes, dessinées avec PIL
+
+import io
+
+from PIL import Image, ImageColor, ImageDraw
+
+THUMBNAIL_SIZE = (320, 200)
+PADDING = 12        # pixels laissés libres autour de la carte
+SUPERSAMPLE = 2     # dessin à taille double puis réduction : contours lissés
+
+BACKGROUND = '#f8fafc'
+CONNECTION_COLOR = '#94a3b8'
+DEFAULT_COLOR = '#6366f1'
+MIN_NODE_PIXELS = 2  # un nœud reste visible même sur une très grande carte
+
+# Types d'identifiants acceptés (les autres valeurs sont ignorées)
+KEY_TYPES = (str, int)
+
+
+def _number(value, default):
+    """Nombre fini, ou la valeur par défaut"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value or abs(value) == float('inf'):
+        return default
+    return value
+
+
+def _color(value):
+    """Couleur RGB d'un nœud ; les valeurs illisibles prennent la couleur par défaut"""
+    try:
+        return ImageColor.getrgb(value)[:3]
+    except (ValueError, TypeError, AttributeError):
+        return ImageColor.getrgb(DEFAULT_COLOR)
+
+
+def node_box(node):
+    """(x, y, demi-largeur, demi-hauteur, ellipse ?) d'un nœud tel que l'éditeur le dessine"""
+    size = _number(node.get('size'), 16)
+    width = _number(node.get('shapeWidth'), None) or max(len(str(node.get('text') or '')) * 7 + 20, 80)
+    height = _number(node.get('shapeHeight'), None) or max(size * 2, 30)
+    x, y = _number(node.get('x'), 0), _number(node.get('y'), 0)
+    if node.get('type') == 'central':
+        return x, y, size + 10, size + 10, True
+    return x, y, width / 2, height / 2, node.get('shape') in ('circle', 'ellipse', 'pentagon')
+
+
+def render_png(nodes, connections, size=THUMBNAIL_SIZE):
+    """Vignette PNG (octets) d'une carte, mise à l'échelle pour tenir dans `size`"""
+    # Un seul parcours des nœuds pour l'index id -> forme et la boîte
+    # englobante, puis un seul des connexions : O(V + E) quelle que soit
+    # la taille de l'image
+    boxes = {}
+    for node in nodes:
+        if isinstance(node, dict) and type(node.get('id')) in KEY_TYPES:
+            boxes[node['id']] = (node_box(node), node.get('color'))
+
+    width, height = size[0] * SUPERSAMPLE, size[1] * SUPERSAMPLE
+    image = Image.new('RGB', (width, height), BACKGROUND)
+    if boxes:
+        draw = ImageDraw.Draw(image)
+        min_x = min(x - w for (x, y, w, h, _), _ in boxes.values())
+        min_y = min(y - h for (x, y, w, h, _), _ in boxes.values())
+        max_x = max(x + w for (x, y, w, h, _), _ in boxes.values())
+        max_y = max(y + h for (x, y, w, h, _), _ in boxes.values())
+        padding = PADDING * SUPERSAMPLE
+        scale = min((width - 2 * padding) / max(max_x - min_x, 1),
+                    (height - 2 * padding) / max(max_y - min_y, 1))
+        # Carte centrée dans l'image
+        offset_x = (width - (max_x - min_x) * scale) / 2 - min_x * scale
+        offset_y = (height - (max_y - min_y) * scale) / 2 - min_y * scale
+
+        line_width = max(1, round(scale * 2))
+        for connection in connections:
+            if not isinstance(connection, dict):
+                continue
+            source, target = connection.get('source'), connection.get('target')
+            if type(source) not in KEY_TYPES or type(target) not in KEY_TYPES:
+                continue
+            if source in boxes and target in boxes and source != target:
+                (x1, y1, *_), _ = boxes[source]
+                (x2, y2, *_), _ = boxes[target]
+                draw.line((x1 * scale + offset_x, y1 * scale + offset_y,
+                           x2 * scale + offset_x, y2 * scale + offset_y),
+                          fill=CONNECTION_COLOR, width=line_width)
+
+        smallest = MIN_NODE_PIXELS * SUPERSAMPLE / 2
+        for (x, y, half_width, half_height, ellipse), color in boxes.values():
+            cx, cy = x * scale + offset_x, y * scale + offset_y
+            rx, ry = max(half_width * scale, smallest), max(half_height * scale, smallest)
+            shape = (cx - rx, cy - ry, cx + rx, cy + ry)
+            if ellipse:
+                draw.ellipse(shape, fill=_color(color))
+            else:
+                draw.rounded_rectangle(shape, radius=min(rx, ry) / 2, fill=_color(color))
+
+    image = image.resize(size, Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
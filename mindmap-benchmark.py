@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mind Map - Micro-benchmarks
+Mesure le coût des traitements chauds sur des cartes synthétiques, ramené
+à 1 000 nœuds pour pouvoir comparer les résultats d'une version à l'autre.
+
+Usage :
+    python mindmap-benchmark.py                  # toutes les suites
+    python mindmap-benchmark.py grinde --nodes 5000 --repeat 20
+"""
+
+import argparse
+import copy
+import importlib.util
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import grinde
+import map_outline
+import map_schema
+import map_stream
+
+WORDS = ['idée', 'projet', 'objectif', 'plan', 'risque', 'budget', 'équipe',
+         'client', 'produit', 'test', 'analyse', 'synthèse', 'action', 'note']
+
+
+def synthetic_map(node_count, seed=42):
+    """Carte GRINDE aléatoire mais reproductible"""
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(node_count):
+        text = ' '.join(rng.choices(WORDS, k=rng.randint(1, 5)))
+        if rng.random() < 0.2:
+            text = rng.choice(grinde.VISUAL_SYMBOLS) + ' ' + text
+        nodes.append({
+            'id': f'node_{i}',
+            'text': text,
+            'x': rng.randint(0, 4000),
+            'y': rng.randint(0, 4000),
+            'type': 'group' if rng.random() < 0.05 else 'idea',
+            'size': rng.choice([16, 20, 24, 32]),
+            'color': rng.choice(['#6366f1', '#ef4444', '#10b981', '#f59e0b'])
+        })
+    connections = [{
+        'id': f'conn_{i}',
+        'source': f'node_{rng.randrange(node_count)}',
+        'target': f'node_{rng.randrange(node_count)}',
+        'type': rng.choice(['line', 'arrow', 'double'])
+    } for i in range(int(node_count * 1.2))]
+    return {'title': 'Benchmark', 'mode': 'grinde', 'nodes': nodes, 'connections': connections}
+
+
+def measure(func, repeat):
+    """Meilleur temps (secondes) sur `repeat` exécutions"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(func):
+    """Pic d'allocation (octets) pendant un appel"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def load_script(name, filename):
+    """Importer un script du dépôt dont le nom n'est pas un identifiant Python"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(os.path.abspath(__file__)), filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def report(name, seconds, node_count):
+    per_k = seconds * 1000 / node_count * 1000
+    print(f"  {name:<46} {seconds * 1000:>10.3f} ms   {per_k:>8.3f} ms / 1k nœuds")
+
+
+# ==============================================================================
+# SUITES
+# ==============================================================================
+
+def bench_grinde(args):
+    """Scoring GRINDE (module grinde partagé par les deux backends)"""
+    data = synthetic_map(args.nodes)
+    nodes, connections = data['nodes'], data['connections']
+    tally = grinde.GrindeTally.from_map(nodes, connections)
+    corpus = [grinde.map_features(synthetic_map(50, seed=i)) for i in range(1000)]
+
+    def churn():
+        for node in nodes[:1000]:
+            tally.remove_node(node)
+            tally.add_node(node)
+
+    report('GrindeTally.from_map', measure(lambda: grinde.GrindeTally.from_map(nodes, connections), args.repeat), args.nodes)
+    report('remove_node + add_node (×1000)', measure(churn, args.repeat), 1000)
+    report('score (mini)', measure(lambda: grinde.score(tally, 'mini'), args.repeat), args.nodes)
+    report('score (master)', measure(lambda: grinde.score(tally, 'master'), args.repeat), args.nodes)
+    report(f'score_features (1000 cartes, numpy={grinde.np is not None})',
+           measure(lambda: grinde.score_features(corpus, 'mini'), args.repeat), 1000 * 50)
+
+
+def bench_summary(args):
+    """Résumé d'un fichier de carte : json.load complet contre lecture en flux"""
+    fd, path = tempfile.mkstemp(suffix='.json')
+    try:
+        for mode in ('buzan', 'grinde'):
+            data = synthetic_map(args.nodes)
+            data['mode'] = mode
+            if mode == 'grinde':
+                # Score persisté comme le fait save_map : seule l'empreinte est recalculée
+                fingerprint = grinde.GrindeFingerprint.from_map(
+                    data['nodes'], data['connections'], grinde.PROFILES['mini']['version']).hexdigest()
+                data['metadata'] = {'grinde': {'hash': fingerprint, 'score': grinde.score(
+                    grinde.GrindeTally.from_map(data['nodes'], data['connections']))}}
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(map_stream.header_first(data), f, indent=2, ensure_ascii=False)
+
+            def load():
+                with open(path, 'r', encoding='utf-8') as f:
+                    json.load(f)
+
+            def stream():
+                map_stream.read_map_header(path, stream_min_size=0)
+
+            for name, func in (('json.load', load), ('read_map_header', stream)):
+                report(f'{mode} {name} (pic {peak_memory(func) / 1e6:.1f} Mo)', measure(func, args.repeat), args.nodes)
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+
+def bench_export(args):
+    """Exports texte, Markdown, HTML, plans et SVG : temps par 1k nœuds à taille croissante"""
+    # Des exporteurs linéaires gardent un coût par 1k nœuds constant quand
+    # la carte double de taille
+    import app
+    exporters = [(f'mini {fmt}', None, (lambda func: lambda data: func(data, 'fr'))(func))
+                 for fmt, func in (('text', app.generate_text_export),
+                                   ('markdown', app.generate_markdown_export),
+                                   ('html', app.generate_html_export))]
+    exporters += [(f'mini {style}', None, (lambda style: lambda data: ''.join(app.iter_outline_export(data, 'fr', style)))(style))
+                  for style in map_outline.FORMATS]
+    try:
+        backend = load_script('flask_backend', 'flask-backend.py')
+    except ImportError as e:
+        print(f"  (backend collaboratif ignoré : {e})")
+    else:
+        def as_mindmap(data):
+            mindmap = backend.MindMap(data['title'], data['mode'])
+            mindmap.nodes, mindmap.connections = data['nodes'], data['connections']
+            return mindmap
+        exporters += [('master svg', as_mindmap, backend.generate_svg),
+                      ('master markdown', as_mindmap, backend.generate_markdown)]
+    
+    for name, prepare, export in exporters:
+        for factor in (1, 2, 4, 8):
+            node_count = args.nodes * factor
+            data = synthetic_map(node_count)
+            for i, node in enumerate(data['nodes']):
+                node['type'] = ('central', 'group', 'concept', 'detail')[min(i, 3 if i % 7 else 1)]
+            subject = prepare(data) if prepare else data
+            report(f'{name} ({node_count} nœuds)', measure(lambda: export(subject), args.repeat), node_count)
+
+
+
+def bench_schema(args):
+    """Normalisation des cartes reçues (map_schema) : carte propre et carte à corriger, 10× --nodes"""
+    node_count = args.nodes * 10
+    clean = synthetic_map(node_count)
+    dirty = copy.deepcopy(clean)
+    for i, node in enumerate(dirty['nodes']):
+        if i % 3 == 0:
+            node['x'], node['y'] = str(node['x']), str(node['y'])
+        if i % 10 == 0:
+            node['id'] = dirty['nodes'][i - 1]['id']  # doublon du nœud précédent
+    dirty['connections'] += [{'source': 'node_0', 'target': 'absent'}] * (node_count // 10)
+    
+    for name, data in (('carte propre', clean), ('carte à corriger', dirty)):
+        # La normalisation modifie la carte : une copie neuve par mesure
+        best = float('inf')
+        for _ in range(args.repeat):
+            subject = copy.deepcopy(data)
+            start = time.perf_counter()
+            map_schema.normalize_map(subject)
+            best = min(best, time.perf_counter() - start)
+        report(f'normalize_map, {name}', best, node_count)
+
+SUITES = {
+    'export': bench_export,
+    'grinde': bench_grinde,
+    'schema': bench_schema,
+    'summary': bench_summary
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mind Map - Micro-benchmarks')
+    parser.add_argument('suites', nargs='*', help=f"Suites à exécuter parmi {', '.join(sorted(SUITES))} (toutes par défaut)")
+    parser.add_argument('--nodes', type=int, default=1000, help='Taille de la carte synthétique')
+    parser.add_argument('--repeat', type=int, default=10, help='Répétitions (meilleur temps retenu)')
+    args = parser.parse_args()
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"suite inconnue : {', '.join(sorted(unknown))}")
+
+    for name in args.suites or sorted(SUITES):
+        print(f"\n⏱️  {name} - {SUITES[name].__doc__}")
+        SUITES[name](args)
+
+
+if __name__ == '__main__':
+    main()
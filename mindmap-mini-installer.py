@@ -17,6 +17,11 @@ import argparse
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import grinde  # Scoring GRINDE partagé avec app.py
+except ImportError:
+    grinde = None
+
 # Configuration
 VERSION = "1.0.0"
 DEFAULT_PORT = 5000
@@ -428,7 +433,7 @@ python3 app.py
             for backup in backups[:-10]:
                 backup.unlink()
     
-    def show_statistics(self):
+    def show_statistics(self, workers=None):
         """Afficher les statistiques"""
         maps_dir = self.base_dir / 'mindmaps'
         
@@ -440,18 +445,34 @@ python3 app.py
         total_nodes = 0
         total_connections = 0
         modes = {'grinde': 0, 'buzan': 0}
+        grinde_rows = []
+        
+        paths = [str(p) for p in maps_dir.glob('*.json') if not p.name.startswith('.')]
+        if grinde:
+            # Lecture des cartes répartie sur plusieurs processus, puis
+            # scoring GRINDE de tout le corpus en un seul lot vectorisé
+            for _, mode, features in grinde.iter_file_features(paths, processes=workers):
+                total_maps += 1
+                total_nodes += features[grinde.FEATURES.index('node_count')]
+                total_connections += features[grinde.FEATURES.index('connection_count')]
+                modes[mode] = modes.get(mode, 0) + 1
+                if mode == 'grinde':
+                    grinde_rows.append(features)
+        else:
+            for map_file in paths:
+                try:
+                    with open(map_file, 'r', encoding='utf-8') as f:
+                        map_data = json.load(f)
+                        total_maps += 1
+                        total_nodes += len(map_data.get('nodes', []))
+                        total_connections += len(map_data.get('connections', []))
+                        mode = map_data.get('mode', 'grinde')
+                        modes[mode] = modes.get(mode, 0) + 1
+                except:
+                    continue
         
-        for map_file in maps_dir.glob('*.json'):
-            try:
-                with open(map_file, 'r', encoding='utf-8') as f:
-                    map_data = json.load(f)
-                    total_maps += 1
-                    total_nodes += len(map_data.get('nodes', []))
-                    total_connections += len(map_data.get('connections', []))
-                    mode = map_data.get('mode', 'grinde')
-                    modes[mode] = modes.get(mode, 0) + 1
-            except:
-                continue
+        scores = grinde.score_features(grinde_rows, 'mini') if grinde_rows else []
+        average_score = sum(s['total'] for s in scores) / len(scores) if scores else 0
         
         print(f"""
 📊 Statistiques Mind Map Mini
@@ -463,8 +484,31 @@ python3 app.py
 🌟 Mode Buzan : {modes.get('buzan', 0)} cartes
 📊 Moyenne nœuds/carte : {total_nodes/total_maps if total_maps else 0:.1f}
 📈 Moyenne connexions/carte : {total_connections/total_maps if total_maps else 0:.1f}
+🏆 Score GRINDE moyen : {average_score:.1f}/100
         """)
     
+    def rebuild_catalog(self, workers=None):
+        """Reconstruire le catalogue des cartes (mindmaps/.catalog.json)"""
+        # Catalogue seul, sans importer app.py : aucun dossier créé ni
+        # template écrit, et tous les chemins partent de base_dir
+        sys.path.insert(0, str(self.base_dir))
+        try:
+            import map_catalog
+        except ImportError as e:
+            self.print_message('error', f"map_catalog.py : {e}")
+            return
+        
+        maps_dir = self.base_dir / 'mindmaps'
+        if not maps_dir.exists():
+            print("Aucune carte trouvée")
+            return
+        
+        start = time.time()
+        catalog = map_catalog.MapCatalog(str(maps_dir), str(maps_dir / '.catalog.json'))
+        count = catalog.rebuild(workers=workers, progress=map_catalog.progress_printer("📇 Cartes lues"))
+        catalog.flush()
+        print(f"✅ Catalogue reconstruit : {count} cartes en {time.time() - start:.1f}s")
+    
     def verify_installation(self):
         """Vérifier l'installation"""
         print("\n🔧 Vérification de l'installation...")
@@ -677,6 +721,10 @@ def main():
                        help='Show statistics')
     parser.add_argument('--verify', action='store_true',
                        help='Verify installation')
+    parser.add_argument('--rebuild-catalog', action='store_true',
+                       help='Rebuild the map catalog used by the dashboard and /api/stats')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                       help='Processes used to read maps for --stats and --rebuild-catalog')
     
     args = parser.parse_args()
     
@@ -689,7 +737,9 @@ def main():
     elif args.backup:
         installer.backup_maps()
     elif args.stats:
-        installer.show_statistics()
+        installer.show_statistics(workers=args.workers)
+    elif args.rebuild_catalog:
+        installer.rebuild_catalog(workers=args.workers)
     elif args.verify:
         installer.verify_installation()
     else:
@@ -0,0 +1,762 @@
+# test_app.py - Tests de Mind Map Mini (app.py)
+
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# app.py crée ses dossiers (cartes, templates, vignettes...) dans le
+# répertoire courant : l'application est importée et testée depuis un
+# dossier temporaire, distinct de celui du code, comme sous un serveur lancé
+# ailleurs
+ROOT = os.path.dirname(os.path.abspath(__file__))
+WORKDIR = tempfile.mkdtemp(prefix='mindmap-mini-tests-')
+_previous_cwd = os.getcwd()
+os.chdir(WORKDIR)
+try:
+    import app as mini
+finally:
+    os.chdir(_previous_cwd)
+
+app = mini.app
+app.config.update(TESTING=True, CATALOG_WORKERS=1, IMPORT_WORKERS=1, CATALOG_SYNC_INTERVAL=3600)
+
+@pytest.fixture(autouse=True, scope='module')
+def workdir():
+    """Répertoire courant de l'application pendant les tests du module"""
+    os.chdir(WORKDIR)
+    yield WORKDIR
+    os.chdir(_previous_cwd)
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+@pytest.fixture
+def client():
+    """Créer un client de test"""
+    with app.test_client() as client:
+        yield client
+
+def write_map_file(map_id, **fields):
+    """Écrire une carte directement sur disque, hors de l'application"""
+    data = dict({'id': map_id, 'title': map_id, 'mode': 'buzan', 'nodes': [], 'connections': []}, **fields)
+    with open(mini.MindMapManager.get_map_path(map_id), 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return data
+
+class TestMapCatalog:
+    """Tests pour le catalogue des cartes"""
+
+    def test_catalog_started_by_first_request(self, client, monkeypatch, tmp_path):
+        """Test du démarrage du catalogue sans passer par initialize() (serveur WSGI)"""
+        catalog = mini.MapCatalog(mini.MAPS_FOLDER, str(tmp_path / '.catalog.json'))
+        monkeypatch.setattr(mini, 'MAP_CATALOG', catalog)
+        write_map_file('map_out_of_band')
+
+        stats = json.loads(client.get('/api/stats').data)['stats']
+        assert catalog.sync_thread is not None and catalog.sync_thread.is_alive()
+        assert stats['totalMaps'] == len(catalog.entries) >= 1
+        with open(catalog.path, encoding='utf-8') as f:
+            assert 'map_out_of_band' in {entry['id'] for entry in json.load(f)['entries']}
+
+        # Une seule synchronisation par processus
+        thread = catalog.sync_thread
+        client.get('/api/stats')
+        assert catalog.sync_thread is thread
+
+    def test_hand_edited_files_do_not_break_catalog(self, client, monkeypatch, tmp_path):
+        """Test de fichiers modifiés à la main (types inattendus, JSON invalide) : cartes listées, application servie"""
+        maps = [
+            {'id': 'sans_date', 'title': 'Sans date', 'mode': 'buzan', 'modified': None, 'nodes': [], 'connections': []},
+            {'id': 'datee', 'title': 'Datée', 'mode': 'buzan', 'modified': '2024-05-01T10:00:00', 'nodes': [], 'connections': []},
+            {'id': 'numerique', 'title': 2024, 'mode': 'grinde', 'created': 5, 'preview': ['x'],
+             'metadata': 'pas un objet', 'nodes': [{'id': 'c', 'text': 'Centre', 'type': 'central'}], 'connections': []}
+        ]
+        for data in maps:
+            with open(tmp_path / f"{data['id']}.json", 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        (tmp_path / 'casse.json').write_text('{"title": ', encoding='utf-8')
+        # Entrée de catalogue persistée elle aussi modifiée à la main
+        with open(tmp_path / '.catalog.json', 'w', encoding='utf-8') as f:
+            json.dump({'version': mini.MapCatalog.FORMAT_VERSION, 'grinde': mini.map_catalog.GRINDE_SCORE_VERSION,
+                       'entries': [{'id': 'fantome', 'title': 7}], 'tombstones': {}}, f)
+        catalog = mini.MapCatalog(str(tmp_path), str(tmp_path / '.catalog.json'))
+        monkeypatch.setattr(mini, 'MAP_CATALOG', catalog)
+
+        assert client.get('/').status_code == 200
+        response = client.get('/api/maps?sort=title')
+        assert response.status_code == 200
+        summaries = {summary['id']: summary for summary in json.loads(response.data)['maps']}
+        assert sorted(summaries) == ['datee', 'numerique', 'sans_date']
+        assert summaries['sans_date']['modified'] == ''
+        assert (summaries['numerique']['title'], summaries['numerique']['created']) == ('2024', '5')
+        assert (summaries['numerique']['preview'], summaries['numerique']['language']) == ('', 'fr')
+        assert client.get('/api/maps?sort=modified&to=2024-12-31').status_code == 200
+        assert json.loads(client.get('/api/stats').data)['stats']['totalMaps'] == 3
+        assert catalog.loaded
+
+    def test_date_filters_include_whole_day(self, client):
+        """Test des bornes `from`/`to` réduites à une date : toute la journée est incluse"""
+        response = client.post('/api/map', json={'title': 'Today', 'mode': 'buzan', 'nodes': [], 'connections': []})
+        map_id = json.loads(response.data)['id']
+        today = datetime.now().date()
+        yesterday = (today - timedelta(days=1)).isoformat()
+
+        def listed(**params):
+            maps = json.loads(client.get('/api/maps', query_string=params).data)['maps']
+            return map_id in {summary['id'] for summary in maps}
+
+        assert listed(to=today.isoformat())
+        assert listed(**{'from': today.isoformat(), 'to': today.isoformat()})
+        assert listed(to=today.isoformat(), order='asc')
+        assert not listed(to=yesterday)
+        assert not listed(**{'from': (today + timedelta(days=1)).isoformat()})
+        assert client.get('/api/maps', query_string={'to': 'hier'}).status_code == 400
+
+        with zipfile.ZipFile(io.BytesIO(client.get(f'/api/export-all?to={today}').data)) as archive:
+            assert f'maps/{map_id}.json' in archive.namelist()
+        assert client.get('/api/export-all?from=demain').status_code == 400
+
+    def test_map_list_served_from_catalog(self, client, monkeypatch):
+        """Test de la liste complète et de son ETag, sans parcourir le dossier des cartes"""
+        def no_scan(*args, **kwargs):
+            raise AssertionError('maps folder scanned')
+        monkeypatch.setattr(mini.MindMapManager, 'list_maps', no_scan)
+        monkeypatch.setattr(mini.os, 'scandir', no_scan)
+
+        response = client.get('/api/maps')
+        assert response.status_code == 200
+        maps = json.loads(response.data)['maps']
+        assert len(maps) == len(mini.MAP_CATALOG.entries)
+        assert [m['modified'] for m in maps] == sorted((m['modified'] for m in maps), reverse=True)
+        etag = response.headers['ETag']
+        assert client.get('/api/maps', headers={'If-None-Match': etag}).status_code == 304
+
+        client.post('/api/map', json={'title': 'New', 'mode': 'buzan', 'nodes': [], 'connections': []})
+        response = client.get('/api/maps', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert len(json.loads(response.data)['maps']) == len(maps) + 1
+
+    def test_rename_keeps_catalog_consistent(self, client):
+        """Test d'un renommage en titre numérique : écrit en texte, catalogue à jour"""
+        response = client.post('/api/map', json={'title': 'Avant', 'mode': 'buzan', 'nodes': [], 'connections': []})
+        map_id = json.loads(response.data)['id']
+        maps_before = mini.MAP_CATALOG.totals['maps']
+
+        response = client.post(f'/api/map/{map_id}/rename', json={'title': 123})
+        assert response.status_code == 200
+        assert mini.MindMapManager.load_map(map_id)['title'] == '123'
+        assert mini.MAP_CATALOG.entries[map_id]['title'] == '123'
+        assert mini.MAP_CATALOG.totals['maps'] == maps_before
+        assert all(len(index) == maps_before for index in mini.MAP_CATALOG.indexes.values())
+        titles = json.loads(client.get('/api/maps?sort=title').data)['maps']
+        assert '123' in {summary['title'] for summary in titles}
+
+        response = client.post(f'/api/map/{map_id}/rename', json={'title': ['x']})
+        assert response.status_code == 400
+        assert mini.MindMapManager.load_map(map_id)['title'] == '123'
+
+class TestConditionalRequests:
+    """Tests pour les requêtes conditionnelles (ETag / Last-Modified, 304)"""
+
+    def assert_revalidates(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'no-cache'
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+
+        cached = client.get(url, headers={'If-None-Match': etag})
+        assert cached.status_code == 304 and cached.get_data() == b''
+        assert cached.headers['ETag'] == etag
+        assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+        assert client.get(url, headers={'If-None-Match': '"autre"'}).status_code == 200
+        return etag
+
+    def test_map_etag(self, client):
+        """Test de l'ETag d'une carte : 304 tant qu'elle ne change pas, nouvel ETag après sauvegarde"""
+        data = {'title': 'ETag', 'mode': 'buzan', 'nodes': [], 'connections': []}
+        map_id = json.loads(client.post('/api/map', json=data).data)['id']
+        etag = self.assert_revalidates(client, f'/api/map/{map_id}')
+
+        client.post('/api/map', json=dict(data, id=map_id, title='Modifiée'))
+        response = client.get(f'/api/map/{map_id}', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert json.loads(response.data)['data']['title'] == 'Modifiée'
+        assert client.get('/api/map/absente', headers={'If-None-Match': etag}).status_code == 404
+
+    def test_template_etags(self, client):
+        """Test de l'ETag de la liste des templates et d'un template, par langue"""
+        listing = self.assert_revalidates(client, '/api/templates?lang=fr')
+        assert self.assert_revalidates(client, '/api/templates?lang=en') != listing
+        template_id = json.loads(client.get('/api/templates?lang=fr').data)['templates'][0]['id']
+        etag = self.assert_revalidates(client, f'/api/template/{template_id}?lang=fr')
+        assert etag != listing
+        assert client.get('/api/template/absent', headers={'If-None-Match': etag}).status_code == 404
+
+class TestTemplateRegistry:
+    """Tests pour le rechargement des templates modifiés sur disque"""
+
+    def write_template(self, folder, name, **fields):
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            json.dump(dict({'title': 'Template', 'mode': 'grinde', 'nodes': [], 'connections': []}, **fields), f)
+
+    def listed(self, registry, language):
+        return json.loads(registry.listing(language)[0])['templates']
+
+    def test_refresh_after_file_change(self, tmp_path):
+        """Test du rechargement : ajout, modification, suppression et fichier invalide"""
+        folder = str(tmp_path)
+        registry = mini.TemplateRegistry(folder, 3600)
+        self.write_template(folder, 'projet_fr.json', title='Projet', nodes=[{'id': 'n1', 'text': 'Racine'}])
+        assert [t['title'] for t in self.listed(registry, 'fr')] == ['Projet']
+        body, etag, _ = registry.body('projet', 'fr')
+        assert json.loads(body)['data']['title'] == 'Projet'
+
+        # Dans l'intervalle, le dossier n'est pas revérifié
+        self.write_template(folder, 'projet_fr.json', title='Projet modifié')
+        self.write_template(folder, 'nouveau_fr.json', title='Nouveau')
+        assert registry.body('projet', 'fr')[1] == etag
+        assert len(self.listed(registry, 'fr')) == 1
+
+        registry.refresh(force=True)
+        assert [t['title'] for t in self.listed(registry, 'fr')] == ['Nouveau', 'Projet modifié']
+        body, changed_etag, _ = registry.body('projet', 'fr')
+        assert changed_etag != etag and json.loads(body)['data']['title'] == 'Projet modifié'
+        # Langue absente : repli sur l'anglais, sinon rien
+        assert registry.body('projet', 'de') is None
+
+        os.remove(os.path.join(folder, 'nouveau_fr.json'))
+        with open(os.path.join(folder, 'casse_fr.json'), 'w', encoding='utf-8') as f:
+            f.write('{"title": ')
+        with open(os.path.join(folder, 'liste_fr.json'), 'w', encoding='utf-8') as f:
+            f.write('[]')
+        registry.refresh(force=True)
+        assert [t['id'] for t in self.listed(registry, 'fr')] == ['projet']
+        assert registry.body('nouveau', 'fr') is None and registry.body('casse', 'fr') is None
+        assert self.listed(registry, 'en') == []
+
+    def test_interval_elapsed(self, tmp_path):
+        """Test de la revérification automatique une fois l'intervalle écoulé"""
+        folder = str(tmp_path)
+        registry = mini.TemplateRegistry(folder, 0)
+        assert self.listed(registry, 'en') == []
+        self.write_template(folder, 'simple_en.json', title='Simple')
+        assert [t['title'] for t in self.listed(registry, 'en')] == ['Simple']
+        assert json.loads(registry.body('simple', 'fr')[0])['data']['title'] == 'Simple'
+
+    def test_route_sees_new_template(self, client):
+        """Test des routes après l'ajout d'un fichier dans le dossier des templates"""
+        self.write_template(mini.TEMPLATES_FOLDER, 'ajoute_fr.json', title='Ajouté')
+        try:
+            mini.TEMPLATES.refresh(force=True)
+            templates = json.loads(client.get('/api/templates?lang=fr').data)['templates']
+            assert 'ajoute' in [t['id'] for t in templates]
+            assert json.loads(client.get('/api/template/ajoute?lang=fr').data)['data']['title'] == 'Ajouté'
+        finally:
+            os.remove(os.path.join(mini.TEMPLATES_FOLDER, 'ajoute_fr.json'))
+            mini.TEMPLATES.refresh(force=True)
+        assert client.get('/api/template/ajoute?lang=fr').status_code == 404
+
+class TestCompression:
+    """Tests pour la compression négociée des réponses"""
+
+    def large_map(self, client):
+        data = {'title': 'Compressée', 'mode': 'buzan', 'connections': [],
+                'nodes': [{'id': str(i), 'text': f'Nœud numéro {i}', 'x': i, 'y': i} for i in range(200)]}
+        return json.loads(client.post('/api/map', json=data).data)['id']
+
+    def test_negotiated_encoding_and_weak_etag(self, client):
+        """Test de gzip/brotli selon Accept-Encoding, ETag faible sur la variante compressée"""
+        url = f'/api/map/{self.large_map(client)}'
+        plain = client.get(url)
+        assert 'Content-Encoding' not in plain.headers
+        assert 'Accept-Encoding' in plain.headers['Vary']
+        assert not plain.headers['ETag'].startswith('W/')
+        assert len(plain.get_data()) >= app.config['COMPRESSION_MIN_SIZE']
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert response.headers['ETag'] == 'W/' + plain.headers['ETag']
+        assert gzip.decompress(response.get_data()) == plain.get_data()
+        assert int(response.headers['Content-Length']) == len(response.get_data()) < len(plain.get_data())
+
+        # ETag faible renvoyé par le client : même représentation, 304
+        cached = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+        assert cached.status_code == 304
+        assert client.get(url, headers={'Accept-Encoding': 'gzip;q=0'}).headers.get('Content-Encoding') is None
+
+        if mini.brotli:
+            response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+            assert response.headers['Content-Encoding'] == 'br'
+            assert mini.brotli.decompress(response.get_data()) == plain.get_data()
+
+    def test_small_and_streamed_responses(self, client):
+        """Test des petites réponses laissées telles quelles et des exports compressés en flux"""
+        response = client.get('/api/map/absente', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 404 and 'Content-Encoding' not in response.headers
+        response = client.get('/api/settings', headers={'Accept-Encoding': 'gzip'})
+        assert len(response.get_data()) < app.config['COMPRESSION_MIN_SIZE']
+        assert 'Content-Encoding' not in response.headers
+
+        url = f'/api/export/{self.large_map(client)}/markdown'
+        plain = client.get(url).get_data()
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert response.is_streamed
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.get_data()) == plain
+        assert mini.compress(plain, 'gzip') == mini.compress(plain, 'gzip')
+        assert gzip.decompress(b''.join(mini.compress_stream(iter([plain[:10], plain[10:]]), 'gzip'))) == plain
+
+class TestFrontend:
+    """Tests pour les pages du frontend servies depuis la mémoire"""
+
+    def test_fingerprinted_page_is_immutable(self, client):
+        """Test de l'URL versionnée (immuable), de l'URL stable (revalidée) et de /api/assets"""
+        assets = json.loads(client.get('/api/assets').data)['assets']
+        assert set(assets) == set(mini.STATIC_ASSETS) == set(mini.FRONTEND_PAGES)
+        asset = mini.STATIC_ASSETS['index']
+        assert assets['index'] == f'/app/{asset.fingerprinted_name}'
+        assert asset.fingerprinted_name.startswith('mindmap-mini-multilingual.')
+
+        response = client.get(assets['index'])
+        assert response.status_code == 200 and response.mimetype == 'text/html'
+        assert response.headers['Cache-Control'] == f"public, max-age={app.config['STATIC_MAX_AGE']}, immutable"
+        assert response.get_data() == asset.variants['identity']
+        with open(os.path.join(ROOT, 'mindmap-mini-multilingual.html'), 'rb') as f:
+            assert response.get_data() == f.read()
+
+        stable = client.get('/app/mindmap-mini-multilingual.html')
+        assert stable.headers['Cache-Control'] == 'no-cache'
+        assert stable.headers['ETag'] == response.headers['ETag']
+        assert client.get('/', headers={'If-None-Match': stable.headers['ETag']}).status_code == 304
+
+        compressed = client.get(assets['index'], headers={'Accept-Encoding': 'gzip'})
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert compressed.get_data() == asset.variants['gzip']
+        assert gzip.decompress(compressed.get_data()) == response.get_data()
+        assert client.get('/app/inconnue.html').status_code == 404
+
+    def test_minify_html_keeps_verbatim_blocks(self):
+        """Test de la minification : indentation et commentaires retirés, <pre> et <textarea> intacts"""
+        html = ('<html>\n    <!-- commentaire -->\n    <body>\n\n        <p>Texte</p>\n'
+                '<pre>\n  garder   ceci\n</pre>\n  <!--[if IE]>ie<![endif]-->\n<TEXTAREA>  a\n\n b</TEXTAREA>\n</body>')
+        minified = mini.minify_html(html)
+        assert minified.startswith('<html>\n<body>\n<p>Texte</p>')
+        assert '<pre>\n  garder   ceci\n</pre>' in minified
+        assert '<TEXTAREA>  a\n\n b</TEXTAREA>' in minified
+        assert '<!--[if IE]>ie<![endif]-->' in minified and 'commentaire' not in minified
+
+class TestGrindeScores:
+    """Tests pour les scores GRINDE persistés avec les cartes"""
+
+    GRINDE_MAP = {
+        'title': 'Scores', 'mode': 'grinde',
+        'nodes': [{'id': 'c', 'text': '🎯 Centre', 'type': 'central'}, {'id': 'g', 'text': 'Groupe', 'type': 'group'}],
+        'connections': [{'source': 'c', 'target': 'g', 'type': 'arrow'}]
+    }
+
+    def forged(self):
+        data = json.loads(json.dumps(self.GRINDE_MAP))
+        data['metadata'] = {'grinde': {'hash': mini.MindMapManager.grinde_fingerprint(data), 'score': {'total': 999}}}
+        return data
+
+    def test_client_score_is_recomputed(self, client, monkeypatch):
+        """Test d'un score forgé par le client (empreinte correcte) : ignoré et recalculé, une empreinte par sauvegarde"""
+        calls = []
+        fingerprint = mini.MindMapManager.grinde_fingerprint
+        monkeypatch.setattr(mini.MindMapManager, 'grinde_fingerprint',
+                            staticmethod(lambda data: calls.append(1) or fingerprint(data)))
+        expected = mini.MindMapManager.calculate_grinde_score(self.GRINDE_MAP)
+        assert expected['total'] != 999
+        forged = self.forged()
+        calls.clear()
+
+        map_id = json.loads(client.post('/api/map', json=forged).data)['id']
+        assert len(calls) == 1
+        stored = mini.MindMapManager.load_map(map_id)
+        assert stored['metadata']['grinde']['score'] == expected
+        assert mini.MAP_CATALOG.entries[map_id]['grindeScore'] == expected
+        served = json.loads(client.get(f'/api/map/{map_id}').data)['data']
+        assert served['grindeScore'] == expected
+
+        response = client.post('/api/import', data={'file': (io.BytesIO(json.dumps(self.forged()).encode()), 'carte.json')},
+                               content_type='multipart/form-data')
+        imported = json.loads(response.data)['id']
+        assert mini.MindMapManager.load_map(imported)['metadata']['grinde']['score'] == expected
+
+    def test_buzan_map_drops_client_score(self, client):
+        """Test d'une carte Buzan : aucun score persisté, même envoyé par le client"""
+        data = dict(self.forged(), mode='buzan')
+        map_id = json.loads(client.post('/api/map', json=data).data)['id']
+        assert 'grinde' not in mini.MindMapManager.load_map(map_id)['metadata']
+        assert mini.MAP_CATALOG.entries[map_id]['grindeScore'] is None
+
+    def test_score_uses_shared_module(self):
+        """Test du score de l'application : profil 'mini' du module grinde, dont la version entre dans l'empreinte"""
+        tally = mini.GrindeTally.from_map(self.GRINDE_MAP['nodes'], self.GRINDE_MAP['connections'])
+        assert mini.MindMapManager.calculate_grinde_score(self.GRINDE_MAP) == mini.grinde.score(tally, 'mini')
+        assert 'nonverbal' in mini.MindMapManager.calculate_grinde_score(self.GRINDE_MAP)
+        assert mini.MindMapManager.GRINDE_SCORE_VERSION == mini.grinde.PROFILES['mini']['version']
+        assert mini.MindMapManager.calculate_grinde_score(dict(self.GRINDE_MAP, mode='buzan')) is None
+
+    def test_profile_version_changes_fingerprint(self, monkeypatch):
+        """Test d'un changement de version du profil : empreinte différente, score persisté ignoré"""
+        data = json.loads(json.dumps(self.GRINDE_MAP))
+        fingerprint = mini.MindMapManager.grinde_fingerprint(data)
+        data['metadata'] = {'grinde': {'hash': fingerprint, 'score': {'total': 1}}}
+        assert mini.map_catalog.persisted_score(data, fingerprint) == {'total': 1}
+
+        monkeypatch.setattr(mini.MindMapManager, 'GRINDE_SCORE_VERSION', mini.MindMapManager.GRINDE_SCORE_VERSION + 1)
+        bumped = mini.MindMapManager.grinde_fingerprint(data)
+        assert bumped != fingerprint
+        assert mini.map_catalog.persisted_score(data, bumped) is None
+
+    def cache_stats(self, client):
+        return json.loads(client.get('/api/stats').data)['stats']['grindeCache']
+
+    def test_cache_hits_counted(self, client):
+        """Test du compteur grindeCache : échec au premier calcul, succès sur le score persisté ou mémorisé"""
+        data = json.loads(json.dumps(self.GRINDE_MAP))
+        data['nodes'][1]['text'] = 'Compteur de cache'
+        before = self.cache_stats(client)
+        map_id = json.loads(client.post('/api/map', json=data).data)['id']
+        saved = self.cache_stats(client)
+        assert (saved['hits'], saved['misses']) == (before['hits'], before['misses'] + 1)
+
+        # Score persisté avec la carte
+        client.get(f'/api/map/{map_id}')
+        loaded = self.cache_stats(client)
+        assert (loaded['hits'], loaded['misses']) == (saved['hits'] + 1, saved['misses'])
+
+        # Carte écrite à la main, sans score persisté : calculée une fois, puis servie par le LRU
+        data['nodes'][1]['text'] = 'Écrite à la main'
+        write_map_file('cache-main', **data)
+        client.get('/api/map/cache-main')
+        first = self.cache_stats(client)
+        assert (first['hits'], first['misses']) == (loaded['hits'], loaded['misses'] + 1)
+        client.get('/api/map/cache-main')
+        second = self.cache_stats(client)
+        assert (second['hits'], second['misses']) == (first['hits'] + 1, first['misses'])
+        assert client.delete('/api/map/cache-main').status_code == 200
+
+class TestExports:
+    """Tests pour les exports d'une carte"""
+
+    def test_unknown_language_falls_back_before_streaming(self, client):
+        """Test d'une langue inconnue : rendu complet dans la langue par défaut, pas un 200 tronqué"""
+        response = client.post('/api/map', json={
+            'title': 'Langue', 'mode': 'grinde',
+            'nodes': [{'id': 'c', 'text': 'Centre', 'type': 'central'}, {'id': 'g', 'text': 'Groupe', 'type': 'group'}],
+            'connections': [{'source': 'c', 'target': 'g'}]
+        })
+        map_id = json.loads(response.data)['id']
+
+        for format in ('text', 'markdown', 'html', 'outline'):
+            expected = client.get(f'/api/export/{map_id}/{format}?lang=fr').get_data()
+            response = client.get(f'/api/export/{map_id}/{format}?lang=xx')
+            assert response.status_code == 200
+            assert response.get_data() == expected
+        assert client.get('/api/maps?lang=xx').status_code == 200
+        assert client.get('/api/stats?lang=xx').status_code == 200
+
+    EXPORTS = {
+        'text': (mini.iter_text_export, mini.generate_text_export),
+        'markdown': (mini.iter_markdown_export, mini.generate_markdown_export),
+        'html': (mini.iter_html_export, mini.generate_html_export)
+    }
+
+    def test_streamed_exports_match_full_render(self, client):
+        """Test des exports en flux : mêmes octets que le rendu complet, dans chaque langue"""
+        response = client.post('/api/map', json={
+            'title': 'Flux <é> & 🎯', 'mode': 'grinde',
+            'nodes': [{'id': 'c', 'text': '🎯 Centre « accentué »', 'type': 'central'},
+                      {'id': 'g', 'text': '<script>alert(1)</script>', 'type': 'group'},
+                      {'id': 'd', 'text': 'Détail ' * 20, 'type': 'detail'}],
+            'connections': [{'source': 'c', 'target': 'g', 'type': 'arrow'}, {'source': 'g', 'target': 'd'}]
+        })
+        map_id = json.loads(response.data)['id']
+        data = mini.MindMapManager.load_map(map_id)
+
+        for language in mini.TRANSLATIONS:
+            for format, (iterate, generate) in self.EXPORTS.items():
+                full = generate(data, language)
+                assert ''.join(iterate(data, language)) == full
+                # Petits blocs : aucun caractère multi-octets coupé entre deux blocs
+                chunks = list(mini.encode_chunks(iterate(data, language), chunk_size=7))
+                assert len(chunks) > 1
+                assert ''.join(chunk.decode('utf-8') for chunk in chunks) == full
+
+                url = f'/api/export/{map_id}/{format}?lang={language}'
+                streamed = client.get(url)
+                assert streamed.status_code == 200 and streamed.get_data() == full.encode('utf-8')
+                assert client.get(url).get_data() == full.encode('utf-8')
+
+    def test_encode_chunks(self):
+        """Test du regroupement des morceaux en blocs d'environ chunk_size caractères"""
+        pieces = ['ab', 'c', 'é' * 4, '', 'fin']
+        assert list(mini.encode_chunks(pieces, chunk_size=3)) == [b'abc', 'éééé'.encode('utf-8'), b'fin']
+        assert list(mini.encode_chunks(pieces)) == [''.join(pieces).encode('utf-8')]
+        assert list(mini.encode_chunks([])) == []
+
+    def test_export_cache_hits_and_invalidation(self, client):
+        """Test du cache des rendus : hit sur une carte inchangée, oubli après sauvegarde, renommage et suppression"""
+        cache = mini.EXPORT_CACHE
+        data = {'title': 'Cache', 'mode': 'buzan', 'nodes': [{'id': 'c', 'text': 'Centre', 'type': 'central'}],
+                'connections': []}
+        map_id = json.loads(client.post('/api/map', json=data).data)['id']
+        url = f'/api/export/{map_id}/markdown'
+
+        def export():
+            before = dict(cache.counters)
+            response = client.get(url)
+            assert response.status_code == 200
+            body = response.get_data(as_text=True)
+            return body, {key: cache.counters[key] - before[key] for key in ('hits', 'misses')}
+
+        first, counted = export()
+        assert counted == {'hits': 0, 'misses': 1}
+        assert len(cache.by_map[map_id]) == 1
+        second, counted = export()
+        assert (second, counted) == (first, {'hits': 1, 'misses': 0})
+        assert 'Centre' in client.get(f'{url}?lang=en').get_data(as_text=True)
+        assert len(cache.by_map[map_id]) == 2
+
+        client.post('/api/map', json=dict(data, id=map_id, nodes=[{'id': 'c', 'text': 'Modifié', 'type': 'central'}]))
+        assert map_id not in cache.by_map
+        body, counted = export()
+        assert 'Modifié' in body and counted['misses'] == 1
+
+        client.post(f'/api/map/{map_id}/rename', json={'title': 'Renommée'})
+        assert map_id not in cache.by_map
+        body, _ = export()
+        assert 'Renommée' in body
+        assert 'Renommée' in client.get(url).headers['Content-Disposition']
+
+        stats = json.loads(client.get('/api/stats').data)['stats']['exportCache']
+        assert stats['entries'] == len(cache.items) and stats['hits'] >= 2
+
+        client.delete(f'/api/map/{map_id}')
+        assert map_id not in cache.by_map
+        assert client.get(url).status_code == 404
+
+    def test_export_cache_eviction(self):
+        """Test de l'éviction LRU bornée en octets et des rendus trop gros pour être gardés"""
+        cache = mini.ExportCache(100)
+        cache.put(('a', 1, 'text', 'fr'), b'x' * 40, 'A')
+        cache.put(('b', 1, 'text', 'fr'), b'x' * 40, 'B')
+        assert cache.get(('a', 1, 'text', 'fr')) == (b'x' * 40, 'A')
+        cache.put(('c', 1, 'text', 'fr'), b'x' * 40, 'C')
+        assert sorted(key[0] for key in cache.items) == ['a', 'c']
+        assert (cache.size, cache.counters['evictions']) == (80, 1)
+        cache.put(('d', 1, 'text', 'fr'), b'x' * 101, 'D')
+        assert ('d', 1, 'text', 'fr') not in cache.items
+
+        # Rendu transmis en entier, conservé seulement sous le quart du cache
+        assert b''.join(cache.record(('e', 1, 'text', 'fr'), 'E', [b'x' * 20, b'y' * 10])) == b'x' * 20 + b'y' * 10
+        assert ('e', 1, 'text', 'fr') not in cache.items
+        assert b''.join(cache.record(('g', 1, 'text', 'fr'), 'G', [b'x' * 20])) == b'x' * 20
+        assert cache.get(('g', 1, 'text', 'fr')) == (b'x' * 20, 'G')
+        cache.invalidate('g')
+        assert cache.get(('g', 1, 'text', 'fr')) is None
+
+class TestExportAll:
+    """Tests pour l'export de toutes les cartes en ZIP"""
+
+    def export(self, client, **params):
+        response = client.get('/api/export-all', query_string=params)
+        assert response.status_code == 200
+        assert response.is_streamed
+        archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+        assert archive.testzip() is None
+        return response, archive, json.loads(archive.read('manifest.json'))
+
+    def test_stream_zip_produces_valid_archive(self, tmp_path):
+        """Test de l'archive produite morceau par morceau : fichiers et octets, gros fichier en plusieurs morceaux"""
+        large = tmp_path / 'large.json'
+        large.write_bytes(os.urandom(300 * 1024))
+        small = tmp_path / 'small.json'
+        small.write_text('{"title": "Petite"}', encoding='utf-8')
+
+        chunks = list(mini.stream_zip([('maps/large.json', str(large)), ('maps/small.json', str(small)),
+                                       ('manifest.json', b'{"maps": 2}')], chunk_size=16 * 1024))
+        assert len(chunks) > 10
+        assert all(chunks[:-1])
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            assert archive.testzip() is None
+            assert archive.namelist() == ['maps/large.json', 'maps/small.json', 'manifest.json']
+            assert archive.read('maps/large.json') == large.read_bytes()
+            assert archive.read('maps/small.json') == small.read_bytes()
+            assert archive.read('manifest.json') == b'{"maps": 2}'
+            assert archive.getinfo('maps/large.json').compress_type == zipfile.ZIP_DEFLATED
+
+    def test_full_export(self, client):
+        """Test de l'export complet : cartes, templates et manifeste dans une archive valide"""
+        response = client.post('/api/map', json={'title': 'Exportée', 'mode': 'buzan', 'nodes': [], 'connections': []})
+        map_id = json.loads(response.data)['id']
+
+        response, archive, manifest = self.export(client)
+        assert response.mimetype == 'application/zip'
+        assert 'mindmap_mini_backup_' in response.headers['Content-Disposition']
+        assert manifest['full'] is True and manifest['deleted'] == []
+        assert map_id in manifest['maps']
+        assert sorted(manifest['maps']) == sorted(mini.MAP_CATALOG.entries)
+        assert json.loads(archive.read(f'maps/{map_id}.json'))['title'] == 'Exportée'
+        templates = [name for name in os.listdir(mini.TEMPLATES_FOLDER) if name.endswith('.json')]
+        assert templates
+        assert {f'templates/{name}' for name in templates} <= set(archive.namelist())
+        assert archive.namelist()[-1] == 'manifest.json'
+
+    def test_incremental_export_since_cursor(self, client):
+        """Test de l'export incrémental : cartes modifiées et supprimées depuis le curseur, puis curseur suivant"""
+        def create(title):
+            response = client.post('/api/map', json={'title': title, 'mode': 'buzan', 'nodes': [], 'connections': []})
+            return json.loads(response.data)['id']
+        kept, changed, deleted = create('Gardée'), create('Modifiée'), create('Supprimée')
+
+        response, _, manifest = self.export(client)
+        cursor = response.headers['X-Export-Cursor']
+        assert manifest['cursor'] == cursor
+
+        client.post(f'/api/map/{changed}/rename', json={'title': 'Renommée'})
+        added = create('Ajoutée')
+        assert client.delete(f'/api/map/{deleted}').status_code == 200
+
+        response, archive, manifest = self.export(client, since=cursor)
+        assert 'mindmap_mini_changes_' in response.headers['Content-Disposition']
+        assert manifest['full'] is False and manifest['since'] == cursor
+        assert sorted(manifest['maps']) == sorted([changed, added])
+        assert manifest['deleted'] == [deleted]
+        assert kept not in manifest['maps']
+        assert sorted(archive.namelist()) == sorted([f'maps/{changed}.json', f'maps/{added}.json', 'manifest.json'])
+        assert json.loads(archive.read(f'maps/{changed}.json'))['title'] == 'Renommée'
+
+        # Curseur suivant : plus rien à transmettre
+        next_cursor = response.headers['X-Export-Cursor']
+        assert next_cursor != cursor
+        _, archive, manifest = self.export(client, since=next_cursor)
+        assert (manifest['maps'], manifest['deleted'], archive.namelist()) == ([], [], ['manifest.json'])
+
+    def test_since_before_history_falls_back_to_full(self, client):
+        """Test d'un `since` antérieur à l'historique des suppressions : export complet"""
+        _, archive, manifest = self.export(client, since='2000-01-01')
+        assert manifest['full'] is True and manifest['deleted'] == []
+        assert any(name.startswith('templates/') for name in archive.namelist())
+        assert sorted(manifest['maps']) == sorted(mini.MAP_CATALOG.entries)
+
+        for since in ('hier', mini.encode_export_cursor('x'), 'eyJhIjogMX0'):
+            assert client.get('/api/export-all', query_string={'since': since}).status_code == 400
+
+class TestThumbnails:
+    """Tests pour les vignettes PNG des cartes"""
+
+    def test_thumbnail_served_from_other_cwd(self, client):
+        """Test de la vignette servie quand l'application est lancée hors de son dossier"""
+        Image = pytest.importorskip('PIL.Image')
+
+        assert os.path.realpath(os.getcwd()) != os.path.realpath(app.root_path)
+        response = client.post('/api/map', json={
+            'title': 'Vignette', 'mode': 'buzan',
+            'nodes': [{'id': 'c', 'text': 'Centre', 'type': 'central', 'x': 0, 'y': 0},
+                      {'id': 'a', 'text': 'A', 'x': 300, 'y': 200}],
+            'connections': [{'source': 'c', 'target': 'a'}]
+        })
+        map_id = json.loads(response.data)['id']
+        url = next(summary['thumbnail'] for summary in json.loads(client.get('/api/maps').data)['maps']
+                   if summary['id'] == map_id)
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.mimetype == 'image/png'
+        assert 'immutable' in response.headers['Cache-Control']
+        assert Image.open(io.BytesIO(response.get_data())).size == app.config['THUMBNAIL_SIZE']
+        assert os.path.isabs(mini.THUMBNAILS.folder)
+
+        # Sans version : revalidation par ETag
+        response = client.get(f'/api/map/{map_id}/thumbnail.png')
+        assert 'immutable' not in response.headers['Cache-Control']
+        cached = client.get(f'/api/map/{map_id}/thumbnail.png', headers={'If-None-Match': response.headers['ETag']})
+        assert cached.status_code == 304
+
+        assert client.get('/api/map/absente/thumbnail.png').status_code == 404
+        assert client.get('/api/map/..%2Fapp/thumbnail.png').status_code == 404
+
+class TestImport:
+    """Tests pour l'import d'une carte"""
+
+    def post_import(self, client, content, filename='carte.json'):
+        return client.post('/api/import', data={'file': (io.BytesIO(content), filename)},
+                           content_type='multipart/form-data')
+
+    def test_import_limits_and_invalid_files(self, client, monkeypatch):
+        """Test de l'import : 413 au-delà des limites configurées, 400 pour un fichier invalide"""
+        data = {'title': 'Import', 'mode': 'buzan',
+                'nodes': [{'id': str(i), 'text': f'Nœud {i}'} for i in range(3)],
+                'connections': [{'source': '0', 'target': '1'}]}
+        monkeypatch.setitem(app.config, 'IMPORT_MAX_NODES', 3)
+        response = self.post_import(client, json.dumps(data).encode())
+        assert response.status_code == 200
+        assert len(mini.MindMapManager.load_map(json.loads(response.data)['id'])['nodes']) == 3
+
+        for key, value in (('IMPORT_MAX_NODES', 2), ('IMPORT_MAX_CONNECTIONS', 0),
+                           ('IMPORT_MAX_TEXT_LENGTH', 5), ('IMPORT_MAX_DEPTH', 2)):
+            with monkeypatch.context() as limited:
+                limited.setitem(app.config, key, value)
+                response = self.post_import(client, json.dumps(data).encode())
+                assert response.status_code == 413, key
+                assert json.loads(response.data)['success'] is False
+
+        for content in (b'{"title": "tronque', b'[]', b'{"nodes": {}}', b'{"a": 1} x', '{"t": "é"}'.encode('latin-1')):
+            assert self.post_import(client, content).status_code == 400, content
+
+class TestBulkImport:
+    """Tests pour l'import en lot d'archives ZIP"""
+
+    def wait_for_job(self, client, status_url):
+        for _ in range(200):
+            job = json.loads(client.get(status_url).data)['job']
+            if job['state'] in ('done', 'failed'):
+                return job
+            time.sleep(0.05)
+        raise AssertionError('import job still running')
+
+    def test_members_streamed_and_oversized_rejected(self, client, monkeypatch):
+        """Test des membres décompressés en flux, et d'un membre trop gros écarté sans être ouvert"""
+        small = {'title': 'Petite', 'mode': 'buzan', 'nodes': [{'id': 'c', 'text': 'Centre', 'type': 'central'}], 'connections': []}
+        large = dict(small, title='Grande', notes='x' * 4096)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('maps/petite.json', json.dumps(small))
+            archive.writestr('maps/grande.json', json.dumps(large))
+        buffer.seek(0)
+
+        monkeypatch.setitem(app.config, 'IMPORT_MAX_BYTES', 1024)
+        opened = []
+        original_open = zipfile.ZipFile.open
+        def tracking_open(self, name, *args, **kwargs):
+            opened.append(getattr(name, 'filename', name))
+            return original_open(self, name, *args, **kwargs)
+        def no_read(*args, **kwargs):
+            raise AssertionError('member read in full')
+        monkeypatch.setattr(zipfile.ZipFile, 'open', tracking_open)
+        monkeypatch.setattr(zipfile.ZipFile, 'read', no_read)
+
+        response = client.post('/api/import/bulk', data={'file': (buffer, 'export.zip')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 202
+        job = self.wait_for_job(client, response.headers['Location'])
+
+        assert job['state'] == 'done'
+        assert [item['file'] for item in job['imported']] == ['export.zip/maps/petite.json']
+        assert [item['file'] for item in job['errors']] == ['export.zip/maps/grande.json']
+        assert '1024 bytes' in job['errors'][0]['error']
+        assert opened == ['maps/petite.json']
+        assert mini._IMPORT_ARCHIVES == {}
+        imported = mini.MindMapManager.load_map(job['imported'][0]['id'])
+        assert imported['title'] == 'Petite'
@@ -0,0 +1,399 @@
+# test_flask_backend.py - Tests du backend collaboratif (flask-backend.py)
+
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+# flask-backend.py n'est pas importable par son nom (tiret) : chargé depuis son chemin
+_spec = importlib.util.spec_from_file_location(
+    'flask_backend', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flask-backend.py'))
+backend = importlib.util.module_from_spec(_spec)
+sys.modules['flask_backend'] = backend
+_spec.loader.exec_module(backend)
+
+app, socketio = backend.app, backend.socketio
+
+@pytest.fixture
+def client():
+    """Créer un client de test"""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        with app.app_context():
+            backend.mindmaps_db.clear()
+            yield client
+
+def create_map(client, title='Test Map'):
+    """Créer une carte et renvoyer sa représentation JSON"""
+    response = client.post('/api/mindmap', json={'title': title})
+    return json.loads(response.data)['mindmap']
+
+class TestOptimisticConcurrency:
+    """Tests pour la concurrence optimiste basée sur MindMap.version"""
+
+    def test_get_mindmap_etag(self, client):
+        """Test de l'ETag et du 304 sur une carte inchangée"""
+        mindmap = create_map(client, 'ETag Map')
+        map_id = mindmap['id']
+
+        response = client.get(f'/api/mindmap/{map_id}')
+        etag = response.headers['ETag']
+        assert etag == f'"{map_id}-v{mindmap["version"]}"'
+
+        cached = client.get(f'/api/mindmap/{map_id}', headers={'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.headers['ETag'] == etag
+
+    def test_update_with_stale_if_match(self, client):
+        """Test du conflit 409 avec un ETag périmé"""
+        mindmap = create_map(client, 'Original')
+        map_id = mindmap['id']
+        etag = client.get(f'/api/mindmap/{map_id}').headers['ETag']
+
+        first = client.put(f'/api/mindmap/{map_id}',
+            json={'title': 'First writer'}, headers={'If-Match': etag})
+        assert first.status_code == 200
+        assert first.headers['ETag'] != etag
+
+        second = client.put(f'/api/mindmap/{map_id}',
+            json={'title': 'Second writer'}, headers={'If-Match': etag})
+        assert second.status_code == 409
+        assert second.headers['ETag'] == first.headers['ETag']
+        data = json.loads(second.data)
+        assert data['version'] == mindmap['version'] + 1
+        assert data['mindmap']['title'] == 'First writer'
+        assert backend.mindmaps_db[map_id].title == 'First writer'
+
+    def test_delete_with_stale_if_match(self, client):
+        """Test de la suppression refusée avec un ETag périmé"""
+        map_id = create_map(client)['id']
+        etag = client.get(f'/api/mindmap/{map_id}').headers['ETag']
+        client.put(f'/api/mindmap/{map_id}', json={'title': 'Changed'})
+
+        response = client.delete(f'/api/mindmap/{map_id}', headers={'If-Match': etag})
+        assert response.status_code == 409
+        assert map_id in backend.mindmaps_db
+
+    def test_update_node_with_base_version(self, client):
+        """Test de base_version sur la mise à jour d'un nœud"""
+        mindmap = create_map(client)
+        node_id = mindmap['nodes'][0]['id']
+        version = mindmap['version']
+
+        response = client.put(f'/api/mindmap/{mindmap["id"]}/node/{node_id}',
+            json={'text': 'Updated', 'base_version': version})
+        assert response.status_code == 200
+        assert 'base_version' not in json.loads(response.data)['node']
+
+        stale = client.delete(f'/api/mindmap/{mindmap["id"]}/node/{node_id}',
+            query_string={'base_version': version})
+        assert stale.status_code == 409
+        assert json.loads(stale.data)['version'] == version + 1
+        assert len(backend.mindmaps_db[mindmap['id']].nodes) == 1
+
+    def test_stale_base_version_on_additions(self, client):
+        """Test des ajouts de nœud et de connexion refusés sur une version périmée"""
+        mindmap = create_map(client)
+        map_id, version = mindmap['id'], mindmap['version']
+        added = client.post(f'/api/mindmap/{map_id}/node',
+            json={'text': 'A', 'type': 'concept', 'base_version': version})
+        assert added.status_code == 200
+        node_id = json.loads(added.data)['node']['id']
+
+        stale = client.post(f'/api/mindmap/{map_id}/node',
+            json={'text': 'B', 'type': 'concept', 'base_version': version})
+        assert stale.status_code == 409
+        stale = client.post(f'/api/mindmap/{map_id}/connection',
+            json={'source': mindmap['nodes'][0]['id'], 'target': node_id, 'base_version': version})
+        assert stale.status_code == 409
+        assert len(backend.mindmaps_db[map_id].nodes) == 2
+        assert backend.mindmaps_db[map_id].connections == []
+
+    def test_invalid_base_version(self, client):
+        """Test du refus (400) d'une base_version non numérique"""
+        map_id = create_map(client)['id']
+        response = client.put(f'/api/mindmap/{map_id}', json={'title': 'X', 'base_version': 'abc'})
+        assert response.status_code == 400
+
+class TestMapNormalization:
+    """Tests pour la normalisation des cartes reçues par l'API"""
+
+    def test_update_normalizes_map(self, client):
+        """Test de la normalisation d'une carte reçue (types, ids en double, connexions orphelines)"""
+        map_id = create_map(client)['id']
+
+        response = client.put(f'/api/mindmap/{map_id}', json={
+            'nodes': [
+                {'id': 'a', 'text': 'A', 'x': '120.5', 'y': 'n/a', 'size': '20'},
+                {'id': 'a', 'text': 42},
+                {'text': 'Sans id'},
+                'pas un nœud'
+            ],
+            'connections': [
+                {'source': 'a', 'target': 'a_2', 'type': 'arrow'},
+                {'source': {'id': 'a'}, 'target': 'absent'}
+            ]
+        })
+        assert response.status_code == 200
+        mindmap = json.loads(response.data)['mindmap']
+        first, second, third = mindmap['nodes']
+        assert (first['x'], first['size'], 'y' in first) == (120.5, 20, False)
+        assert (second['id'], second['text']) == ('a_2', '42')
+        assert third['id'] not in ('a', 'a_2')
+        assert mindmap['connections'] == [{'source': 'a', 'target': 'a_2', 'type': 'arrow'}]
+
+        # Connexions seules : vérifiées contre les nœuds existants
+        response = client.put(f'/api/mindmap/{map_id}', json={
+            'connections': [{'source': 'a_2', 'target': 'a'}, {'source': 'a', 'target': 'b'}]
+        })
+        assert len(json.loads(response.data)['mindmap']['connections']) == 1
+
+        response = client.put(f'/api/mindmap/{map_id}', json={'nodes': {'a': {}}})
+        assert response.status_code == 400
+
+    def test_node_and_connection_payloads_normalized(self, client):
+        """Test des ajouts de nœud et de connexion : normalisés, connexions orphelines refusées (400)"""
+        mindmap = create_map(client)
+        map_id, central_id = mindmap['id'], mindmap['nodes'][0]['id']
+        stored = backend.mindmaps_db[map_id]
+
+        response = client.post(f'/api/mindmap/{map_id}/node', json={'text': 7, 'x': '12', 'y': 'n/a'})
+        node = json.loads(response.data)['node']
+        assert (node['text'], node['x'], 'y' in node) == ('7', 12, False)
+
+        version = stored.version
+        response = client.post(f'/api/mindmap/{map_id}/connection', json={'source': 'nope', 'target': 'nada'})
+        assert response.status_code == 400
+        response = client.post(f'/api/mindmap/{map_id}/connection', json={'source': central_id})
+        assert response.status_code == 400
+        assert (stored.connections, stored.version) == ([], version)
+
+        response = client.post(f'/api/mindmap/{map_id}/connection',
+                               json={'source': {'id': central_id}, 'target': node['id'], 'type': 'arrow'})
+        assert response.status_code == 200
+        connection = json.loads(response.data)['connection']
+        assert (connection['source'], connection['target']) == (central_id, node['id'])
+        assert stored.tally.arrow_count == 1
+
+        assert client.post(f'/api/mindmap/{map_id}/node', json=['pas un nœud']).status_code == 400
+        assert client.put(f'/api/mindmap/{map_id}/node/{central_id}', json=['x']).status_code == 400
+        assert len(stored.nodes) == 2 and stored.version == version + 1
+
+class TestExports:
+    """Tests pour les exports d'une carte"""
+
+    def test_export_outline(self, client):
+        """Test des plans hiérarchiques servis par la route d'export"""
+        mindmap = create_map(client, 'Outline Test')
+        map_id = mindmap['id']
+        ids = {'Centre': mindmap['nodes'][0]['id']}
+        for text in ('A', 'B', 'Seul'):
+            response = client.post(f'/api/mindmap/{map_id}/node', json={'text': text, 'type': 'concept'})
+            ids[text] = json.loads(response.data)['node']['id']
+        for source, target in [('Centre', 'A'), ('A', 'B'), ('B', 'Centre')]:
+            client.post(f'/api/mindmap/{map_id}/connection', json={'source': ids[source], 'target': ids[target]})
+
+        response = client.get(f'/api/mindmap/{map_id}/export/outline')
+        assert response.status_code == 200
+        assert response.get_data(as_text=True).splitlines()[2:] == [
+            '- Idée Centrale', '  - A', '    - ↪ B', '  - B', '', '## Idées non reliées', '', '- Seul'
+        ]
+        response = client.get(f'/api/mindmap/{map_id}/export/opml')
+        assert response.mimetype == 'text/x-opml'
+        assert '<outline text="A">' in response.get_data(as_text=True)
+
+    def test_svg_border_points(self):
+        """Test des extrémités de connexion sur le contour des nœuds"""
+        rect, circle = (0, 0, 30, 20, False), (0, 0, 10, 10, True)
+        assert backend._border_point(rect, 100, 0) == (30, 0)
+        assert backend._border_point(rect, 100, 100) == (20, 20)
+        assert backend._border_point(rect, 0, -50) == (0, -20)
+        assert backend._border_point(circle, 30, 40) == pytest.approx((6, 8))
+        # Nœuds superposés ou confondus : le centre
+        assert backend._border_point(rect, 10, 0) == (0, 0)
+        assert backend._border_point(circle, 0, 0) == (0, 0)
+
+    def test_svg_geometry_and_cropping(self):
+        """Test du cadre englobant, des connexions résolues par id et du recadrage"""
+        mindmap = backend.MindMap(title='SVG')
+        first = mindmap.add_node({'text': 'N', 'type': 'group', 'x': 100, 'y': 100})
+        second = mindmap.add_node({'text': 'N', 'type': 'group', 'x': 500, 'y': 300})
+        mindmap.add_connection({'source': first['id'], 'target': second['id'], 'type': 'arrow'})
+
+        svg = backend.generate_svg(mindmap)
+        # Demi-largeur (1 * 8 + 20) / 2 = 14, demi-hauteur 20, marge SVG_PADDING = 40
+        assert 'width="508" height="320" viewBox="46 40 508 320"' in svg
+        assert 'data-type="arrow" marker-end="url(#arrow)" d="M114 107L486 293"' in svg
+        assert '<rect x="86" y="80" width="28" height="40" rx="10"/>' in svg
+
+        cropped = ''.join(backend.iter_svg(mindmap, view=(0, 0, 200, 200), zoom=2))
+        assert 'width="400" height="400" viewBox="0 0 200 200"' in cropped
+        assert cropped.count('<rect') == 1
+        assert 'M114 107L486 293' in cropped  # la connexion traverse le cadre
+
+        outside = ''.join(backend.iter_svg(mindmap, view=(1000, 1000, 50, 50)))
+        assert '<rect' not in outside and '<path class="connection"' not in outside
+
+    def test_svg_level_of_detail(self):
+        """Test de l'omission des nœuds de détail (et de leurs connexions) sous SVG_DETAIL_MIN_ZOOM"""
+        mindmap = backend.MindMap(title='SVG')
+        central = mindmap.add_node({'text': 'C', 'type': 'central', 'x': 0, 'y': 0, 'size': 30})
+        detail = mindmap.add_node({'text': 'Détail', 'type': 'detail', 'x': 300, 'y': 0})
+        mindmap.add_connection({'source': central['id'], 'target': detail['id']})
+
+        full = ''.join(backend.iter_svg(mindmap, zoom=1, detail_min_zoom=0.5))
+        assert 'M30 0L266 0' in full and 'Détail' in full
+        overview = ''.join(backend.iter_svg(mindmap, zoom=0.25, detail_min_zoom=0.5))
+        assert 'Détail' not in overview and 'class="connection"' not in overview
+        assert 'viewBox="-70 -70 140 140"' in overview
+
+    def test_export_svg_route(self, client):
+        """Test de la route d'export SVG (paramètres viewBox et zoom validés)"""
+        map_id = create_map(client, 'SVG Test')['id']
+        response = client.get(f'/api/mindmap/{map_id}/export/svg?viewBox=0,0,200,200&zoom=0.5')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/svg+xml'
+        assert 'width="100" height="100" viewBox="0 0 200 200"' in response.get_data(as_text=True)
+        for query in ('viewBox=0,0,-1,1', 'viewBox=1,2,3', 'zoom=0', 'zoom=nan'):
+            assert client.get(f'/api/mindmap/{map_id}/export/svg?{query}').status_code == 400
+
+class TestGRINDETally:
+    """Tests des comptages GRINDE maintenus à chaque mutation"""
+
+    @staticmethod
+    def assert_matches_rebuild(mindmap):
+        rebuilt = backend.GrindeTally.from_map(mindmap.nodes, mindmap.connections)
+        assert vars(mindmap.tally) == vars(rebuilt)
+        assert mindmap.tally.features() == rebuilt.features()
+
+    def test_incremental_tally_matches_rebuild(self):
+        """Test des comptages après ajout, mise à jour et suppression"""
+        mindmap = backend.MindMap(mode='grinde')
+        central = mindmap.add_node({'text': '🎯 Centre', 'type': 'central', 'size': 30})
+        group = mindmap.add_node({'text': 'Groupe un', 'type': 'group', 'size': 25})
+        detail = mindmap.add_node({'text': 'Détail deux un', 'type': 'detail'})
+        mindmap.add_connection({'source': central['id'], 'target': group['id'], 'type': 'arrow'})
+        mindmap.add_connection({'source': group['id'], 'target': detail['id'], 'type': 'double'})
+        self.assert_matches_rebuild(mindmap)
+
+        mindmap.update_node(group['id'], {'text': '💡 Groupe renommé', 'color': '#10b981', 'type': 'concept'})
+        self.assert_matches_rebuild(mindmap)
+
+        mindmap.delete_node(detail['id'])
+        self.assert_matches_rebuild(mindmap)
+        assert mindmap.tally.connection_count == 1
+        assert mindmap.tally.double_count == 0
+        assert mindmap.tally.visual_nodes == 2
+        assert 'deux' not in mindmap.tally.words
+
+        mindmap.nodes = [central]
+        self.assert_matches_rebuild(mindmap)
+
+    def test_stats_route_uses_tally(self, client):
+        """Test du score servi par /stats après des mutations REST"""
+        mindmap = create_map(client)
+        map_id = mindmap['id']
+        ids = [json.loads(client.post(f'/api/mindmap/{map_id}/node',
+                   json={'text': f'Idée {i}', 'type': 'group'}).data)['node']['id'] for i in range(3)]
+        client.post(f'/api/mindmap/{map_id}/connection',
+            json={'source': ids[0], 'target': ids[1], 'type': 'arrow'})
+        client.put(f'/api/mindmap/{map_id}/node/{ids[1]}', json={'text': '💡 Idée'})
+        client.delete(f'/api/mindmap/{map_id}/node/{ids[2]}')
+
+        stats = json.loads(client.get(f'/api/mindmap/{map_id}/stats').data)['stats']
+        stored = backend.mindmaps_db[map_id]
+        self.assert_matches_rebuild(stored)
+        rebuilt = backend.GrindeTally.from_map(stored.nodes, stored.connections)
+        assert stats['grinde_score'] == backend.grinde.score(rebuilt, 'master')
+
+    def test_invalid_node_values_keep_map_consistent(self, client):
+        """Test de valeurs de nœud mal typées : converties avant toute modification, version et ETag changés"""
+        mindmap = create_map(client)
+        map_id, central_id = mindmap['id'], mindmap['nodes'][0]['id']
+        stored = backend.mindmaps_db[map_id]
+
+        response = client.put(f'/api/mindmap/{map_id}/node/{central_id}', json={'text': 5})
+        assert response.status_code == 200
+        assert json.loads(response.data)['node']['text'] == '5'
+        assert stored.nodes[0]['text'] == '5'
+        assert stored.version == mindmap['version'] + 1
+        assert response.headers['ETag'] != f'"{map_id}-v{mindmap["version"]}"'
+        assert response.headers['ETag'] == f'"{backend.version_etag(stored)}"'
+        self.assert_matches_rebuild(stored)
+
+        response = client.post(f'/api/mindmap/{map_id}/node', json={'text': 'Taille', 'size': [1], 'color': {'r': 1}})
+        assert response.status_code == 200
+        node = json.loads(response.data)['node']
+        assert 'size' not in node and 'color' not in node
+        assert len(stored.nodes) == 2
+        assert stored.version == mindmap['version'] + 2
+        self.assert_matches_rebuild(stored)
+        assert client.get(f'/api/mindmap/{map_id}/stats').status_code == 200
+
+        # Nœud inutilisable : carte inchangée
+        version = stored.version
+        with pytest.raises(backend.map_schema.SchemaError):
+            stored.add_node(['pas un nœud'])
+        assert (len(stored.nodes), stored.version) == (2, version)
+        self.assert_matches_rebuild(stored)
+
+class TestCollaboration:
+    """Tests pour les sessions collaboratives Socket.IO"""
+
+    def test_disconnect_leaves_collaboration(self):
+        """Test du nettoyage des sessions à la déconnexion"""
+        client = socketio.test_client(app)
+        client.emit('join_collaboration', {
+            'map_id': 'test-map-disconnect',
+            'user_id': 'user-789'
+        })
+        assert 'test-map-disconnect' in backend.collaborations
+
+        client.disconnect()
+        assert 'test-map-disconnect' not in backend.collaborations
+        assert not backend.active_connections
+
+    def test_connection_limit(self):
+        """Test du refus des connexions au-delà de la limite configurée"""
+        app.config['SOCKETIO_MAX_CONNECTIONS'] = 1
+        try:
+            first = socketio.test_client(app)
+            second = socketio.test_client(app)
+            assert first.is_connected()
+            assert not second.is_connected()
+            first.disconnect()
+            # La place libérée est de nouveau disponible
+            third = socketio.test_client(app)
+            assert third.is_connected()
+            third.disconnect()
+        finally:
+            app.config['SOCKETIO_MAX_CONNECTIONS'] = 0
+
+    def test_shutdown_warns_before_disconnecting(self, monkeypatch):
+        """Test de l'arrêt : server_shutdown envoyé, délai de grâce, puis déconnexion des sockets restants"""
+        client = socketio.test_client(app)
+        events = []
+
+        def sleep(seconds):
+            received = [(message['name'], message['args'][0]) for message in client.get_received()]
+            events.append((seconds, client.is_connected(), received))
+        monkeypatch.setitem(app.config, 'SHUTDOWN_GRACE_PERIOD', 7)
+        monkeypatch.setattr(socketio, 'sleep', sleep)
+
+        backend.drain_connections()
+        # Les clients sont prévenus, puis encore connectés pendant le délai annoncé
+        assert events == [(7, True, [('server_shutdown', {'reconnect_after': 7})])]
+        assert not client.is_connected()
+        assert not backend.active_connections
+
+    def test_server_pool_above_connection_limit(self, monkeypatch):
+        """Test du pool de greenthreads : au-dessus de la limite de sockets, marge REST comprise"""
+        monkeypatch.setitem(app.config, 'SOCKETIO_MAX_CONNECTIONS', 0)
+        assert backend.server_options('eventlet') == {}
+        monkeypatch.setitem(app.config, 'SOCKETIO_MAX_CONNECTIONS', 5000)
+        assert backend.server_options('eventlet') == {'max_size': 5000 + app.config['HTTP_POOL_HEADROOM']}
+        assert backend.server_options('gevent') == {}
+        monkeypatch.setitem(app.config, 'SOCKETIO_MAX_CONNECTIONS', 10)
+        assert backend.server_options('eventlet')['max_size'] > 10 + app.config['HTTP_POOL_HEADROOM']
@@ -0,0 +1,519 @@
+# test_map_modules.py - Tests des modules partagés (grinde, map_catalog, map_outline, map_schema, map_stream, map_thumbnail)
+
+import importlib.util
+import io
+import json
+import os
+
+import pytest
+
+import grinde
+import map_catalog
+import map_outline
+import map_schema
+import map_stream
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(name, filename):
+    """Charger un script dont le nom de fichier n'est pas importable (tirets)"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class TestMapCatalog:
+    """Tests pour le catalogue des cartes, utilisé sans l'application Flask"""
+
+    def test_installer_rebuilds_catalog_under_base_dir(self, tmp_path, monkeypatch):
+        """Test de --rebuild-catalog lancé depuis un autre dossier que base_dir"""
+        base_dir, elsewhere = tmp_path / 'install', tmp_path / 'elsewhere'
+        (base_dir / 'mindmaps').mkdir(parents=True)
+        elsewhere.mkdir()
+        for index, mode in enumerate(['grinde', 'buzan', 'grinde']):
+            with open(base_dir / 'mindmaps' / f'map_{index}.json', 'w', encoding='utf-8') as f:
+                json.dump({'id': f'map_{index}', 'title': f'Carte {index}', 'mode': mode,
+                           'nodes': [{'id': 'c', 'text': 'Centre', 'type': 'central'}],
+                           'connections': []}, f)
+        monkeypatch.chdir(elsewhere)
+
+        installer = load_script('mindmap_mini_installer', 'mindmap-mini-installer.py').MindMapMiniInstaller()
+        installer.base_dir = base_dir
+        installer.rebuild_catalog(workers=1)
+
+        assert list(elsewhere.iterdir()) == []
+        assert sorted(p.name for p in base_dir.iterdir()) == ['mindmaps']
+        with open(base_dir / 'mindmaps' / '.catalog.json', encoding='utf-8') as f:
+            stored = json.load(f)
+        assert stored['grinde'] == map_catalog.GRINDE_SCORE_VERSION
+        entries = {entry['id']: entry for entry in stored['entries']}
+        assert sorted(entries) == ['map_0', 'map_1', 'map_2']
+        assert entries['map_0']['grindeScore']['total'] >= 0
+        assert entries['map_1']['grindeScore'] is None
+
+        # Le catalogue écrit est relu tel quel
+        catalog = map_catalog.MapCatalog(str(base_dir / 'mindmaps'), str(base_dir / 'mindmaps' / '.catalog.json'))
+        catalog.load()
+        assert catalog.stats()['totalMaps'] == 3
+        assert catalog.stats()['grindeCount'] == 2
+
+    def test_invalid_entry_leaves_catalog_untouched(self, tmp_path):
+        """Test d'une entrée invalide : refusée avant toute modification des index et agrégats"""
+        catalog = map_catalog.MapCatalog(str(tmp_path), str(tmp_path / '.catalog.json'))
+        summary = map_catalog.summarize_header('a', {'title': 'A', 'modified': '2024-01-01'}, 3, 2)
+        catalog._put(summary)
+        before = (dict(catalog.totals), {name: list(index) for name, index in catalog.indexes.items()})
+
+        for field, value in (('title', 123), ('modified', None), ('nodeCount', '3'),
+                             ('grindeScore', {'total': 'x'})):
+            with pytest.raises((TypeError, ValueError, AttributeError)):
+                catalog._put(dict(summary, **{field: value}))
+            assert (catalog.totals, catalog.indexes) == before
+            assert catalog.entries['a'] is summary
+
+    def test_changes_and_tombstones(self, tmp_path, monkeypatch):
+        """Test des changements faits hors de l'application, des suppressions retenues puis oubliées"""
+        def write(map_id, title):
+            path = tmp_path / f'{map_id}.json'
+            path.write_text(json.dumps({'id': map_id, 'title': title, 'mode': 'buzan', 'nodes': [], 'connections': []}),
+                            encoding='utf-8')
+            return path
+        write('a', 'A')
+        write('b', 'B')
+        catalog = map_catalog.MapCatalog(str(tmp_path), str(tmp_path / '.catalog.json'))
+        catalog.ensure_loaded(workers=1)
+        since = catalog.changes(since=catalog.horizon)['cursor']
+
+        stat = write('a', 'A modifiée').stat()
+        os.utime(tmp_path / 'a.json', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        os.remove(tmp_path / 'b.json')
+        changes = catalog.changes(since=since)
+        assert (changes['updated'], changes['deleted'], changes['full']) == (['a'], ['b'], False)
+        assert changes['cursor'] >= since
+        assert catalog.changes(since=catalog.horizon - 1)['full'] is True
+        assert catalog.changes()['updated'] == ['a']
+
+        # Suppression persistée, puis expirée : l'historique ne remonte plus assez loin
+        catalog.flush()
+        reloaded = map_catalog.MapCatalog(str(tmp_path), str(tmp_path / '.catalog.json'))
+        reloaded.ensure_loaded(workers=1)
+        assert reloaded.horizon == catalog.horizon
+        assert reloaded.changes(since=since)['deleted'] == ['b']
+        monkeypatch.setattr(map_catalog.MapCatalog, 'TOMBSTONE_DAYS', 0)
+        reloaded.dirty = True
+        reloaded.flush()
+        assert reloaded.tombstones == {}
+        assert reloaded.horizon > since
+        assert reloaded.changes(since=since)['full'] is True
+
+def node(node_id, text=None, node_type='concept'):
+    return {'id': node_id, 'text': node_id if text is None else text, 'type': node_type}
+
+def edge(source, target):
+    return {'source': source, 'target': target}
+
+def outline(entries):
+    """(profondeur, texte, renvoi ?) des entrées d'un plan"""
+    return [(depth, item['text'], reference) for depth, item, reference in entries]
+
+class TestMapOutline:
+    """Tests pour le plan hiérarchique construit à partir des connexions"""
+
+    def test_cycle_becomes_reference(self):
+        """Test d'un cycle : chaque nœud placé une fois, la connexion en trop devient un renvoi"""
+        nodes = [node('c', 'Centre', 'central'), node('a'), node('b')]
+        attached, detached = map_outline.build_outline(nodes, [edge('c', 'a'), edge('a', 'b'), edge('b', 'c')])
+        # b est à distance 1 du centre (connexion b -> c lue dans les deux sens)
+        assert outline(attached) == [(0, 'Centre', False), (1, 'a', False), (2, 'b', True), (1, 'b', False)]
+        assert detached == []
+
+    def test_shared_node_placed_once(self):
+        """Test d'un nœud partagé (DAG) : placé sous son premier parent, renvoi sous le second"""
+        nodes = [node('c', 'Centre', 'central'), node('a'), node('b'), node('d')]
+        connections = [edge('c', 'a'), edge('c', 'b'), edge('a', 'd'), edge('b', 'd')]
+        attached, _ = map_outline.build_outline(nodes, connections)
+        assert outline(attached) == [
+            (0, 'Centre', False), (1, 'a', False), (2, 'd', False), (1, 'b', False), (2, 'd', True)
+        ]
+
+    def test_detached_islands_and_invalid_items(self):
+        """Test des îlots détachés, nœuds orphelins et connexions invalides ignorées"""
+        nodes = [node('c', 'Centre', 'central'), node('a'), node('x'), node('y'), node('z'),
+                 'pas un nœud', {'text': 'sans id'}, node('a', 'doublon')]
+        connections = [edge('c', 'a'), edge('x', 'y'), edge('z', 'z'), edge('a', 'absent'),
+                       {'source': ['c'], 'target': 'x'}, None]
+        attached, detached = map_outline.build_outline(nodes, connections)
+        assert outline(attached) == [(0, 'Centre', False), (1, 'a', False)]
+        assert outline(detached) == [(0, 'x', False), (1, 'y', False), (0, 'z', False)]
+
+    def test_first_node_is_root_without_central(self):
+        """Test d'une carte sans nœud central : le premier nœud sert de racine"""
+        attached, detached = map_outline.build_outline([node('a'), node('b')], [edge('b', 'a')])
+        assert outline(attached) == [(0, 'a', False), (1, 'b', False)]
+        assert detached == []
+
+    def test_opml_nesting(self):
+        """Test de l'imbrication OPML : éléments ouverts seulement s'ils ont des enfants"""
+        nodes = [node('c', 'Centre & co', 'central'), node('a'), node('b'), node('d'), node('seul')]
+        connections = [edge('c', 'a'), edge('a', 'b'), edge('c', 'd')]
+        opml = ''.join(map_outline.iter_outline('opml', 'Titre <1>', nodes, connections, 'Non reliées'))
+        assert opml.splitlines()[3:] == [
+            '    <title>Titre &lt;1&gt;</title>',
+            '  </head>',
+            '  <body>',
+            '    <outline text="Centre &amp; co">',
+            '      <outline text="a">',
+            '        <outline text="b"/>',
+            '      </outline>',
+            '      <outline text="d"/>',
+            '    </outline>',
+            '    <outline text="Non reliées">',
+            '      <outline text="seul"/>',
+            '    </outline>',
+            '  </body>',
+            '</opml>'
+        ]
+
+    def test_markdown_and_text_rendering(self):
+        """Test des plans Markdown et texte (libellés sur une ligne, renvois marqués)"""
+        nodes = [node('c', 'Centre\n  multi', 'central'), node('a'), node('b', '')]
+        connections = [edge('c', 'a'), edge('a', 'b'), edge('b', 'c')]
+        markdown = ''.join(map_outline.iter_outline('outline', 'T', nodes, connections, 'Non reliées'))
+        assert markdown.splitlines() == ['# T', '', '- Centre multi', '  - a', '    - ↪ …', '  - …']
+        text = ''.join(map_outline.iter_outline('outline-text', 'T', nodes, connections, 'Non reliées'))
+        assert text.splitlines() == ['T', '=', '', 'Centre multi', '    a', '        ↪ …', '    …']
+
+class TestMapSchema:
+    """Tests pour la validation et la normalisation des cartes"""
+
+    def test_duplicate_ids_renamed(self):
+        """Test des ids en double renommés (a, a_2, a_3...) dans l'ordre des nœuds"""
+        data = {'nodes': [node('a'), node('a', 'deux'), node('a_2', 'pris'), node('a', 'trois'), {'text': 'sans id'}],
+                'connections': [edge('a', 'a_2'), dict(edge('a', 'a_3'), id='k'), dict(edge('a_2', 'a'), id='k')]}
+        report = map_schema.normalize_map(data)
+        ids = [item['id'] for item in data['nodes']]
+        # Un seul passage : un id libre au moment du renommage peut être repris
+        # plus loin, le nœud suivant est alors renommé à son tour
+        assert ids[:4] == ['a', 'a_2', 'a_2_2', 'a_3']
+        assert isinstance(ids[4], str) and ids[4] not in ids[:4]
+        assert [item['text'] for item in data['nodes'][:4]] == ['a', 'deux', 'pris', 'trois']
+        # Connexions : ids en double renommés comme ceux des nœuds
+        assert [(c['source'], c['target'], c.get('id')) for c in data['connections']] == [
+            ('a', 'a_2', None), ('a', 'a_3', 'k'), ('a_2', 'a', 'k_2')
+        ]
+        assert report['renamedIds'] == 5
+        assert map_schema.changed(report)
+
+    def test_dangling_connections_dropped(self):
+        """Test des connexions vers un nœud inconnu ou invalides retirées"""
+        data = {'nodes': [node('a'), node('b'), 'pas un nœud'],
+                'connections': [edge('a', 'b'), edge('a', 'absent'), edge('absent', 'b'),
+                                {'source': {'id': 'b'}, 'target': {'id': 'a'}},
+                                {'source': ['a'], 'target': 'b'}, {'target': 'b'}, None]}
+        report = map_schema.normalize_map(data)
+        assert data['connections'] == [edge('a', 'b'), edge('b', 'a')]
+        assert report['droppedConnections'] == 5
+        assert report['droppedNodes'] == 1
+
+    def test_field_coercion(self):
+        """Test de la conversion des nombres et textes, et des valeurs invalides retirées"""
+        data = {'title': 12, 'mode': 'autre', 'tags': ['a', 3, None],
+                'nodes': [{'id': 1, 'text': 42, 'x': '120.5', 'y': 'n/a', 'size': '20',
+                           'shapeWidth': float('nan'), 'shapeHeight': True, 'color': 5, 'custom': [1]},
+                          {'id': 2, 'text': None, 'x': 10, 'y': 2.5, 'type': 'concept'}]}
+        report = map_schema.normalize_map(data)
+        first, second = data['nodes']
+        assert first == {'id': 1, 'text': '42', 'x': 120.5, 'size': 20, 'custom': [1]}
+        assert type(first['size']) is int
+        assert second == {'id': 2, 'text': '', 'x': 10, 'y': 2.5, 'type': 'concept'}
+        assert (data['title'], data['mode'], data['tags']) == ('12', map_schema.DEFAULT_MODE, ['a', '3'])
+        assert report['fields'] == 11
+
+    def test_partial_update_with_node_ids(self):
+        """Test d'une mise à jour sans nœuds : connexions vérifiées contre `node_ids`"""
+        data = {'title': 'Titre', 'connections': [edge('a', 'b'), edge('a', 'c')]}
+        report = map_schema.normalize_map(data, node_ids={'a', 'b'})
+        assert 'nodes' not in data and 'mode' not in data
+        assert data['connections'] == [edge('a', 'b')]
+        assert report['droppedConnections'] == 1
+
+        # Sans node_ids, aucune connexion n'est rattachée
+        data = {'connections': [edge('a', 'b')]}
+        map_schema.normalize_map(data)
+        assert data['connections'] == []
+
+    def test_valid_map_unchanged(self):
+        """Test d'une carte déjà valide : aucune correction signalée, valeurs répétées partagées"""
+        data = {'title': 'T', 'mode': 'buzan', 'nodes': [node('a'), node('b')],
+                'connections': [dict(edge('a', 'b'), type='simple')]}
+        report = map_schema.normalize_map(data)
+        assert not map_schema.changed(report)
+        assert data['nodes'][0]['type'] is data['nodes'][1]['type']
+
+    def test_unusable_maps_rejected(self):
+        """Test des cartes inutilisables (SchemaError, sous-classe de ValueError)"""
+        for data in ([], {'nodes': {'a': {}}}, {'connections': 'a'}, {'title': ['x']}):
+            with pytest.raises(map_schema.SchemaError):
+                map_schema.normalize_map(data)
+        data = {'nodes': None, 'connections': None}
+        map_schema.normalize_map(data)
+        assert data == {'nodes': [], 'connections': []}
+        assert issubclass(map_schema.SchemaError, ValueError)
+
+def parse(stream):
+    """Valeur lue conteneur par conteneur, comme read_map_header et load_map"""
+    char = stream.peek()
+    if char == '{':
+        return {key: parse(stream) for key in stream.iter_object()}
+    if char == '[':
+        return list(stream.iter_items())
+    return stream.value()
+
+def stream_of(text, chunk_size=map_stream.CHUNK_SIZE, **options):
+    return map_stream.JsonStream(io.StringIO(text), chunk_size=chunk_size, **options)
+
+SAMPLE_DOCUMENT = json.dumps({
+    'title': 'Échappés "\\ \u00e9 \U0001f3af \ud83c',
+    'numbers': [0, -1, 12345678901234567890, -12.5e-3, 1E+10, 3.0],
+    'nested': {'a': [[], {}, [1, [2, {'b': None}]]], 'c': True, 'd': False},
+    'nodes': [{'id': str(i), 'text': f'Nœud {i} 🎯', 'x': i * 1.5} for i in range(20)],
+    'empty': '',
+    'tail': -0.25
+}, ensure_ascii=False, indent=1)
+
+class TestMapStream:
+    """Tests pour l'analyseur JSON incrémental et la lecture en flux des cartes"""
+
+    def test_values_split_across_chunks(self):
+        """Test des nombres, chaînes et conteneurs coupés à toutes les frontières de morceaux"""
+        expected = json.loads(SAMPLE_DOCUMENT)
+        for chunk_size in range(1, 17):
+            assert parse(stream_of(SAMPLE_DOCUMENT, chunk_size)) == expected
+            assert stream_of(SAMPLE_DOCUMENT, chunk_size).value() == expected
+        for text in ('-12.5e-3', '12345678901234567890', '"a\\u00e9"', '[1, 22, 333]'):
+            for chunk_size in range(1, len(text) + 1):
+                assert stream_of(text, chunk_size).value() == json.loads(text)
+
+    def test_count_and_skip(self):
+        """Test du comptage des éléments d'un tableau et des valeurs sautées"""
+        for chunk_size in (1, 3, 64):
+            stream = stream_of('{"skip": {"a": [1, 2]}, "items": [1, "x", [2, 3], {"a": []}], "end": 1}', chunk_size)
+            counts = {}
+            for key in stream.iter_object():
+                if key == 'items':
+                    counts[key] = stream.count_items()
+                else:
+                    stream.skip()
+            assert counts == {'items': 4}
+        assert stream_of('[ ]').count_items() == 0
+
+    def test_truncated_and_trailing_data(self):
+        """Test des documents tronqués ou suivis d'autres données (mêmes refus que json.loads)"""
+        document = json.dumps({'title': 'T', 'nodes': [{'id': 'a', 'text': 'A', 'x': 12.5}], 'connections': []})
+        for end in range(len(document)):
+            with pytest.raises(map_stream.JsonStreamError):
+                map_stream.load_map(io.StringIO(document[:end]))
+        assert map_stream.load_map(io.StringIO(document + ' \n')) == json.loads(document)
+        for trailing in (' x', '{}', ', 1'):
+            with pytest.raises(map_stream.JsonStreamError):
+                map_stream.load_map(io.StringIO(document + trailing))
+        for invalid in ('[]', '"carte"', '{"nodes": [1,]}', '{"a" 1}', '{1: 2}'):
+            with pytest.raises(map_stream.JsonStreamError):
+                map_stream.load_map(io.StringIO(invalid))
+
+    def test_import_limits(self):
+        """Test des limites de load_map : taille d'une valeur, profondeur, textes, nœuds et connexions"""
+        def load(data, **limits):
+            return map_stream.load_map(io.StringIO(json.dumps(data)), **limits)
+
+        data = {'title': 'Titre', 'nodes': [node('a', 'x' * 10), node('b')],
+                'connections': [edge('a', 'b')], 'metadata': {'deep': {'er': [1]}}}
+        assert load(data, max_nodes=2, max_connections=1, max_text_length=10, max_depth=4) == data
+        for limits in ({'max_nodes': 1}, {'max_connections': 0}, {'max_text_length': 9}, {'max_depth': 3}):
+            with pytest.raises(map_stream.LimitError):
+                load(data, **limits)
+        with pytest.raises(map_stream.LimitError):
+            load(dict(data, title='t' * 11), max_text_length=10)
+        # Profondeur : racine (1), tableau (2), nœud (3), puis ses valeurs
+        with pytest.raises(map_stream.LimitError):
+            load({'nodes': [{'id': 'a', 'style': {'font': {}}}]}, max_depth=4)
+        assert load({'nodes': [{'id': 'a', 'style': {}}]}, max_depth=4)
+
+        # Taille d'une valeur : bornée même quand elle arrive par petits morceaux
+        huge = json.dumps({'nodes': [{'id': 'a', 'image': 'x' * (3 * map_stream.CHUNK_SIZE)}]})
+        with pytest.raises(map_stream.LimitError):
+            map_stream.load_map(io.StringIO(huge), max_value_size=map_stream.CHUNK_SIZE)
+        assert map_stream.load_map(io.StringIO(huge))['nodes'][0]['id'] == 'a'
+        with pytest.raises(map_stream.LimitError):
+            parse(stream_of('"' + 'x' * 100 + '"', 8, max_value_size=16))
+
+    def write_map(self, tmp_path, data, name='carte.json', header_first=True):
+        path = tmp_path / name
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(map_stream.header_first(data) if header_first else data, f, ensure_ascii=False)
+        return str(path)
+
+    def test_streamed_header_matches_full_load(self, tmp_path):
+        """Test de read_map_header en flux : même en-tête que header_from_map, quel que soit l'ordre des champs"""
+        data = {
+            'id': 'm', 'title': 'Carte', 'mode': 'grinde', 'created': '2024-01-01', 'modified': '2024-01-02',
+            'nodes': [node('c', '🎯 Centre', 'central'), node('g', 'Groupe un', 'group'), 'pas un nœud'],
+            'connections': [dict(edge('c', 'g'), type='arrow'), None],
+            'metadata': {'language': 'en', 'zoom': 2}, 'custom': {'ignored': [1, 2]}
+        }
+        expected = map_stream.header_from_map(data)
+        assert expected['nodeCount'] == 3 and expected['connectionCount'] == 2
+        assert expected['grinde']['features'] == grinde_features(data)
+        for header_first in (True, False):
+            path = self.write_map(tmp_path, data, header_first=header_first)
+            assert map_stream.read_map_header(path, stream_min_size=0) == expected
+            assert map_stream.read_map_header(path) == expected
+
+        buzan = dict(data, mode='buzan')
+        path = self.write_map(tmp_path, buzan)
+        assert map_stream.read_map_header(path, stream_min_size=0) == map_stream.header_from_map(buzan)
+        assert map_stream.header_from_map(buzan)['grinde'] is None
+
+    def test_persisted_score_and_stale_hash(self, tmp_path, monkeypatch):
+        """Test du score persisté : nœuds seulement hachés si l'empreinte concorde, second passage sinon"""
+        data = {'title': 'Carte', 'mode': 'grinde', 'nodes': [node('c', 'Centre', 'central'), node('a')],
+                'connections': [edge('c', 'a')], 'metadata': {}}
+        digest = map_stream.header_from_map(data)['grinde']['hash']
+        data['metadata']['grinde'] = {'hash': digest, 'score': {'total': 42}}
+        path = self.write_map(tmp_path, data)
+        header = map_stream.read_map_header(path, stream_min_size=0)
+        assert header == map_stream.header_from_map(data)
+        assert header['grinde'] == {'features': None, 'hash': digest}
+
+        # Carte modifiée hors de l'application : l'empreinte persistée ne concorde plus
+        data['nodes'].append(node('b', 'Ajouté'))
+        path = self.write_map(tmp_path, data)
+        calls = []
+        read = map_stream.read_map_header
+        monkeypatch.setattr(map_stream, 'read_map_header', lambda *args, **kwargs: calls.append(kwargs) or read(*args, **kwargs))
+        header = map_stream.read_map_header(path, stream_min_size=0)
+        assert [call.get('trust_persisted', True) for call in calls] == [True, False]
+        assert header == map_stream.header_from_map(data)
+        assert header['grinde']['features'] == grinde_features(data)
+        assert header['grinde']['hash'] != digest
+
+def grinde_features(data):
+    nodes = [item for item in data['nodes'] if isinstance(item, dict)]
+    connections = [item for item in data['connections'] if isinstance(item, dict)]
+    return grinde.GrindeTally.from_map(nodes, connections).features()
+
+class TestGrinde:
+    """Tests pour les comptages et scores GRINDE partagés"""
+
+    # Vecteurs dans l'ordre de grinde.FEATURES, cas limites compris :
+    # carte vide, nœud seul, aucune connexion, ratios non entiers, plafonds
+    ROWS = [
+        (0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (1, 0, 1, 0, 0, 0, 0, 0, 1, 1),
+        (2, 1, 3, 2, 1, 0, 0, 0, 1, 1),
+        (4, 1, 7, 5, 2, 5, 2, 1, 2, 3),
+        (7, 2, 11, 1, 1, 3, 1, 1, 3, 2),
+        (3, 9, 60, 40, 3, 1000, 999, 1, 12, 12),
+    ]
+
+    def sample_maps(self):
+        return [
+            {'nodes': [], 'connections': []},
+            {'nodes': [{'id': 'c', 'text': 'Centre', 'type': 'central'}], 'connections': []},
+            {'nodes': [{'id': 'c', 'text': '🎯 Projet', 'type': 'central', 'size': 30},
+                       {'id': 'g', 'text': 'Groupe un', 'type': 'group', 'color': '#ef4444'},
+                       {'id': 'n', 'text': 'Idée ✨ idée'}],
+             'connections': [{'source': 'c', 'target': 'g', 'type': 'arrow'},
+                             {'source': 'g', 'target': 'n', 'type': 'double'},
+                             {'source': 'c', 'target': 'n'}]}
+        ]
+
+    @pytest.mark.parametrize('profile', sorted(grinde.PROFILES))
+    def test_batch_matches_single_scores(self, profile, monkeypatch):
+        """Test du score par lot : identique au score carte par carte, avec et sans NumPy"""
+        tallies = [grinde.GrindeTally.from_map(data['nodes'], data['connections']) for data in self.sample_maps()]
+        rows = self.ROWS + [tally.features() for tally in tallies]
+        batch = grinde.score_features(rows, profile)
+        assert [grinde.score_features([row], profile)[0] for row in rows] == batch
+        assert [grinde.score(tally, profile) for tally in tallies] == batch[len(self.ROWS):]
+
+        monkeypatch.setattr(grinde, 'np', None)
+        assert grinde.score_features(rows, profile) == batch
+        assert [grinde.score(tally, profile) for tally in tallies] == batch[len(self.ROWS):]
+        assert grinde.score_features([], profile) == []
+
+    def test_batch_values(self, monkeypatch):
+        """Test des valeurs des scores : entiers Python, arrondis vers le bas, plafonnés à 100"""
+        nonverbal = {name: profile['nonverbal_key'] for name, profile in grinde.PROFILES.items()}
+        for use_numpy in (True, False):
+            if not use_numpy:
+                monkeypatch.setattr(grinde, 'np', None)
+            empty, single, _, partial, _, capped = grinde.score_features(self.ROWS, 'mini')
+            assert empty == dict.fromkeys(['grouped', 'reflective', 'interconnected', 'directional', 'emphasized',
+                                           nonverbal['mini'], 'total'], 0)
+            assert single['interconnected'] == 0 and single['directional'] == 0
+            # 5 connexions / 3 = 1.67 : int(1.67 * 60) = 100 ; 2 flèches sur 5 = 40 %
+            assert partial['interconnected'] == 100 and partial['directional'] == 40
+            assert all(type(value) is int for value in partial.values())
+            assert all(capped[key] == 100 for key in ('grouped', 'reflective', 'interconnected', 'nonverbal'))
+            assert capped['directional'] == 99
+            # Profil master : les connexions doubles comptent comme orientées
+            assert grinde.score_features(self.ROWS, 'master')[3]['directional'] == 60
+            assert nonverbal['master'] in grinde.score_features(self.ROWS, 'master')[3]
+
+    TEXTS = ['', 'Texte ASCII', 'Idée café', '🎯 Objectif', 'Mélange 💡 et ✨ ici', 'Étoile ⭐', '日本語 ☃',
+             'Symbole\u200b invisible']
+
+    def test_scan_text_matches_character_scan(self):
+        """Test du parcours des textes : identique au comptage caractère par caractère"""
+        for text in self.TEXTS + list(grinde.VISUAL_SYMBOLS):
+            expected = (sum(1 for c in text if ord(c) > 127), any(c in text for c in grinde.VISUAL_SYMBOLS))
+            assert grinde.scan_text(text) == expected, text
+
+    def test_tokenize(self):
+        """Test du tokenizer unique : minuscules, espaces multiples et texte absent"""
+        assert grinde.tokenize('  Idée  ÉTÉ\tidée\nFin ') == ['idée', 'été', 'idée', 'fin']
+        assert grinde.node_words({'text': 'Un DEUX'}) == ['un', 'deux']
+        assert grinde.node_words({'text': None}) == grinde.node_words({}) == []
+
+    def test_tally_counts(self):
+        """Test des comptages d'une carte, et retour à zéro après suppression de chaque élément"""
+        data = self.sample_maps()[2]
+        tally = grinde.GrindeTally.from_map(data['nodes'], data['connections'])
+        features = dict(zip(grinde.FEATURES, tally.features()))
+        # Les émojis isolés comptent comme des mots : 🎯 projet groupe un idée ✨
+        assert features == {
+            'node_count': 3, 'group_count': 1, 'unique_words': 6, 'non_ascii_chars': 4, 'visual_nodes': 2,
+            'connection_count': 3, 'arrow_count': 1, 'double_count': 1, 'distinct_sizes': 2, 'distinct_colors': 2
+        }
+        for node in data['nodes']:
+            tally.remove_node(node)
+        for connection in data['connections']:
+            tally.remove_connection(connection)
+        assert vars(tally) == vars(grinde.GrindeTally())
+
+class TestMapThumbnail:
+    """Tests pour les vignettes PNG dessinées avec PIL"""
+
+    def test_render_thumbnail(self):
+        """Test de la vignette d'une carte (couleur invalide, connexion vers un nœud absent)"""
+        Image = pytest.importorskip('PIL.Image')
+        import map_thumbnail
+
+        nodes = [
+            {'id': 'c', 'text': 'Centre', 'x': 0, 'y': 0, 'type': 'central', 'color': '#ef4444'},
+            {'id': 'a', 'text': 'A', 'x': 500, 'y': 300, 'color': 'pas une couleur'},
+            {'id': 'n', 'x': float('nan'), 'y': 'abc'}
+        ]
+        connections = [{'source': 'c', 'target': 'a'}, {'source': 'a', 'target': 'absent'}, None]
+        image = Image.open(io.BytesIO(map_thumbnail.render_png(nodes, connections, (160, 100))))
+        assert image.format == 'PNG'
+        assert image.size == (160, 100)
+        # Nœud central rouge, le nœud à la couleur invalide prend la couleur par défaut
+        colors = {color for _, color in image.getcolors(160 * 100)}
+        assert any(r > 200 and g < 100 and b < 100 for r, g, b in colors)
+        assert any(abs(r - 0x63) < 8 and abs(g - 0x66) < 8 and abs(b - 0xf1) < 8 for r, g, b in colors)
+
+        empty = Image.open(io.BytesIO(map_thumbnail.render_png([], [])))
+        assert empty.size == map_thumbnail.THUMBNAIL_SIZE
+        assert empty.getcolors() == [(320 * 200, (0xf8, 0xfa, 0xfc))]